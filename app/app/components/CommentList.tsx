@@ -19,25 +19,23 @@ export default function CommentList({ videoId }: { videoId: string }) {
   const [comments, setComments] = useState<Comment[]>([]);
   const [loading, setLoading] = useState(true);
   const [isFetchingNext, setIsFetchingNext] = useState(false);
-  const [page, setPage] = useState(1);
-  const [hasNextPage, setHasNextPage] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState("");
   const [activeSearch, setActiveSearch] = useState("");
   const scrollRef = useRef<HTMLDivElement>(null);
 
   const fetchComments = useCallback(
-    async (pageNum: number, isInitial = false) => {
+    async (cursor: string, isInitial = false) => {
       if (isInitial) setLoading(true);
       else setIsFetchingNext(true);
 
       try {
-        const data = await getVideoComments(videoId, pageNum, activeSearch);
+        const data = await getVideoComments(videoId, cursor, activeSearch);
         const newComments = data.results || [];
         setComments((prev) =>
           isInitial ? newComments : [...prev, ...newComments],
         );
-        setHasNextPage(!!data.next);
-        setPage(pageNum);
+        setNextCursor(data.next_cursor ?? null);
       } catch (err) {
         console.error(err);
       } finally {
@@ -50,8 +48,8 @@ export default function CommentList({ videoId }: { videoId: string }) {
 
   useEffect(() => {
     setComments([]);
-    setPage(1);
-    fetchComments(1, true);
+    setNextCursor(null);
+    fetchComments("", true);
   }, [videoId, activeSearch, fetchComments]);
 
   // Debounce search
@@ -63,10 +61,10 @@ export default function CommentList({ videoId }: { videoId: string }) {
   // Scroll-based infinite load
   const handleScroll = useCallback(() => {
     const el = scrollRef.current;
-    if (!el || !hasNextPage || isFetchingNext || loading) return;
+    if (!el || !nextCursor || isFetchingNext || loading) return;
     const nearBottom = el.scrollHeight - el.scrollTop - el.clientHeight < 300;
-    if (nearBottom) fetchComments(page + 1);
-  }, [hasNextPage, isFetchingNext, loading, page, fetchComments]);
+    if (nearBottom) fetchComments(nextCursor);
+  }, [nextCursor, isFetchingNext, loading, fetchComments]);
 
   const clearSearch = () => setSearchQuery("");
 
@@ -198,7 +196,7 @@ export default function CommentList({ videoId }: { videoId: string }) {
               </div>
             )}
 
-            {!hasNextPage && comments.length > 0 && (
+            {!nextCursor && comments.length > 0 && (
               <p className="text-center text-[10px] font-bold uppercase tracking-widest text-muted-foreground/40 py-4">
                 End of chat
               </p>
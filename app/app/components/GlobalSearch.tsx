@@ -16,11 +16,11 @@ import {
 } from "lucide-react";
 import { useSearchParams } from "next/navigation";
 import {
-  getComments,
   getStreamers,
   getCommentContext,
-  getTranscripts,
   getAliases,
+  searchAll,
+  SearchTranscriptHit,
 } from "../lib/api";
 import {
   Dialog,
@@ -96,6 +96,7 @@ interface TranscriptMatch {
   text: string;
   score: number;
   matchedKeyword: string;
+  chat: SearchTranscriptHit["chat"];
 }
 
 interface VideoGroup {
@@ -107,59 +108,6 @@ interface VideoGroup {
   transcripts: TranscriptMatch[];
 }
 
-// ── Fuzzy similarity (Levenshtein-based) ──────────────────────────────────────
-function levenshtein(a: string, b: string): number {
-  const m = a.length,
-    n = b.length;
-  const dp: number[][] = Array.from({ length: m + 1 }, (_, i) =>
-    Array.from({ length: n + 1 }, (_, j) => (i === 0 ? j : j === 0 ? i : 0)),
-  );
-  for (let i = 1; i <= m; i++)
-    for (let j = 1; j <= n; j++)
-      dp[i][j] =
-        a[i - 1] === b[j - 1]
-          ? dp[i - 1][j - 1]
-          : 1 + Math.min(dp[i - 1][j], dp[i][j - 1], dp[i - 1][j - 1]);
-  return dp[m][n];
-}
-
-function similarity(a: string, b: string): number {
-  a = a.toLowerCase();
-  b = b.toLowerCase();
-  if (a === b) return 1;
-  if (b.includes(a)) return 1;
-  const maxLen = Math.max(a.length, b.length);
-  return maxLen === 0 ? 1 : 1 - levenshtein(a, b) / maxLen;
-}
-
-function bestWordMatch(keyword: string, message: string): number {
-  const kLower = keyword.toLowerCase();
-  const mLower = message.toLowerCase();
-  if (mLower.includes(kLower)) return 1;
-
-  // Clean punctuation but keep spaces to split words
-  const cleanKeyword = kLower.replace(/[^\w\s]/g, "");
-  const cleanMessage = mLower.replace(/[^\w\s]/g, "");
-
-  if (cleanMessage.includes(cleanKeyword)) return 1;
-
-  const mWords = cleanMessage.split(/\s+/).filter(Boolean);
-  const kWords = cleanKeyword.split(/\s+/).filter(Boolean);
-
-  if (mWords.length === 0 || kWords.length === 0) return 0;
-
-  // Single word keyword: check against all words in message
-  if (kWords.length === 1) {
-    return Math.max(0, ...mWords.map((word) => similarity(cleanKeyword, word)));
-  }
-
-  // Multi-word keyword: assess full string similarity, and also check word against word
-  return Math.max(
-    similarity(cleanKeyword, cleanMessage),
-    ...mWords.map((word) => similarity(cleanKeyword, word)),
-  );
-}
-
 // ── Helpers ───────────────────────────────────────────────────────────────────
 function twitchTimestampLink(videoId: string, seconds: number): string {
   const h = Math.floor(seconds / 3600);
@@ -178,20 +126,6 @@ function formatTime(seconds: number): string {
     : `${m}:${s.toString().padStart(2, "0")}`;
 }
 
-const THRESHOLD = 0.7; // Lowered from 0.8 for better results
-
-// Generate 4-char n-grams from a keyword so backend icontains pre-filter
-// catches near-typos (e.g. "guldasan" → ngrams match "guldansan")
-function getSearchTerms(keyword: string): string[] {
-  const clean = keyword.toLowerCase().replace(/[^\w]/g, "");
-  if (clean.length <= 4) return [clean];
-  const ngrams = new Set<string>([clean]);
-  for (let i = 0; i <= clean.length - 4; i++) {
-    ngrams.add(clean.slice(i, i + 4));
-  }
-  return [...ngrams];
-}
-
 // Returns all alias expansions for a single keyword (excluding the keyword itself)
 function getAliasExpansions(
   keyword: string,
@@ -421,135 +355,53 @@ export function GlobalSearch() {
 
         const allCommentMatches: ScoredComment[] = [];
         const allTranscriptMatches: TranscriptMatch[] = [];
-        let page = startPage;
-        let hasMoreOnServer = true;
-        // Scan enough pages to cover multiple VODs; infinite scroll loads even more
-        // Further reduce batch sizes for much faster responses
-        const BATCH_SIZE = isLoadMore ? 5 : 3;
-        const MATCH_LIMIT = 50; // Stop early if we find enough matches to show something fast
         const expansionMap = buildExpansionMap(keywords, aliases);
         const expandedTerms = [...expansionMap.keys()];
 
-        while (hasMoreOnServer && page <= startPage + BATCH_SIZE - 1) {
-          // 1. Fetch Comments
-          // .catch handles 404 from DRF when page is out of range
-          const emptyPage = { results: [], next: null };
-          const commentPromise = !onlyTranscripts
-            ? getComments({
-                page,
-                page_size: 200,
-                search_or: expandedTerms.flatMap(getSearchTerms).join(","),
-                exclude_users: excludedUsers.join(","),
-                min_toxicity: toxicOnly ? toxicityThreshold : undefined,
-                video__streamer: activeFilter || undefined,
-              }).catch(() => emptyPage)
-            : Promise.resolve(emptyPage);
-
-          // 2. Fetch Transcripts (only if keywords are present and not in toxicOnly mode)
-          const transcriptPromise =
-            keywords.length > 0
-              ? getTranscripts({
-                  page,
-                  page_size: 200,
-                  search_or: expandedTerms.join(","),
-                  streamer: activeFilter || undefined,
-                }).catch(() => emptyPage)
-              : Promise.resolve(emptyPage);
-
-          const [commentData, transcriptData] = await Promise.all([
-            commentPromise,
-            transcriptPromise,
-          ]);
-
-          const newCommentBatch: Comment[] = commentData.results ?? [];
-          const newTranscriptBatch: {
-            id: string;
-            video: string;
-            video_title: string;
-            streamer_name: string;
-            video_created_at: string;
-            start_seconds: number;
-            text: string;
-          }[] = transcriptData.results ?? transcriptData ?? [];
-          hasMoreOnServer = !!commentData.next || !!transcriptData.next;
-
-          // Fuzzy filter Comments
-          for (const c of newCommentBatch) {
-            if (!c.video_id) continue;
-            let best = 0,
-              bestKw = "";
-            for (const term of expandedTerms) {
-              const msgMatch = bestWordMatch(term, c.message ?? "");
-              const nameMatch = bestWordMatch(
-                term,
-                c.commenter_display_name ?? "",
-              );
-              const s = Math.max(msgMatch, nameMatch);
-              if (s > best) {
-                best = s;
-                bestKw = expansionMap.get(term) ?? term;
-              }
-            }
-            if (keywords.length === 0 && toxicOnly) {
-              allCommentMatches.push({
-                ...c,
-                score: 1,
-                matchedKeyword: "Toxic Comment",
-              });
-            } else if (best >= THRESHOLD) {
-              allCommentMatches.push({
-                ...c,
-                score: best,
-                matchedKeyword: bestKw,
-              });
-            }
-          }
-
-          // Fuzzy filter Transcripts
-          for (const t of newTranscriptBatch) {
-            let best = 0,
-              bestKw = "";
-            for (const term of expandedTerms) {
-              const s = bestWordMatch(term, t.text ?? "");
-              if (s > best) {
-                best = s;
-                bestKw = expansionMap.get(term) ?? term;
-              }
-            }
-            if (best >= THRESHOLD) {
-              allTranscriptMatches.push({
-                id: `ts-${t.id}`,
-                video_id: t.video,
-                video_title: t.video_title,
-                video_streamer: t.streamer_name,
-                video_created_at: t.video_created_at,
-                start_seconds: t.start_seconds,
-                text: t.text,
-                score: best,
-                matchedKeyword: bestKw,
-              });
-            }
+        // One request: chat and transcript hits ranked together, one page of VODs
+        const data = await searchAll({
+          q: expandedTerms.join(",") || undefined,
+          streamer: activeFilter || undefined,
+          exclude_users: excludedUsers.join(",") || undefined,
+          min_toxicity: toxicOnly ? toxicityThreshold : undefined,
+          sources: onlyTranscripts ? "transcripts" : undefined,
+          page: startPage,
+          page_size: 10,
+        }).catch(() => ({ count: 0, next: null, results: [] }));
+        const hasMoreOnServer = !!data.next;
+
+        for (const g of data.results) {
+          for (const c of g.comments) {
+            allCommentMatches.push({
+              ...c,
+              toxicity_score: c.toxicity_score ?? undefined,
+              video_title: g.video_title,
+              video_streamer: g.video_streamer,
+              video_created_at: g.video_created_at,
+              matchedKeyword: c.matched
+                ? (expansionMap.get(c.matched) ?? c.matched)
+                : "Toxic Comment",
+            });
           }
-
-          dispatch(setLastScannedPage(page));
-          dispatch(setCanScanMore(hasMoreOnServer));
-
-          if (
-            !hasMoreOnServer ||
-            allCommentMatches.length + allTranscriptMatches.length >=
-              MATCH_LIMIT
-          ) {
-            break;
+          for (const t of g.transcripts) {
+            allTranscriptMatches.push({
+              id: `ts-${t.id}`,
+              video_id: g.video_id,
+              video_title: g.video_title,
+              video_streamer: g.video_streamer,
+              video_created_at: g.video_created_at,
+              start_seconds: t.start_seconds,
+              text: t.text,
+              score: t.score,
+              matchedKeyword: expansionMap.get(t.matched) ?? t.matched,
+              chat: t.chat,
+            });
           }
-
-          page++;
-          dispatch(
-            setSearchProgress(
-              `Scanning page ${page}... (${allCommentMatches.length + allTranscriptMatches.length} matches so far)`,
-            ),
-          );
         }
 
+        dispatch(setLastScannedPage(startPage));
+        dispatch(setCanScanMore(hasMoreOnServer));
+
         const newGroupsMap = new Map<string, VideoGroup>();
 
         if (isLoadMore) {
@@ -598,15 +450,8 @@ export function GlobalSearch() {
           }
         }
 
-        const grouped = [...newGroupsMap.values()].sort((a, b) => {
-          const dateA = a.video_created_at
-            ? new Date(a.video_created_at).getTime()
-            : 0;
-          const dateB = b.video_created_at
-            ? new Date(b.video_created_at).getTime()
-            : 0;
-          return dateB - dateA;
-        });
+        // Server order: best match first, then newest
+        const grouped = [...newGroupsMap.values()];
 
         grouped.forEach((g) => {
           g.comments.sort(
@@ -757,8 +602,8 @@ export function GlobalSearch() {
             Keyword Tracker
           </CardTitle>
           <CardDescription>
-            Add keywords to monitor. Matches with ≥{Math.round(THRESHOLD * 100)}
-            % similarity are shown, grouped by video.
+            Add keywords to monitor. Chat and transcript matches are shown
+            together, grouped by video, best match first.
           </CardDescription>
         </CardHeader>
         <CardContent className="space-y-3">
@@ -1050,8 +895,7 @@ export function GlobalSearch() {
                     {searchProgress || "Initializing search..."}
                   </p>
                   <p className="text-xs text-muted-foreground">
-                    Fuzzy matching with ≥{Math.round(THRESHOLD * 100)}%
-                    similarity threshold
+                    Searching chat and transcripts together
                   </p>
                 </div>
               </div>
@@ -1100,9 +944,8 @@ export function GlobalSearch() {
                       No matches found
                     </p>
                     <p className="text-sm">
-                      No messages matched with ≥{Math.round(THRESHOLD * 100)}%
-                      similarity. Try different keywords or remove the streamer
-                      filter.
+                      No messages or transcripts matched. Try different
+                      keywords or remove the streamer filter.
                     </p>
                   </div>
                 </CardContent>
@@ -1320,6 +1163,13 @@ export function GlobalSearch() {
                                     <p className="text-sm text-foreground/90 mt-2 font-medium italic leading-relaxed">
                                       &quot;{t.text}&quot;
                                     </p>
+                                    {t.chat && (
+                                      <p className="text-[11px] text-muted-foreground mt-1">
+                                        Chat: {t.chat.per_minute} msgs/min
+                                        {t.chat.relative != null &&
+                                          ` (×${t.chat.relative} the VOD average)`}
+                                      </p>
+                                    )}
                                   </div>
                                 ))}
                               </div>
@@ -27,6 +27,7 @@ import api, {
   getExcludedShoutouts,
   createExcludedShoutout,
   deleteExcludedShoutout,
+  waitForTranscriptFixTask,
 } from "../lib/api";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import {
@@ -403,12 +404,17 @@ export function StatsView({ standalone = false }: { standalone?: boolean }) {
       });
       setNewAliasWord("");
       setNewAliasCanonical("");
-      // Re-run fix_names for the current streamer
+      // Re-run fix_names for the current streamer; it answers 202 with a
+      // background task, so wait for it before re-reading the shoutouts
       const streamer = streamers.find((s) => s.id === streamerFilter);
       if (streamer) {
-        await api
+        const task = await api
           .post("/transcripts/fix_names/", { streamer_login: streamer.login })
+          .then((res) => res.data)
           .catch(() => null);
+        if (task?.id) {
+          await waitForTranscriptFixTask(task.id).catch(() => null);
+        }
       }
       refreshShoutouts();
     } finally {
@@ -22,22 +22,20 @@ export function TranscriptView({ videoId }: TranscriptViewProps) {
   const [entries, setEntries] = useState<TranscriptEntry[]>([]);
   const [loading, setLoading] = useState(true);
   const [isFetchingNext, setIsFetchingNext] = useState(false);
-  const [page, setPage] = useState(1);
-  const [hasNextPage, setHasNextPage] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [search, setSearch] = useState("");
   const scrollRef = useRef<HTMLDivElement>(null);
 
   const fetchEntries = useCallback(
-    async (pageNum: number, isInitial = false) => {
+    async (cursor: string, isInitial = false) => {
       if (isInitial) setLoading(true);
       else setIsFetchingNext(true);
 
       try {
-        const data = await getTranscripts({ video: videoId, page: pageNum });
+        const data = await getTranscripts({ video: videoId, cursor });
         const newEntries: TranscriptEntry[] = data.results ?? data;
         setEntries((prev) => (isInitial ? newEntries : [...prev, ...newEntries]));
-        setHasNextPage(!!data.next);
-        setPage(pageNum);
+        setNextCursor(data.next_cursor ?? null);
       } catch (err) {
         console.error("Failed to fetch transcripts:", err);
       } finally {
@@ -50,17 +48,17 @@ export function TranscriptView({ videoId }: TranscriptViewProps) {
 
   useEffect(() => {
     setEntries([]);
-    setPage(1);
-    fetchEntries(1, true);
+    setNextCursor(null);
+    fetchEntries("", true);
   }, [videoId, fetchEntries]);
 
   // Scroll-based infinite load
   const handleScroll = useCallback(() => {
     const el = scrollRef.current;
-    if (!el || !hasNextPage || isFetchingNext || loading) return;
+    if (!el || !nextCursor || isFetchingNext || loading) return;
     const nearBottom = el.scrollHeight - el.scrollTop - el.clientHeight < 300;
-    if (nearBottom) fetchEntries(page + 1);
-  }, [hasNextPage, isFetchingNext, loading, page, fetchEntries]);
+    if (nearBottom) fetchEntries(nextCursor);
+  }, [nextCursor, isFetchingNext, loading, fetchEntries]);
 
   const filteredEntries = entries.filter((e) =>
     e.text.toLowerCase().includes(search.toLowerCase()),
@@ -169,7 +167,7 @@ export function TranscriptView({ videoId }: TranscriptViewProps) {
             </div>
           )}
 
-          {!hasNextPage && entries.length > 0 && !search && (
+          {!nextCursor && entries.length > 0 && !search && (
             <p className="text-center text-[10px] font-bold uppercase tracking-widest text-muted-foreground/40 py-4">
               End of transcript
             </p>
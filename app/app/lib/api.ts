@@ -1,12 +1,20 @@
 import axios from "axios";
 
-const API_BASE_URL =
+const IS_LOCAL =
   typeof window !== "undefined" &&
   (window.location.hostname === "localhost" ||
     window.location.hostname === "127.0.0.1" ||
-    window.location.hostname.startsWith("192.168."))
-    ? `http://${window.location.hostname}:8000/api`
-    : "https://backend.permisossubtel.cl/api";
+    window.location.hostname.startsWith("192.168."));
+
+const API_BASE_URL = IS_LOCAL
+  ? `http://${window.location.hostname}:8000/api`
+  : "https://backend.permisossubtel.cl/api";
+
+// SSE views run on the ASGI server (chat-sse); in production the proxy
+// routes them by path (chat-sse.nginx.conf), locally they are on their own port.
+const SSE_BASE_URL = IS_LOCAL
+  ? `http://${window.location.hostname}:8001/api`
+  : API_BASE_URL;
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -32,6 +40,9 @@ export const getComments = async (params: {
   min_toxicity?: number;
   page?: number;
   page_size?: number;
+  // "" for the first page, then next_cursor from the previous response.
+  // Cursor pages are in VOD order and have no total count.
+  cursor?: string;
 }) => {
   const response = await api.get("/comments/", { params });
   return response.data;
@@ -39,10 +50,112 @@ export const getComments = async (params: {
 
 export const getVideoComments = async (
   videoId: string,
-  page = 1,
+  cursor = "",
   search?: string,
 ) => {
-  return getComments({ video_id: videoId, page, search });
+  return getComments({ video_id: videoId, cursor, search });
+};
+
+export interface ChatTimeline {
+  video_id: string;
+  bucket_seconds: number;
+  bucket_count: number;
+  messages: number[];
+  chatters: number[];
+  toxic: number[];
+}
+
+export const getVideoTimeline = async (
+  videoId: string,
+  bucket: 10 | 60 = 60,
+): Promise<ChatTimeline> => {
+  const response = await api.get(`/videos/${videoId}/timeline/`, {
+    params: { bucket },
+  });
+  return response.data;
+};
+
+// [offset, name, message, toxicity]
+export type ReplayComment = [number, string | null, string | null, number | null];
+
+export interface ReplayChunk {
+  video_id: string;
+  from: number;
+  until: number;
+  comments: ReplayComment[];
+  next: { from: number; after: string | null } | null;
+  prefetch_at: number | null;
+}
+
+// Chat replay: request the chunk in `next` once playback reaches `prefetch_at`
+export const getReplayChunk = async (
+  videoId: string,
+  from: number,
+  after?: string | null,
+): Promise<ReplayChunk> => {
+  const response = await api.get("/comments/replay/", {
+    params: { video_id: videoId, from, after: after || undefined },
+  });
+  return response.data;
+};
+
+export interface SearchComment {
+  id: string;
+  video_id: string;
+  commenter_login: string;
+  commenter_display_name: string;
+  content_offset_seconds: number;
+  message: string;
+  created_at: string;
+  is_toxic: boolean;
+  toxicity_score: number | null;
+  score: number; // 0..1, 1 = best chat hit
+  matched: string | null; // the q alternative it matched
+}
+
+export interface SearchTranscriptHit {
+  id: number;
+  video_id: string;
+  start_seconds: number;
+  end_seconds: number;
+  text: string;
+  snippet: string; // <mark>-highlighted
+  score: number; // 0..1, 1 = best transcript hit
+  matched: string;
+  // Chat around the segment (±30s); relative = rate / the VOD's average rate
+  chat: {
+    from: number;
+    until: number;
+    messages: number;
+    toxic: number;
+    per_minute: number;
+    relative: number | null;
+  } | null;
+}
+
+export interface SearchGroup {
+  video_id: string;
+  video_title: string;
+  video_streamer: string;
+  video_created_at?: string;
+  score: number;
+  comments: SearchComment[];
+  transcripts: SearchTranscriptHit[];
+}
+
+// Chat + transcripts in one request, paginated by VOD (best match first).
+// q: comma-separated alternatives.
+export const searchAll = async (params: {
+  q?: string;
+  streamer?: string;
+  exclude_users?: string;
+  min_toxicity?: number;
+  sources?: string; // "chat", "transcripts" or both (default)
+  page?: number;
+  page_size?: number;
+}): Promise<{ count: number; next: string | null; results: SearchGroup[] }> => {
+  const response = await api.get("/search/", { params });
+  return response.data;
 };
 
 export const getCommentContext = async (
@@ -58,6 +171,22 @@ export const getCommentContext = async (
   return response.data;
 };
 
+// Direct download link: the export streams the whole chat in one response,
+// so it is opened as a URL rather than fetched through axios.
+export const getCommentsExportUrl = (params: {
+  video_id?: string;
+  streamer_id?: string;
+  since?: string;
+  until?: string;
+  output?: "ndjson" | "csv";
+}) => {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value) query.set(key, value);
+  });
+  return `${API_BASE_URL}/comments/export/?${query.toString()}`;
+};
+
 export const searchComments = async (
   query: string,
   page = 1,
@@ -112,9 +241,10 @@ export const getClassificationTasks = async () => {
   return response.data;
 };
 
-export const requeueClassification = async (videoId: string) => {
+export const requeueClassification = async (videoId: string, reset = true) => {
   const response = await api.post("/classification-tasks/requeue/", {
     video_id: videoId,
+    reset,
   });
   return response.data;
 };
@@ -129,6 +259,37 @@ export const clearClassificationTasks = async () => {
   return response.data;
 };
 
+export interface TranscriptFixTask {
+  id: string;
+  scope: string;
+  status: "Pending" | "InProgress" | "Completed" | "Failed";
+  progress_percent: number;
+  videos_total: number;
+  videos_done: number;
+  total_corrected: number;
+  error_message: string | null;
+}
+
+export const getTranscriptFixTask = async (
+  taskId: string,
+): Promise<TranscriptFixTask> => {
+  const response = await api.get(`/transcript-fix-tasks/${taskId}/`);
+  return response.data;
+};
+
+// Endpoints that queue a name-fix job answer 202 with the task; poll it until
+// the worker is done before re-reading anything derived from transcripts.
+export const waitForTranscriptFixTask = async (
+  taskId: string,
+  intervalMs = 2000,
+): Promise<TranscriptFixTask> => {
+  for (;;) {
+    const task = await getTranscriptFixTask(taskId);
+    if (task.status === "Completed" || task.status === "Failed") return task;
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
 export const startScrape = async (videoId: string, oauth?: string) => {
   const response = await api.post(`/videos/scrape/${videoId}/`, { oauth });
   return response.data;
@@ -141,12 +302,16 @@ export interface ScrapeProgress {
   total_comments: number;
   percent: number;
   video_title?: string;
+  // ScrapeTask status: Pending until the scraper worker picks the task up
+  status?: "Pending" | "InProgress" | "Completed" | "Failed";
   done?: boolean;
   error?: string;
 }
 
 /**
- * Opens an SSE connection to the scrape-stream endpoint.
+ * Opens an SSE connection to the scrape-stream endpoint, which queues a
+ * ScrapeTask (or joins the running one) and relays the worker's progress.
+ * The worker scrapes with the server's TWITCH_OAUTH_TOKEN.
  * Returns a cleanup function that closes the connection.
  */
 export function scrapeWithProgress(
@@ -154,9 +319,8 @@ export function scrapeWithProgress(
   onProgress: (p: ScrapeProgress) => void,
   onDone: () => void,
   onError: (msg: string) => void,
-  oauth?: string,
 ): () => void {
-  const url = `${API_BASE_URL}/videos/scrape-stream/${videoId}/?oauth=${oauth || ""}`;
+  const url = `${SSE_BASE_URL}/videos/scrape-stream/${videoId}/`;
   const es = new EventSource(url);
 
   es.onmessage = (event) => {
@@ -201,6 +365,7 @@ export const getTranscripts = async (params?: {
   search?: string;
   page?: number;
   page_size?: number;
+  cursor?: string;
 }) => {
   const response = await api.get("/transcripts/", { params });
   return response.data;
@@ -221,6 +386,28 @@ export const getChatterMentions = async (
   return response.data;
 };
 
+export interface TranscriptMention {
+  video_id: string;
+  video_title: string | null;
+  video_created_at: string | null;
+  entry_id: number;
+  start_seconds: number;
+  end_seconds: number;
+  text: string;
+  count: number;
+}
+
+// Transcript segments where the streamer says a chatter's name
+export const getTranscriptMentions = async (
+  name: string,
+  params?: { streamer?: string; video?: string; page?: number },
+): Promise<{ count: number; next: string | null; results: TranscriptMention[] }> => {
+  const response = await api.get("/transcripts/mentions/", {
+    params: { name, ...params },
+  });
+  return response.data;
+};
+
 export const getAliases = async (): Promise<
   { id: number; alias: string; canonical_name: string }[]
 > => {
@@ -1,7 +1,171 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.lookups import Exact
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class FlexiblePagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Views that declare cursor_ordering (a
+    tuple of fields matching a DB index, e.g. ('video_id', 'content_offset_seconds', 'id'))
+    also accept ?cursor=: an empty cursor starts at the beginning and each
+    response carries the cursor of the next page. Cursor pages seek on those
+    fields instead of using OFFSET and skip the COUNT(*), so every page costs
+    the same however deep the client has scrolled. Rows with a NULL in a
+    nullable cursor field come after all non-NULL values of that field.
+    Only the view's list action is cursor-paged: extra actions page their own
+    querysets (often values() rows in their own order), and those, like ranked
+    querysets (full-text search, ordered by search_rank), reject ?cursor=.
+    """
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 500
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+        self.cursor_mode = bool(ordering) and self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        if getattr(view, 'action', 'list') != 'list':
+            raise ValidationError({self.cursor_query_param: 'cursor is only supported when listing; use page'})
+        # Cursor order would replace the rank order and the cursor cannot encode a rank
+        if 'search_rank' in queryset.query.extra_select:
+            raise ValidationError({self.cursor_query_param: 'cursor cannot be combined with search; use page'})
+
+        self.request = request
+        self.ordering = ordering
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.order_by(queryset, ordering))
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = self.seek(queryset, ordering, self._decode(cursor))
+
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            self.next_cursor = self._encode([getattr(last, name.lstrip('-')) for name in ordering])
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return Response(OrderedDict([
+            ('next', next_url),
+            ('next_cursor', self.next_cursor),
+            ('results', data),
+        ]))
+
+    @staticmethod
+    def _pinned(queryset):
+        """{attname: value} for top-level `field = value` filters on the queryset."""
+        pinned = {}
+        if queryset.query.where.connector != 'AND' or queryset.query.where.negated:
+            return pinned
+        for child in queryset.query.where.children:
+            if isinstance(child, Exact) and hasattr(child.lhs, 'target') and child.lhs.alias == queryset.model._meta.db_table:
+                pinned[child.lhs.target.attname] = child.rhs
+        return pinned
+
+    @staticmethod
+    def _nullable(queryset):
+        return {f.attname for f in queryset.model._meta.concrete_fields if f.null}
+
+    @staticmethod
+    def order_by(queryset, ordering):
+        """ordering as order_by() arguments, with NULLs last on nullable fields."""
+        nullable = FlexiblePagination._nullable(queryset)
+        expressions = []
+        for name in ordering:
+            field = name.lstrip('-')
+            if field not in nullable:
+                expressions.append(name)
+            elif name.startswith('-'):
+                expressions.append(F(field).desc(nulls_last=True))
+            else:
+                expressions.append(F(field).asc(nulls_last=True))
+        return expressions
+
+    @staticmethod
+    def seek(queryset, ordering, values):
+        """
+        Rows strictly after values in order_by(queryset, ordering), as a
+        row-value comparison (f0, f1, ...) > (v0, v1, ...): unlike the
+        equivalent OR chain, SQLite and PostgreSQL turn it into a range scan on
+        the matching index. Row values cannot compare NULLs, so when a
+        remaining field is nullable the OR chain is spelled out, with NULLs
+        after every value.
+        Leading fields already fixed by an equality filter (e.g. ?video_id=)
+        are left out, otherwise SQLite only uses the index for the equality.
+        All fields must sort in the same direction.
+        """
+        descending = {name.startswith('-') for name in ordering}
+        if len(descending) != 1:
+            raise ValueError("cursor_ordering fields must all sort in the same direction")
+
+        pinned = FlexiblePagination._pinned(queryset)
+        names, values = [n.lstrip('-') for n in ordering], list(values)
+        while len(names) > 1 and names[0] in pinned and str(pinned[names[0]]) == str(values[0]):
+            names, values = names[1:], values[1:]
+
+        meta = queryset.model._meta
+        fields = {f.attname: f for f in meta.concrete_fields}
+        columns = [
+            f'{connection.ops.quote_name(meta.db_table)}.{connection.ops.quote_name(fields[name].column)}'
+            for name in names
+        ]
+        op = '<' if descending.pop() else '>'
+        nullable = FlexiblePagination._nullable(queryset)
+        if not nullable.intersection(names) and None not in values:
+            placeholders = ', '.join(['%s'] * len(values))
+            return queryset.extra(where=[f'({", ".join(columns)}) {op} ({placeholders})'], params=values)
+
+        # (f0 after v0) OR (f0 = v0 AND f1 after v1) OR ...; nothing sorts after a NULL
+        branches, params = [], []
+        for i, (name, column, value) in enumerate(zip(names, columns, values)):
+            if value is None:
+                continue
+            equal, equal_params = [], []
+            for prev_column, prev_value in zip(columns[:i], values[:i]):
+                if prev_value is None:
+                    equal.append(f'{prev_column} IS NULL')
+                else:
+                    equal.append(f'{prev_column} = %s')
+                    equal_params.append(prev_value)
+            after = f'{column} {op} %s'
+            if name in nullable:
+                after = f'({after} OR {column} IS NULL)'
+            branches.append(' AND '.join(equal + [after]))
+            params += equal_params + [value]
+        if not branches:
+            return queryset.none()
+        return queryset.extra(where=['(' + ' OR '.join(f'({b})' for b in branches) + ')'], params=params)
+
+    @staticmethod
+    def _encode(values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def _decode(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, TypeError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return values
@@ -93,6 +93,55 @@ REST_FRAMEWORK = {
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Toxicity classifier. Every score is stored with the model that produced it;
+# changing TOXICITY_MODEL makes the worker re-score only rows from other models.
+# After changing TOXICITY_THRESHOLD run `manage.py recompute_is_toxic`.
+TOXICITY_MODEL = os.getenv('TOXICITY_MODEL', 'cardiffnlp/twitter-roberta-base-offensive')
+TOXICITY_THRESHOLD = float(os.getenv('TOXICITY_THRESHOLD', '0.8'))
+# Comments per model batch and token truncation. Tune with `manage.py benchmark_classifier`.
+CLASSIFIER_BATCH_SIZE = int(os.getenv('CLASSIFIER_BATCH_SIZE', '100'))
+CLASSIFIER_MAX_LENGTH = int(os.getenv('CLASSIFIER_MAX_LENGTH', '512'))
+CLASSIFIER_THREADS = int(os.getenv('CLASSIFIER_THREADS', '0'))  # 0 = torch default
+
+# Shared inference server (manage.py run_inference_server). When the URL is set
+# the classifier worker and the /api/comments/score/ endpoint use it instead of
+# loading the model themselves.
+INFERENCE_SERVER_URL = os.getenv('INFERENCE_SERVER_URL')
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', '64'))
+INFERENCE_MAX_WAIT_MS = int(os.getenv('INFERENCE_MAX_WAIT_MS', '20'))
+
+# Processes used by fix_transcripts_parallel (0 = one per CPU core)
+TRANSCRIPT_FIX_WORKERS = int(os.getenv('TRANSCRIPT_FIX_WORKERS', '0'))
+
+# Toxicity classifier prefilter: trivial messages (emote-only, bare URLs, bot
+# commands, very short text) are scored by rules and never reach the model.
+# 'emotes_file' is an optional newline-separated list of extra emote names.
+CLASSIFIER_PREFILTER = {
+    'enabled': os.getenv('CLASSIFIER_PREFILTER', 'True') == 'True',
+    'emotes_file': os.getenv('CLASSIFIER_EMOTES_FILE'),
+    'max_length': int(os.getenv('CLASSIFIER_PREFILTER_MAX_LENGTH', '2')),
+    'score': 0.0,
+}
+
+# Cache used for the stats endpoints (scraper/response_cache.py).
+# CACHE_BACKEND: locmem (per process), file (shared by all processes on this
+# host) or redis (any Redis-compatible server; needs `pip install redis`).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'file':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }}
+elif CACHE_BACKEND == 'redis':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    }}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+# Cached stats are invalidated by data version, so the TTL only bounds memory
+STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', str(7 * 24 * 3600)))
+
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
@@ -100,6 +149,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Several workers write concurrently; wait for the lock instead of failing
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -10,6 +10,7 @@ import django
 django.setup()
 
 from scraper.models import Video, Streamer, Clip, TranscriptEntry
+from scraper.services import refresh_transcript_derived
 from django.db import transaction
 
 def import_data():
@@ -88,6 +89,13 @@ def import_data():
         else:
             print("No new transcripts to import")
 
+    # Phrase search, word stats and mentions read derived tables, not TranscriptEntry
+    video_ids = sorted({t.video_id for t in transcript_objs})
+    for video_id in video_ids:
+        refresh_transcript_derived(video_id)
+    if video_ids:
+        print(f"Rebuilt search/stats rows for {len(video_ids)} videos")
+
     print("Import complete")
 
 if __name__ == "__main__":
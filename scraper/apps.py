@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class ScraperConfig(AppConfig):
     name = 'scraper'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        post_migrate.connect(_ensure_search_indexes, sender=self)
+
+
+def _ensure_search_indexes(sender, using, **kwargs):
+    from django.db import connections
+    from scraper.search import ensure_search_indexes
+    ensure_search_indexes(connections[using])
@@ -1,21 +1,170 @@
+import math
+import re
 import time
+from typing import Optional
 from transformers import pipeline
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
 from scraper.models import Comment, ClassificationTask
+from scraper.stats_service import refresh_video_stats
+
+# Stored in Comment.toxicity_model for scores assigned by MessagePrefilter rules.
+# Bump PREFILTER_VERSION whenever DEFAULT_EMOTES / DEFAULT_PATTERNS change: rows
+# tagged with an older version count as outdated and are scored again.
+PREFILTER_VERSION = 2
+PREFILTER_MODEL = f'prefilter:v{PREFILTER_VERSION}'
+
+# Global/BTTV/7TV emotes that show up constantly in chat. Messages made only of
+# these never need the model. Extend via CLASSIFIER_PREFILTER['emotes_file'].
+DEFAULT_EMOTES = {
+    '4head', 'babyrage', 'biblethump', 'catjam', 'clap', 'coolstorybob', 'dansgame',
+    'ez', 'feelsbadman', 'feelsgoodman', 'feelsstrongman', 'gg', 'heyguys', 'kappa',
+    'kek', 'kekw', 'kreygasm', 'lmao', 'lol', 'lul', 'lulw', 'monkas', 'monkaw',
+    'notlikethis', 'omegalul', 'pepehands', 'pepelaugh', 'peepohappy', 'pog',
+    'pogchamp', 'pogu', 'poggers', 'residentsleeper', 'sadge', 'seemsgood',
+    'trihard', 'vohiyo', 'wutface', 'xd', '<3',
+}
+
+DEFAULT_PATTERNS = [
+    r'^!\w+(\s+@\w+)?$',                   # bare bot commands (!uptime, !so @user ...)
+    r'^(https?://|www\.)\S+$',             # bare links
+    r'^[\W\d_]+$',                         # only digits / punctuation / emoji
+]
+
+
+class MessagePrefilter:
+    """
+    Rule-based fast path for trivial chat messages.
+
+    Returns a toxicity score for messages whose verdict is obvious (emote-only,
+    bare URLs, bot commands, very short text) and None for everything else,
+    which still goes through the model.
+    """
+
+    def __init__(self, emotes=None, patterns=None, max_length=2, score=0.0):
+        self.emotes = {e.lower() for e in (emotes if emotes is not None else DEFAULT_EMOTES)}
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in (patterns if patterns is not None else DEFAULT_PATTERNS)]
+        self.max_length = max_length
+        self.score_value = score
+
+    @classmethod
+    def from_settings(cls):
+        """Build the prefilter from settings.CLASSIFIER_PREFILTER, or None if disabled."""
+        config = getattr(settings, 'CLASSIFIER_PREFILTER', {}) or {}
+        if not config.get('enabled', True):
+            return None
+
+        emotes = set(config.get('emotes') or DEFAULT_EMOTES)
+        emotes_file = config.get('emotes_file')
+        if emotes_file:
+            with open(emotes_file, encoding='utf-8') as f:
+                emotes.update(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+        return cls(
+            emotes=emotes,
+            patterns=config.get('patterns') or DEFAULT_PATTERNS,
+            max_length=config.get('max_length', 2),
+            score=config.get('score', 0.0),
+        )
+
+    def score(self, text: str) -> Optional[float]:
+        text = (text or '').strip()
+        if len(text) <= self.max_length:
+            return self.score_value
+
+        if any(p.search(text) for p in self.patterns):
+            return self.score_value
+
+        tokens = text.lower().split()
+        if tokens and all(t in self.emotes for t in tokens):
+            return self.score_value
+
+        return None
+
+
+def outdated_scores_q(model_name):
+    """Comments with no score, or scored by something other than model_name / the prefilter."""
+    return Q(toxicity_score__isnull=True) | ~Q(toxicity_model__in=[model_name, PREFILTER_MODEL])
+
+
+def _softmax(logits):
+    peak = max(logits)
+    exps = [math.exp(x - peak) for x in logits]
+    total = sum(exps)
+    return [e / total for e in exps]
+
 
 class ToxicityClassifierService:
-    def __init__(self, model_name="cardiffnlp/twitter-roberta-base-offensive"):
-        print(f"Loading toxicity model: {model_name}...")
-        self.classifier = pipeline("text-classification", model=model_name, truncation=True, max_length=512)
+    def __init__(self, model_name=None, client=None, batch_size=None, max_length=None):
+        """
+        Pass an InferenceClient to score through the shared inference server
+        instead of loading the model in this process.
+        batch_size / max_length default to CLASSIFIER_BATCH_SIZE / CLASSIFIER_MAX_LENGTH.
+        """
+        self.threshold = settings.TOXICITY_THRESHOLD
+        self.batch_size = batch_size or settings.CLASSIFIER_BATCH_SIZE
+        self.max_length = max_length or settings.CLASSIFIER_MAX_LENGTH
+        self.prefilter = MessagePrefilter.from_settings()
+        self.client = client
+
+        if client is not None:
+            self.classifier = None
+            self.model_name = client.model_name()
+            # Scores are tagged with the server's model; a server still running an
+            # old TOXICITY_MODEL would tag them wrongly and re-score in a loop
+            if self.model_name != settings.TOXICITY_MODEL:
+                raise RuntimeError(
+                    f"Inference server at {client.url} runs {self.model_name} but TOXICITY_MODEL is "
+                    f"{settings.TOXICITY_MODEL}; restart run_inference_server"
+                )
+            print(f"Using inference server at {client.url} ({self.model_name}).")
+            return
+
+        self.model_name = model_name or settings.TOXICITY_MODEL
+        if settings.CLASSIFIER_THREADS:
+            import torch
+            torch.set_num_threads(settings.CLASSIFIER_THREADS)
+        print(f"Loading toxicity model: {self.model_name}...")
+        self.classifier = pipeline("text-classification", model=self.model_name)
         print("Model loaded successfully.")
 
+    def score_texts(self, texts):
+        """
+        Run the model on texts and return one dict per text:
+        {"score": probability of being offensive, "logits": {label: raw logit}}.
+        """
+        if not texts:
+            return []
+        if self.client is not None:
+            return self.client.score(texts)
+
+        outputs = self.classifier(
+            texts, top_k=None, function_to_apply='none',
+            batch_size=self.batch_size, truncation=True, max_length=self.max_length,
+        )
+        results = []
+        for labels in outputs:
+            logits = {res['label']: res['score'] for res in labels}
+            probs = dict(zip(logits, _softmax(list(logits.values()))))
+
+            # Normalize to "Probability of being offensive"
+            # LABEL_1 is offensive, LABEL_0 is non-offensive
+            toxicity_prob = 0.0
+            for label, prob in probs.items():
+                if 'label_1' in label.lower() or label.lower() == 'offensive':
+                    toxicity_prob = prob
+            results.append({"score": toxicity_prob, "logits": logits})
+        return results
+
     def classify_video_comments(self, video_id, task=None):
         print(f"Starting classification for video: {video_id}")
-        
-        # Get all comments that haven't been scored yet
-        comments = Comment.objects.filter(video_id=video_id, toxicity_score__isnull=True)
-        total_comments = comments.count()
-        
+
+        # Unscored comments plus anything scored by an older model. Old scores
+        # stay visible until each row is overwritten with the new one.
+        pending = Comment.objects.filter(outdated_scores_q(self.model_name), video_id=video_id)
+        total_comments = pending.count()
+
         if total_comments == 0:
             print(f"No unscored comments found for video {video_id}.")
             if task:
@@ -24,64 +173,86 @@ class ToxicityClassifierService:
                 task.save()
             return
 
-        batch_size = 100
+        batch_size = self.batch_size
         processed = 0
+        fast_path = 0
+        model_path = 0
 
         # We need to evaluate the comments into lists
         # But we must only fetch what's needed for the batch since texts might be large
         while processed < total_comments:
-            # Always take the first batch from the remaining unscored comments
+            # Always take the first batch from the remaining outdated comments
             # to avoid the "offset on shrinking queryset" bug.
-            batch = list(Comment.objects.filter(
-                video_id=video_id, 
-                toxicity_score__isnull=True
-            ).order_by('id')[:batch_size])
-            
+            batch = list(pending.order_by('id')[:batch_size])
+
             if not batch:
                 break
-                
-            texts = [str(c.message) if c.message else "" for c in batch]
-            
+
+            # Trivial messages get their score from the prefilter; only the
+            # rest is sent to the model.
+            to_model = []
+            for obj in batch:
+                text = str(obj.message) if obj.message else ""
+                score = self.prefilter.score(text) if self.prefilter else None
+                if score is None:
+                    to_model.append(obj)
+                else:
+                    obj.toxicity_score = score
+                    obj.toxicity_model = PREFILTER_MODEL
+                    obj.toxicity_logits = None
+                    obj.is_toxic = score >= self.threshold
+
+            texts = [str(c.message) if c.message else "" for c in to_model]
+
             try:
-                results = self.classifier(texts)
-                
+                results = self.score_texts(texts)
+                if self.client is not None and texts and self.client.model_name() != self.model_name:
+                    raise RuntimeError(
+                        f"Inference server switched to {self.client.model_name()} during the run "
+                        f"(expected {self.model_name})"
+                    )
+
+                for obj, res in zip(to_model, results):
+                    obj.toxicity_score = res['score']
+                    obj.toxicity_model = self.model_name
+                    obj.toxicity_logits = res['logits']
+                    # Strict threshold: Only mark as toxic above TOXICITY_THRESHOLD (0.8 by default)
+                    obj.is_toxic = res['score'] >= self.threshold
+
                 with transaction.atomic():
-                    for obj, res in zip(batch, results):
-                        label = res['label'].lower()
-                        score = res['score']
-                        
-                        # Normalize to "Probability of being offensive"
-                        # LABEL_1 is offensive, LABEL_0 is non-offensive
-                        if 'label_1' in label or label == 'offensive':
-                            toxicity_prob = score
-                        else:
-                            toxicity_prob = 1 - score
-                            
-                        obj.toxicity_score = toxicity_prob
-                        # Strict threshold: Only mark as toxic if >= 0.8 confidence
-                        obj.is_toxic = toxicity_prob >= 0.8
-                        
-                        obj.save(update_fields=['is_toxic', 'toxicity_score'])
-                
+                    Comment.objects.bulk_update(
+                        batch, ['is_toxic', 'toxicity_score', 'toxicity_model', 'toxicity_logits']
+                    )
+
                 processed += len(batch)
-                
+                fast_path += len(batch) - len(to_model)
+                model_path += len(to_model)
+
                 if task:
                     task.progress_percent = int((processed / total_comments) * 100)
-                    task.save(update_fields=['progress_percent', 'updated_at'])
-                    
-                print(f"Classified {processed}/{total_comments} comments.")
-                
+                    task.fast_path_count = fast_path
+                    task.model_count = model_path
+                    task.save(update_fields=['progress_percent', 'fast_path_count', 'model_count', 'updated_at'])
+
+                print(f"Classified {processed}/{total_comments} comments ({fast_path} fast path, {model_path} model).")
+
             except Exception as e:
                 print(f"Error during batch classification: {e}")
+                # Batches committed before the failure already changed is_toxic
+                if processed:
+                    refresh_video_stats(video_id)
                 if task:
                     task.status = 'Failed'
                     task.error_message = str(e)
                     task.save()
                 return
 
+        # is_toxic changed for this VOD: rebuild its rows in the stats rollups
+        refresh_video_stats(video_id)
+
         if task:
             task.progress_percent = 100
             task.status = 'Completed'
             task.save()
-            
+
         print(f"Finished classification for video {video_id}.")
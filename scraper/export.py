@@ -0,0 +1,63 @@
+"""
+Streaming chat export as NDJSON or CSV.
+
+Rows are read with QuerySet.iterator() (a server-side cursor on PostgreSQL,
+chunked fetches on SQLite) and written straight into a StreamingHttpResponse,
+so memory stays flat however many comments a VOD has. Each row carries
+video_id only; the video's own fields are not repeated per message.
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = (NDJSON, CSV)
+
+EXPORT_FIELDS = (
+    'id', 'video_id', 'commenter_login', 'commenter_display_name',
+    'content_offset_seconds', 'created_at', 'message', 'is_toxic', 'toxicity_score',
+)
+CHUNK_SIZE = 5000
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson; charset=utf-8',
+    CSV: 'text/csv; charset=utf-8',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the row back to the csv writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset):
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE):
+        row = list(row)
+        created_at = row[5]
+        if created_at is not None:
+            row[5] = created_at.isoformat()
+        yield row
+
+
+def _ndjson(queryset):
+    for row in _rows(queryset):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + '\n'
+
+
+def _csv(queryset):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _rows(queryset):
+        yield writer.writerow(row)
+
+
+def export_response(queryset, output, filename):
+    """StreamingHttpResponse that writes every comment of queryset in the given format."""
+    stream = _ndjson(queryset) if output == NDJSON else _csv(queryset)
+    response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,214 @@
+"""
+One search over chat and transcripts, grouped by VOD.
+
+The comment and transcript full-text queries (scraper.search) run at the same
+time on two threads, each with its own DB connection, and keep at most
+MAX_CANDIDATES hits each. FTS ranks are not comparable across the two indexes
+(different documents, bm25 on SQLite, ts_rank on PostgreSQL), so each source's
+ranks are scaled to a 0..1 score against its own best hit before merging.
+Hits are grouped by VOD; groups are ordered by their best score, then newest
+VOD first, and hits within a group by time.
+
+Transcript hits carry the chat activity around them (CHAT_WINDOW seconds
+either side), summed from the VOD's ChatTimeline, so a moment the streamer
+talks about can be compared with how chat reacted.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.db import connection
+from django.db.models import Q
+
+from scraper.models import ChatTimeline, Comment, TranscriptWindow, Video
+from scraper.search import PHRASE, search_comments, search_transcripts, terms
+from scraper.stats_service import TIMELINE_DTYPE
+
+CHAT = 'chat'
+TRANSCRIPTS = 'transcripts'
+SOURCES = (CHAT, TRANSCRIPTS)
+
+MAX_CANDIDATES = 500   # hits kept per source (per query for transcripts)
+CHAT_WINDOW = 30       # seconds of chat either side of a transcript hit
+CHAT_BUCKET = 10       # ChatTimeline bucket size it is read from
+
+COMMENT_FIELDS = (
+    'id', 'video_id', 'commenter_login', 'commenter_display_name',
+    'content_offset_seconds', 'message', 'created_at', 'is_toxic', 'toxicity_score',
+)
+
+
+def _scores(ranks):
+    """FTS ranks scaled to 0..1, 1 for the best; bm25 on SQLite is lower-is-better."""
+    raw = [-r if connection.vendor == 'sqlite' else r for r in ranks]
+    best = max(raw, default=0)
+    return [round(r / best, 4) if best > 0 else 1.0 for r in raw]
+
+
+def _better(rank, other):
+    return rank < other if connection.vendor == 'sqlite' else rank > other
+
+
+def _matched(text, queries):
+    """The first query all of whose words start a word of text (how search_comments matches)."""
+    words = terms(text)
+    for query in queries:
+        if all(any(w.startswith(t) for w in words) for t in terms(query)):
+            return query
+    return queries[0] if queries else None
+
+
+def _comment_hits(queries, streamer_id, exclude_users, min_toxicity):
+    qs = Comment.objects.all()
+    if streamer_id:
+        qs = qs.filter(video__streamer=streamer_id)
+    for user in exclude_users:
+        qs = qs.exclude(commenter_display_name__iexact=user)
+    if min_toxicity is not None:
+        qs = qs.filter(toxicity_score__gte=min_toxicity)
+
+    if not queries:
+        rows = list(qs.order_by('-toxicity_score', 'id').values(*COMMENT_FIELDS)[:MAX_CANDIDATES])
+        for row in rows:
+            row['score'] = round(row['toxicity_score'] or 0.0, 4)
+            row['matched'] = None
+        return rows
+
+    ranked = search_comments(qs, queries)
+    if ranked is None:
+        q_objs = Q()
+        for kw in queries:
+            q_objs |= Q(message__icontains=kw) | Q(commenter_display_name__icontains=kw)
+        rows = list(qs.filter(q_objs).order_by('-video__created_at', 'content_offset_seconds')
+                    .values(*COMMENT_FIELDS)[:MAX_CANDIDATES])
+        scores = [1.0] * len(rows)
+    else:
+        rows = list(ranked.values(*COMMENT_FIELDS, 'search_rank')[:MAX_CANDIDATES])
+        scores = _scores([row.pop('search_rank') for row in rows])
+
+    for row, score in zip(rows, scores):
+        row['score'] = score
+        row['matched'] = _matched(f"{row['message']} {row['commenter_display_name']}", queries)
+    return rows
+
+
+def _transcript_hits(queries, streamer_id):
+    windows = TranscriptWindow.objects.all()
+    if streamer_id:
+        windows = windows.filter(streamer_id=streamer_id)
+
+    # Best rank per window over all queries; no index means no transcript hits
+    best = {}
+    for query in queries:
+        results = search_transcripts(windows, query, mode=PHRASE)
+        if results is None:
+            continue
+        for row in results[:MAX_CANDIDATES]:
+            seen = best.get(row['id'])
+            if seen is None or _better(row['search_rank'], seen['search_rank']):
+                best[row['id']] = {**row, 'matched': query}
+
+    rows = list(best.values())
+    for row, score in zip(rows, _scores([row.pop('search_rank') for row in rows])):
+        row['score'] = score
+
+    # The hit's own segment is the first first_length characters of its window
+    texts = {
+        window_id: text[:first_length]
+        for window_id, text, first_length in TranscriptWindow.objects.filter(
+            id__in=[row['id'] for row in rows]
+        ).values_list('id', 'text', 'first_length')
+    }
+    for row in rows:
+        row.pop('streamer_id', None)
+        row['text'] = texts.get(row['id'], '')
+    return rows
+
+
+def _in_thread(fn, *args):
+    try:
+        return fn(*args)
+    finally:
+        connection.close()
+
+
+def search_all(queries, streamer_id=None, exclude_users=(), min_toxicity=None, sources=SOURCES):
+    """
+    Comment and transcript hits for queries (alternatives; each needs all of
+    its words), grouped by VOD and ordered best group first:
+    [{video_id, video_title, video_streamer, video_created_at, score,
+      comments: [...], transcripts: [...]}, ...].
+    min_toxicity (0..1) and exclude_users only filter comments; with no
+    queries only comments are searched, most toxic first.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        comments = (
+            pool.submit(_in_thread, _comment_hits, queries, streamer_id, exclude_users, min_toxicity)
+            if CHAT in sources else None
+        )
+        transcripts = (
+            pool.submit(_in_thread, _transcript_hits, queries, streamer_id)
+            if TRANSCRIPTS in sources and queries else None
+        )
+        comments = comments.result() if comments else []
+        transcripts = transcripts.result() if transcripts else []
+
+    groups = {}
+    for kind, hits in (('comments', comments), ('transcripts', transcripts)):
+        for hit in hits:
+            group = groups.setdefault(hit['video_id'], {'comments': [], 'transcripts': [], 'score': 0.0})
+            group[kind].append(hit)
+            group['score'] = max(group['score'], hit['score'])
+
+    videos = Video.objects.filter(pk__in=list(groups)).values('id', 'title', 'streamer_display_name', 'created_at')
+    results = []
+    for video in videos:
+        group = groups[video['id']]
+        group['comments'].sort(key=lambda c: (c['content_offset_seconds'] or 0, c['id']))
+        group['transcripts'].sort(key=lambda t: t['start_seconds'])
+        results.append({
+            'video_id': video['id'],
+            'video_title': video['title'],
+            'video_streamer': video['streamer_display_name'],
+            'video_created_at': video['created_at'],
+            'score': group['score'],
+            'comments': group['comments'],
+            'transcripts': group['transcripts'],
+        })
+    results.sort(key=lambda g: g['video_created_at'].timestamp() if g['video_created_at'] else 0, reverse=True)
+    results.sort(key=lambda g: g['score'], reverse=True)
+    return results
+
+
+def attach_chat_activity(groups):
+    """
+    Set 'chat' on every transcript hit of groups: messages and toxic messages
+    within CHAT_WINDOW seconds of it, per minute, and relative to the VOD's
+    average rate (None for VODs whose chat has no timeline yet).
+    """
+    timelines = {
+        video_id: (np.frombuffer(bytes(messages), dtype=TIMELINE_DTYPE), np.frombuffer(bytes(toxic), dtype=TIMELINE_DTYPE))
+        for video_id, messages, toxic in ChatTimeline.objects.filter(
+            video_id__in=[g['video_id'] for g in groups if g['transcripts']], bucket_seconds=CHAT_BUCKET
+        ).values_list('video_id', 'messages', 'toxic')
+    }
+    for group in groups:
+        series = timelines.get(group['video_id'])
+        average = series[0].sum() / (len(series[0]) * CHAT_BUCKET / 60) if series and len(series[0]) else 0
+        for hit in group['transcripts']:
+            if series is None:
+                hit['chat'] = None
+                continue
+            start = max(0.0, hit['start_seconds'] - CHAT_WINDOW)
+            until = hit['end_seconds'] + CHAT_WINDOW
+            lo, hi = int(start // CHAT_BUCKET), int(until // CHAT_BUCKET) + 1
+            messages, toxic = int(series[0][lo:hi].sum()), int(series[1][lo:hi].sum())
+            per_minute = messages / ((hi - lo) * CHAT_BUCKET / 60)
+            hit['chat'] = {
+                'from': lo * CHAT_BUCKET,
+                'until': hi * CHAT_BUCKET,
+                'messages': messages,
+                'toxic': toxic,
+                'per_minute': round(per_minute, 2),
+                'relative': round(per_minute / average, 2) if average else None,
+            }
+    return groups
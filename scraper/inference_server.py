@@ -0,0 +1,155 @@
+"""
+Local toxicity inference service.
+
+The server holds one copy of the model and merges /score requests from any
+number of callers into shared batches: a batch is flushed as soon as it holds
+max_batch_size texts or the oldest request has waited max_wait_ms.
+
+    POST /score   {"texts": ["...", ...]}
+                  -> {"model": "...", "results": [{"score": 0.12, "logits": {...}}, ...]}
+    GET  /health  -> {"status": "ok", "model": "...", "queued": 0}
+"""
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+import requests
+
+
+class _PendingRequest:
+    def __init__(self, texts):
+        self.texts = texts
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class DynamicBatcher:
+    """Collects texts from concurrent callers and runs score_fn on shared batches."""
+
+    def __init__(self, score_fn: Callable[[List[str]], List[dict]], max_batch_size=64, max_wait_ms=20):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def submit(self, texts: List[str], timeout=None) -> List[dict]:
+        """Block until every text has been scored; returns results in input order."""
+        if not texts:
+            return []
+        req = _PendingRequest(texts)
+        self._queue.put(req)
+        if not req.done.wait(timeout):
+            raise TimeoutError("Inference request timed out")
+        if req.error:
+            raise req.error
+        return req.results
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(req)
+            size += len(req.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for req in batch for t in req.texts]
+            try:
+                results = []
+                # A single oversized request is still split into model-sized chunks
+                for i in range(0, len(texts), self.max_batch_size):
+                    results.extend(self.score_fn(texts[i:i + self.max_batch_size]))
+                pos = 0
+                for req in batch:
+                    req.results = results[pos:pos + len(req.texts)]
+                    pos += len(req.texts)
+            except Exception as e:
+                for req in batch:
+                    req.error = e
+            finally:
+                for req in batch:
+                    req.done.set()
+
+
+def make_server(host, port, batcher: DynamicBatcher, model_name: str) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip('/') != '/health':
+                return self._send(404, {"error": "not found"})
+            self._send(200, {"status": "ok", "model": model_name, "queued": batcher.qsize()})
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/score':
+                return self._send(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                data = json.loads(self.rfile.read(length) or b'{}')
+                texts = data.get('texts')
+                if not isinstance(texts, list):
+                    return self._send(400, {"error": "texts must be a list"})
+                results = batcher.submit([str(t) if t else "" for t in texts])
+            except (ValueError, TypeError) as e:
+                return self._send(400, {"error": str(e)})
+            except Exception as e:
+                return self._send(500, {"error": str(e)})
+            self._send(200, {"model": model_name, "results": results})
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+class InferenceClient:
+    """Talks to a running inference server (see run_inference_server)."""
+
+    def __init__(self, url: str, timeout=120):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._model_name = None
+
+    def model_name(self) -> str:
+        if self._model_name is None:
+            resp = requests.get(f"{self.url}/health", timeout=10)
+            resp.raise_for_status()
+            self._model_name = resp.json()['model']
+        return self._model_name
+
+    def score(self, texts: List[str]) -> List[dict]:
+        if not texts:
+            return []
+        resp = requests.post(f"{self.url}/score", json={"texts": texts}, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        self._model_name = data.get('model', self._model_name)
+        return data['results']
@@ -0,0 +1,82 @@
+import bisect
+import random
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from scraper.models import Comment, TranscriptEntry
+from scraper.services import ActiveChatterWindow
+
+WINDOW_SECONDS = 60
+TOP_ACTIVE = 10
+
+
+def _naive_top(offsets, names, mid):
+    lo = bisect.bisect_left(offsets, mid - WINDOW_SECONDS)
+    hi = bisect.bisect_right(offsets, mid + WINDOW_SECONDS)
+    return [n for n, _ in Counter(names[lo:hi]).most_common(TOP_ACTIVE)]
+
+
+class Command(BaseCommand):
+    help = 'Compare per-segment Counter slicing with the sliding ActiveChatterWindow used by transcript fixing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--video_id', type=str, help='Use comments and transcript segments of this VOD')
+        parser.add_argument('--comments', type=int, default=150000, help='Synthetic comment count')
+        parser.add_argument('--chatters', type=int, default=8000, help='Synthetic distinct chatters')
+        parser.add_argument('--hours', type=float, default=6.0, help='Synthetic VOD length')
+        parser.add_argument('--segment-seconds', type=float, default=4.0, help='Synthetic transcript segment length')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['video_id']:
+            offsets, names, mids = self._load_video(options['video_id'])
+        else:
+            offsets, names, mids = self._synthetic(options)
+        if not offsets or not mids:
+            raise CommandError("Need at least one comment and one transcript segment")
+
+        self.stdout.write(f"{len(offsets)} comments, {len(set(names))} chatters, {len(mids)} segments")
+
+        start = time.perf_counter()
+        naive = [_naive_top(offsets, names, mid) for mid in mids]
+        naive_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        window = ActiveChatterWindow(offsets, names, WINDOW_SECONDS, TOP_ACTIVE)
+        sliding = [window.top(mid) for mid in mids]
+        sliding_s = time.perf_counter() - start
+
+        mismatches = sum(1 for a, b in zip(naive, sliding) if set(a) != set(b))
+        self.stdout.write(f"{'method':<10} {'total s':>9} {'us/segment':>11}")
+        self.stdout.write('-' * 32)
+        for label, elapsed in (('counter', naive_s), ('sliding', sliding_s)):
+            self.stdout.write(f"{label:<10} {elapsed:>9.3f} {elapsed / len(mids) * 1e6:>11.1f}")
+
+        if mismatches:
+            raise CommandError(f"{mismatches} segments got a different set of active chatters")
+        speedup = naive_s / sliding_s if sliding_s else float('inf')
+        self.stdout.write(self.style.SUCCESS(f"Identical results, {speedup:.1f}x faster"))
+
+    def _load_video(self, video_id):
+        rows = list(
+            Comment.objects.filter(video_id=video_id)
+            .values_list('content_offset_seconds', 'commenter_display_name')
+            .order_by('content_offset_seconds')
+        )
+        mids = sorted(
+            (s + e) / 2
+            for s, e in TranscriptEntry.objects.filter(video_id=video_id).values_list('start_seconds', 'end_seconds')
+        )
+        return [r[0] for r in rows], [r[1] for r in rows], mids
+
+    def _synthetic(self, options):
+        rng = random.Random(options['seed'])
+        duration = int(options['hours'] * 3600)
+        chatters = [f"chatter_{i}" for i in range(options['chatters'])]
+        # A few regulars write most of chat; paretovariate gives that long tail
+        weights = [rng.paretovariate(1.2) for _ in chatters]
+        names = rng.choices(chatters, weights=weights, k=options['comments'])
+        offsets = sorted(rng.randrange(duration) for _ in names)
+        step = options['segment_seconds']
+        mids = [i * step + step / 2 for i in range(int(duration / step))]
+        return offsets, names, mids
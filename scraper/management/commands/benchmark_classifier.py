@@ -0,0 +1,172 @@
+import csv
+import itertools
+import random
+import resource
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from scraper.models import Comment
+from scraper.classification_service import ToxicityClassifierService
+from scraper.inference_server import InferenceClient
+
+# Building blocks for the synthetic corpus: roughly the mix seen in real chat
+_SYNTH_WORDS = [
+    'lol', 'bro', 'what', 'is', 'that', 'no', 'way', 'chat', 'he', 'did', 'it', 'again',
+    'this', 'game', 'so', 'bad', 'good', 'play', 'why', 'you', 'are', 'trash', 'clutch',
+    'first', 'time', 'here', 'love', 'the', 'stream', 'gg', 'ez', 'wp', 'insane', 'aim',
+    'que', 'paso', 'jaja', 'buena', 'malo', 'hermano', 'vamos', 'team', 'throw', 'ult',
+]
+_SYNTH_EMOTES = ['KEKW', 'LUL', 'Pog', 'OMEGALUL', 'Sadge', 'monkaS', 'PogChamp', 'Kappa']
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _reset_peak_rss():
+    # Linux only: writing 5 to clear_refs resets VmHWM (peak RSS) for this process
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _int_list(raw):
+    return [int(x) for x in raw.split(',') if x.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark toxicity classification throughput across batch size, max_length, threads and backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', choices=['synthetic', 'db'], default='synthetic',
+                            help='Generate chat-like messages or sample real comments from the DB')
+        parser.add_argument('--video_id', type=str, help='Sample comments from this VOD (implies --corpus db)')
+        parser.add_argument('--size', type=int, default=2000, help='Number of messages per run')
+        parser.add_argument('--batch-sizes', type=str, default='16,32,64,128')
+        parser.add_argument('--max-lengths', type=str, default='64,128,512')
+        parser.add_argument('--threads', type=str, default='', help='Comma-separated torch thread counts (default: current)')
+        parser.add_argument('--backends', type=str, default='local',
+                            help='Comma-separated: local (in-process model), server (INFERENCE_SERVER_URL)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--csv', type=str, help='Also write the results table to this CSV file')
+
+    def handle(self, *args, **options):
+        texts = self._load_corpus(options)
+        if not texts:
+            raise CommandError("Corpus is empty")
+
+        batch_sizes = _int_list(options['batch_sizes'])
+        max_lengths = _int_list(options['max_lengths'])
+        thread_counts = _int_list(options['threads']) or [None]
+        backends = [b.strip() for b in options['backends'].split(',') if b.strip()]
+
+        self.stdout.write(f"Corpus: {len(texts)} messages, avg {sum(map(len, texts)) / len(texts):.1f} chars")
+
+        rows = []
+        for backend in backends:
+            if backend == 'local':
+                service = ToxicityClassifierService()
+                combos = itertools.product(thread_counts, max_lengths, batch_sizes)
+            elif backend == 'server':
+                if not settings.INFERENCE_SERVER_URL:
+                    raise CommandError("backend 'server' needs INFERENCE_SERVER_URL")
+                service = ToxicityClassifierService(client=InferenceClient(settings.INFERENCE_SERVER_URL))
+                # Truncation and threads are fixed by the server process
+                combos = ((None, None, b) for b in batch_sizes)
+            else:
+                raise CommandError(f"Unknown backend '{backend}'")
+
+            for threads, max_length, batch_size in combos:
+                rows.append(self._run(service, backend, texts, threads, max_length, batch_size))
+                self._print_row(rows[-1], header=len(rows) == 1)
+
+        if options['csv']:
+            with open(options['csv'], 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+                writer.writerows(rows)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['csv']}"))
+
+        best = max(rows, key=lambda r: r['comments_per_sec'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Fastest: backend={best['backend']} threads={best['threads']} "
+            f"max_length={best['max_length']} batch_size={best['batch_size']} "
+            f"({best['comments_per_sec']:.1f} comments/sec)"
+        ))
+
+    def _load_corpus(self, options):
+        size = options['size']
+        if options['corpus'] == 'db' or options['video_id']:
+            qs = Comment.objects.exclude(message__isnull=True).exclude(message='')
+            if options['video_id']:
+                qs = qs.filter(video_id=options['video_id'])
+            return list(qs.order_by('-created_at').values_list('message', flat=True)[:size])
+
+        rng = random.Random(options['seed'])
+        texts = []
+        for _ in range(size):
+            n = max(1, int(rng.expovariate(1 / 6)))
+            words = [rng.choice(_SYNTH_EMOTES) if rng.random() < 0.2 else rng.choice(_SYNTH_WORDS) for _ in range(n)]
+            texts.append(' '.join(words))
+        return texts
+
+    def _run(self, service, backend, texts, threads, max_length, batch_size):
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        if max_length:
+            service.max_length = max_length
+        service.batch_size = batch_size
+
+        # Warm-up batch so lazy initialisation is not billed to the first config
+        service.score_texts(texts[:batch_size])
+
+        _reset_peak_rss()
+        latencies = []
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            t0 = time.perf_counter()
+            service.score_texts(texts[i:i + batch_size])
+            latencies.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'backend': backend,
+            'threads': threads or ('-' if backend == 'server' else 'default'),
+            'max_length': max_length or '-',
+            'batch_size': batch_size,
+            'comments_per_sec': len(texts) / elapsed if elapsed else 0.0,
+            'p50_ms': _percentile(latencies, 50),
+            'p99_ms': _percentile(latencies, 99),
+            # Without clear_refs support this is the lifetime peak of the process
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+
+    def _print_row(self, row, header=False):
+        if header:
+            self.stdout.write(
+                f"{'backend':<8} {'threads':>8} {'max_len':>8} {'batch':>6} "
+                f"{'msg/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>9}"
+            )
+            self.stdout.write('-' * 74)
+        self.stdout.write(
+            f"{row['backend']:<8} {str(row['threads']):>8} {str(row['max_length']):>8} {row['batch_size']:>6} "
+            f"{row['comments_per_sec']:>10.1f} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['peak_rss_mb']:>9.1f}"
+        )
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from scraper.models import Comment, ClassificationTask, Video
+from scraper.classification_service import outdated_scores_q
+
+
+class Command(BaseCommand):
+    help = 'Queue classification tasks for every video with comments not scored by the current model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', type=str, default=None,
+            help='Model identifier scores are compared against (default: settings.TOXICITY_MODEL)',
+        )
+
+    def handle(self, *args, **options):
+        model_name = options['model'] or settings.TOXICITY_MODEL
+
+        video_ids = list(
+            Comment.objects
+            .filter(outdated_scores_q(model_name))
+            .values_list('video_id', flat=True)
+            .distinct()
+        )
+
+        queued = 0
+        for video in Video.objects.filter(id__in=video_ids):
+            if ClassificationTask.objects.filter(video=video, status__in=['Pending', 'InProgress']).exists():
+                continue
+            # Existing scores stay in place; the worker overwrites them row by row
+            ClassificationTask.objects.filter(video=video).exclude(status__in=['Pending', 'InProgress']).delete()
+            ClassificationTask.objects.create(video=video, status='Pending')
+            queued += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(video_ids)} video(s) have outdated scores for {model_name}; queued {queued} task(s)."
+        ))
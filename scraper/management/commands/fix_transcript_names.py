@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand, CommandError
-from scraper.services import fix_transcript_usernames
+from scraper.services import fix_transcripts_parallel
 
 
 class Command(BaseCommand):
@@ -10,6 +10,7 @@ class Command(BaseCommand):
         group.add_argument('--video_id', type=str, help='Fix a single video by ID')
         group.add_argument('--streamer_login', type=str, help='Fix all transcribed videos for a streamer')
         group.add_argument('--all', action='store_true', dest='all_videos', help='Fix all videos with transcripts')
+        parser.add_argument('--workers', type=int, default=None, help='Parallel processes (default: TRANSCRIPT_FIX_WORKERS)')
 
     def handle(self, *args, **options):
         from scraper.models import TranscriptEntry, Video
@@ -36,11 +37,12 @@ class Command(BaseCommand):
             if not video_ids:
                 raise CommandError("No videos with transcripts found in the database")
 
-        total_corrected = 0
-        for video_id in video_ids:
-            corrected = fix_transcript_usernames(video_id)
-            total_corrected += corrected
-            self.stdout.write(f"  video {video_id}: {corrected} entries updated")
+        def progress_cb(done, total, video_id, corrected):
+            self.stdout.write(f"  video {video_id}: {corrected} entries updated ({done}/{total})")
+
+        # Names are loaded and indexed once, then shared with the worker processes
+        results = fix_transcripts_parallel(video_ids, workers=options['workers'], on_progress=progress_cb)
+        total_corrected = sum(results.values())
 
         self.stdout.write(self.style.SUCCESS(
             f"Done. {total_corrected} transcript entries updated across {len(video_ids)} video(s)."
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from scraper.models import TranscriptEntry
+from scraper.search import (
+    install_comment_index, drop_comment_index, install_transcript_index, drop_transcript_index,
+    refresh_transcript_windows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Drop and recreate the full-text search indexes from the current comments and transcript windows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--windows', action='store_true',
+                            help='Also regenerate TranscriptWindow rows from the current transcript text')
+
+    def handle(self, *args, **options):
+        if options['windows']:
+            video_ids = list(TranscriptEntry.objects.values_list('video_id', flat=True).distinct())
+            for video_id in video_ids:
+                refresh_transcript_windows(video_id)
+            self.stdout.write(f"Regenerated transcript windows for {len(video_ids)} videos.")
+
+        with connection.schema_editor() as schema_editor:
+            drop_comment_index(schema_editor)
+            install_comment_index(schema_editor)
+            drop_transcript_index(schema_editor)
+            install_transcript_index(schema_editor)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt comment and transcript search indexes ({connection.vendor})."))
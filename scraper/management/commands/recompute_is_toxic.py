@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from scraper.models import Comment
+from scraper.stats_service import refresh_video_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute Comment.is_toxic from the stored toxicity scores (no model run needed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, default=None,
+            help='Probability at or above which a comment is toxic (default: settings.TOXICITY_THRESHOLD)',
+        )
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if threshold is None:
+            threshold = settings.TOXICITY_THRESHOLD
+
+        to_mark = Comment.objects.filter(toxicity_score__gte=threshold, is_toxic=False)
+        to_clear = Comment.objects.filter(toxicity_score__lt=threshold, is_toxic=True)
+        video_ids = set(to_mark.values_list('video_id', flat=True).distinct())
+        video_ids |= set(to_clear.values_list('video_id', flat=True).distinct())
+
+        # Two plain UPDATEs that only touch rows whose flag actually changes
+        marked = to_mark.update(is_toxic=True)
+        cleared = to_clear.update(is_toxic=False)
+
+        for video_id in video_ids:
+            refresh_video_stats(video_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Threshold {threshold}: {marked} comments marked toxic, {cleared} cleared."
+        ))
+        if threshold != settings.TOXICITY_THRESHOLD:
+            self.stdout.write(self.style.WARNING(
+                f"Set TOXICITY_THRESHOLD={threshold} so the classifier worker uses it for new scores."
+            ))
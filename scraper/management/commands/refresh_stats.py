@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from scraper.models import Video
+from scraper.stats_service import refresh_video_stats
+from scraper.transcript_stats import refresh_transcript_terms
+from scraper.mentions import refresh_transcript_mentions
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the CommenterStats / HourlyStats rollups and chat timelines used by the stats endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--video_id', type=str, help='Only rebuild this VOD (default: every VOD)')
+        parser.add_argument('--terms', action='store_true', help='Rebuild the TranscriptTerm word counts instead')
+        parser.add_argument('--mentions', action='store_true', help='Re-scan transcripts for TranscriptMention rows instead')
+
+    def handle(self, *args, **options):
+        if options['mentions']:
+            refresh, related, label = refresh_transcript_mentions, 'transcripts', 'transcript mentions'
+        elif options['terms']:
+            refresh, related, label = refresh_transcript_terms, 'transcripts', 'transcript terms'
+        else:
+            refresh, related, label = refresh_video_stats, 'comments', 'stats'
+
+        if options['video_id']:
+            video_ids = [options['video_id']]
+        else:
+            video_ids = list(Video.objects.filter(**{f'{related}__isnull': False}).values_list('id', flat=True).distinct())
+
+        for i, video_id in enumerate(video_ids, 1):
+            refresh(video_id)
+            self.stdout.write(f"  {video_id} ({i}/{len(video_ids)})")
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {label} for {len(video_ids)} videos."))
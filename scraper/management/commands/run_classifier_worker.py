@@ -1,7 +1,9 @@
 import time
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from scraper.models import ClassificationTask
 from scraper.classification_service import ToxicityClassifierService
+from scraper.inference_server import InferenceClient
 
 class Command(BaseCommand):
     help = 'Runs the continuous background task worker for comment classification.'
@@ -14,8 +16,12 @@ class Command(BaseCommand):
         if stuck_tasks > 0:
             self.stdout.write(self.style.NOTICE(f"Cleaned up {stuck_tasks} stuck 'InProgress' tasks."))
 
-        # Only initialize the AI model when the worker starts up
-        classifier_service = ToxicityClassifierService()
+        # Only initialize the AI model when the worker starts up, unless a shared
+        # inference server already holds it
+        if settings.INFERENCE_SERVER_URL:
+            classifier_service = ToxicityClassifierService(client=InferenceClient(settings.INFERENCE_SERVER_URL))
+        else:
+            classifier_service = ToxicityClassifierService()
         self.stdout.write(self.style.SUCCESS('Classifier service ready.'))
 
         while True:
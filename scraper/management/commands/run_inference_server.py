@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from scraper.classification_service import ToxicityClassifierService
+from scraper.inference_server import DynamicBatcher, make_server
+
+
+class Command(BaseCommand):
+    help = 'Runs the local toxicity inference server that batches scoring requests from all callers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--max-batch-size', type=int, default=settings.INFERENCE_MAX_BATCH_SIZE)
+        parser.add_argument('--max-wait-ms', type=int, default=settings.INFERENCE_MAX_WAIT_MS)
+
+    def handle(self, *args, **options):
+        # Load the model once; every client shares it
+        service = ToxicityClassifierService()
+        batcher = DynamicBatcher(
+            service.score_texts,
+            max_batch_size=options['max_batch_size'],
+            max_wait_ms=options['max_wait_ms'],
+        )
+        server = make_server(options['host'], options['port'], batcher, service.model_name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Inference server for {service.model_name} listening on "
+            f"http://{options['host']}:{options['port']} "
+            f"(batch {options['max_batch_size']}, wait {options['max_wait_ms']}ms)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -3,6 +3,9 @@ from django.core.management.base import BaseCommand
 from scraper.models import ScrapeTask
 from scraper.services import TwitchScraperService
 
+# scrape-stream clients poll progress_detail; publish at most this often
+PROGRESS_INTERVAL = 1.0
+
 class Command(BaseCommand):
     help = 'Runs the background worker to process pending ScrapeTasks'
 
@@ -25,18 +28,24 @@ class Command(BaseCommand):
                 time.sleep(5)
                 continue
 
-            self.stdout.write(f"Processing task for Video ID: {task.video_id} (Streamer: {task.streamer.login})")
+            streamer_login = task.streamer.login if task.streamer else 'unknown'
+            self.stdout.write(f"Processing task for Video ID: {task.video_id} (Streamer: {streamer_login})")
             
             # Mark as InProgress
             task.status = 'InProgress'
             task.save()
 
+            last_published = [0.0]
+
             def progress_cb(data):
                 # data contains percent, total_comments, offset, etc.
-                pct = data.get('percent', 0)
-                if pct > task.progress_percent:
-                    task.progress_percent = pct
-                    task.save(update_fields=['progress_percent', 'updated_at'])
+                now = time.monotonic()
+                if not data.get('done') and now - last_published[0] < PROGRESS_INTERVAL:
+                    return
+                last_published[0] = now
+                task.progress_percent = max(task.progress_percent, data.get('percent', 0))
+                task.progress_detail = data
+                task.save(update_fields=['progress_percent', 'progress_detail', 'updated_at'])
 
             try:
                 # Run the synchronous scrape with our progress callback
@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand
+from scraper.models import TranscriptFixTask
+from scraper.services import fix_transcripts_parallel
+
+
+class Command(BaseCommand):
+    help = 'Runs the background worker that applies username correction to transcripts and rebuilds their search/stats rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Processes per task (default: TRANSCRIPT_FIX_WORKERS)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting transcript worker...'))
+
+        # Cleanup: Reset any tasks that were interrupted (stuck in InProgress)
+        stuck_tasks = TranscriptFixTask.objects.filter(status='InProgress').update(status='Pending')
+        if stuck_tasks > 0:
+            self.stdout.write(self.style.NOTICE(f"Cleaned up {stuck_tasks} stuck 'InProgress' tasks."))
+
+        while True:
+            task = TranscriptFixTask.objects.filter(status='Pending').order_by('created_at').first()
+
+            if not task:
+                time.sleep(5)
+                continue
+
+            self.stdout.write(self.style.NOTICE(f'Found pending task: {task} ({len(task.video_ids)} videos)'))
+            task.status = 'InProgress'
+            task.save(update_fields=['status', 'updated_at'])
+
+            def progress_cb(done, total, video_id, corrected):
+                task.videos_done = done
+                task.total_corrected += corrected
+                task.progress_percent = int(done / total * 100) if total else 100
+                task.save(update_fields=['videos_done', 'total_corrected', 'progress_percent', 'updated_at'])
+                self.stdout.write(f"  video {video_id}: {corrected} entries updated ({done}/{total})")
+
+            try:
+                fix_transcripts_parallel(
+                    task.video_ids, workers=options['workers'], on_progress=progress_cb, refresh=task.refresh_derived
+                )
+                task.status = 'Completed'
+                task.progress_percent = 100
+                task.save()
+                self.stdout.write(self.style.SUCCESS(f'Task completed: {task}'))
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Task failed: {task}. Error: {e}'))
+                task.status = 'Failed'
+                task.error_message = str(e)
+                task.save()
@@ -0,0 +1,212 @@
+"""
+Mentions of known users in transcripts.
+
+Every chatter display name and UserAlias canonical name (MIN_NAME_LENGTH chars
+or longer) goes into one Aho-Corasick automaton, so a transcript segment is
+scanned once for all names at the same time, multi-word names included. Matches
+are kept only on word boundaries and are stored as TranscriptMention rows when
+a transcript is uploaded or its names are fixed. ExcludedShoutout is applied
+when querying, so excluding a name needs no rebuild.
+
+Names added later (new chatters, new aliases) only show up in transcripts
+processed after they were added; `manage.py refresh_stats --mentions`
+re-scans everything.
+
+pyahocorasick is used when installed; otherwise a pure-Python automaton with
+the same add_word / make_automaton / iter interface.
+"""
+import threading
+from collections import Counter, deque
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from scraper.models import (
+    TranscriptEntry, TranscriptMention, Chatter, CommenterStats, UserAlias, ExcludedShoutout,
+)
+from scraper.transcript_stats import MIN_NAME_LENGTH
+
+
+class _PyAutomaton:
+    """Pure-Python Aho-Corasick automaton, a drop-in for the subset of ahocorasick.Automaton used here."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+    def add_word(self, key, value):
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node] = (value,)
+        return True
+
+    def make_automaton(self):
+        # Breadth-first, so a node's failure link is final before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for value in out[node]:
+                yield i, value
+
+
+try:
+    from ahocorasick import Automaton as _Automaton
+except ImportError:
+    _Automaton = _PyAutomaton
+
+
+def build_automaton(names: dict):
+    """Automaton over names ({lower-cased name: display name}); None if there are none."""
+    if not names:
+        return None
+    automaton = _Automaton()
+    for lower, display_name in names.items():
+        automaton.add_word(lower, (lower, display_name))
+    automaton.make_automaton()
+    return automaton
+
+
+def mention_names(chatter_model=Chatter, alias_model=UserAlias) -> dict:
+    """{lower-cased name: display name} of every name worth detecting; aliases win over chatters."""
+    names = {
+        n.lower(): n
+        for n in chatter_model.objects.order_by('id').values_list('display_name', flat=True)
+        if n and len(n) >= MIN_NAME_LENGTH
+    }
+    for n in alias_model.objects.values_list('canonical_name', flat=True):
+        if n and len(n) >= MIN_NAME_LENGTH:
+            names[n.lower()] = n
+    return names
+
+
+_automaton_lock = threading.Lock()
+_automaton_cache = {'version': None, 'automaton': None}
+
+
+def get_mention_automaton():
+    """build_automaton(mention_names()), cached per process until a chatter or alias is added or changed."""
+    aliases = UserAlias.objects.aggregate(n=Count('id'), updated=Max('updated_at'))
+    version = (Chatter.objects.aggregate(m=Max('id'))['m'], aliases['n'], aliases['updated'])
+    with _automaton_lock:
+        if _automaton_cache['version'] != version:
+            _automaton_cache['automaton'] = build_automaton(mention_names())
+            _automaton_cache['version'] = version
+        return _automaton_cache['automaton']
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def find_mentions(text, automaton) -> Counter:
+    """Counter of (lower-cased name, display name) said in text as whole words."""
+    found = Counter()
+    if not text or automaton is None:
+        return found
+    text = text.lower()
+    for end, (lower, display_name) in automaton.iter(text):
+        start = end - len(lower) + 1
+        if start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if end + 1 < len(text) and _is_word_char(text[end + 1]):
+            continue
+        found[(lower, display_name)] += 1
+    return found
+
+
+def build_transcript_mentions(entries, mention_model, automaton):
+    """TranscriptMention rows (unsaved) for entries; one per (segment, name)."""
+    mentions = []
+    for entry in entries:
+        for (lower, display_name), count in find_mentions(entry.text, automaton).items():
+            mentions.append(mention_model(
+                video_id=entry.video_id,
+                streamer_id=entry.streamer_id,
+                entry_id=entry.id,
+                name=lower[:255],
+                display_name=display_name[:255],
+                start_seconds=entry.start_seconds,
+                count=count,
+            ))
+    return mentions
+
+
+def refresh_transcript_mentions(video_id):
+    """Rebuild the TranscriptMention rows of one VOD from its current TranscriptEntry text."""
+    automaton = get_mention_automaton()
+    entries = list(
+        TranscriptEntry.objects.filter(video_id=video_id).only('video_id', 'streamer_id', 'start_seconds', 'text')
+    )
+    with transaction.atomic():
+        TranscriptMention.objects.filter(video_id=video_id).delete()
+        TranscriptMention.objects.bulk_create(
+            build_transcript_mentions(entries, TranscriptMention, automaton), batch_size=1000
+        )
+
+
+def top_mentioned_users(streamer_id=None, limit=10):
+    """
+    Names the streamer says most often, skipping ExcludedShoutout names. With a
+    streamer, chatters count only if they wrote in that streamer's chat
+    (alias canonical names always count).
+    """
+    excluded = [name.lower() for name in ExcludedShoutout.objects.values_list('name', flat=True)]
+    mentions = TranscriptMention.objects.exclude(name__in=excluded)
+    if streamer_id:
+        mentions = mentions.filter(streamer_id=streamer_id)
+    rows = (
+        mentions.values('name')
+        .annotate(total=Sum('count'), username=Max('display_name'))
+        .order_by('-total', 'name')
+    )
+    if not streamer_id:
+        rows = rows[:limit]
+    else:
+        # One scan of the streamer's commenters (commenterstats_streamer_idx), then
+        # membership in Python: a correlated case-insensitive match per name has no index
+        allowed = {n.lower() for n in UserAlias.objects.values_list('canonical_name', flat=True) if n}
+        allowed.update(
+            n.lower() for n in CommenterStats.objects.filter(streamer_id=streamer_id)
+            .values_list('commenter_display_name', flat=True).distinct() if n
+        )
+        rows = list(islice((row for row in rows.iterator() if row['name'] in allowed), limit))
+    return [{"username": row['username'], "count": row['total']} for row in rows]
+
+
+def mentions_of(name, streamer_id=None, video_id=None):
+    """Segments in which name was said, newest VOD first, in VOD order within each."""
+    mentions = TranscriptMention.objects.filter(name=(name or '').strip().lower())
+    if streamer_id:
+        mentions = mentions.filter(streamer_id=streamer_id)
+    if video_id:
+        mentions = mentions.filter(video_id=video_id)
+    return mentions.order_by('-video__created_at', 'video_id', 'start_seconds').values(
+        'video_id', 'start_seconds', 'count',
+        'entry_id', 'entry__end_seconds', 'entry__text', 'video__title', 'video__created_at',
+    )
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0012_excludedshoutout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classificationtask',
+            name='fast_path_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='classificationtask',
+            name='model_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def tag_existing_scores(apps, schema_editor):
+    # Every score so far came from the original cardiffnlp model.
+    Comment = apps.get_model('scraper', 'Comment')
+    Comment.objects.filter(toxicity_score__isnull=False).update(
+        toxicity_model='cardiffnlp/twitter-roberta-base-offensive'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0013_classificationtask_path_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='toxicity_model',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='toxicity_logits',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(tag_existing_scores, migrations.RunPython.noop),
+    ]
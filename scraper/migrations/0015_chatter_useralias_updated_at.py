@@ -0,0 +1,48 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_chatters(apps, schema_editor):
+    Comment = apps.get_model('scraper', 'Comment')
+    Chatter = apps.get_model('scraper', 'Chatter')
+
+    batch = []
+    names = (
+        Comment.objects
+        .exclude(commenter_display_name__isnull=True)
+        .exclude(commenter_display_name='')
+        .values_list('commenter_display_name', flat=True)
+        .distinct()
+    )
+    for name in names.iterator(chunk_size=5000):
+        batch.append(Chatter(name_lower=name.lower(), display_name=name))
+        if len(batch) >= 5000:
+            Chatter.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Chatter.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0014_comment_toxicity_model_logits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Chatter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_lower', models.CharField(max_length=255, unique=True)),
+                ('display_name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='useralias',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_chatters, migrations.RunPython.noop),
+    ]
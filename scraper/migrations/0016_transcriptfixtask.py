@@ -0,0 +1,27 @@
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0015_chatter_useralias_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptFixTask',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('scope', models.CharField(max_length=255)),
+                ('video_ids', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('InProgress', 'In Progress'), ('Completed', 'Completed'), ('Failed', 'Failed')], default='Pending', max_length=50)),
+                ('progress_percent', models.IntegerField(default=0)),
+                ('videos_done', models.IntegerField(default=0)),
+                ('total_corrected', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractHour
+
+
+def backfill_stats(apps, schema_editor):
+    Video = apps.get_model('scraper', 'Video')
+    Comment = apps.get_model('scraper', 'Comment')
+    CommenterStats = apps.get_model('scraper', 'CommenterStats')
+    HourlyStats = apps.get_model('scraper', 'HourlyStats')
+
+    totals = dict(comment_count=Count('id'), toxic_count=Count('id', filter=Q(is_toxic=True)))
+    videos = Video.objects.filter(comments__isnull=False).values_list('id', 'streamer_id').distinct()
+    for video_id, streamer_id in videos.iterator():
+        comments = Comment.objects.filter(video_id=video_id)
+        CommenterStats.objects.bulk_create([
+            CommenterStats(video_id=video_id, streamer_id=streamer_id, **row)
+            for row in comments.values('commenter_login', 'commenter_display_name').annotate(**totals).order_by()
+        ], batch_size=1000)
+        HourlyStats.objects.bulk_create([
+            HourlyStats(video_id=video_id, streamer_id=streamer_id, **row)
+            for row in comments.annotate(hour=ExtractHour('created_at')).values('hour').annotate(**totals).order_by()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0016_transcriptfixtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommenterStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('commenter_login', models.CharField(blank=True, max_length=255, null=True)),
+                ('commenter_display_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('toxic_count', models.IntegerField(default=0)),
+                ('streamer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.streamer')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commenter_stats', to='scraper.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['streamer', 'commenter_login'], name='commenterstats_streamer_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.IntegerField(blank=True, null=True)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('toxic_count', models.IntegerField(default=0)),
+                ('streamer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.streamer')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_stats', to='scraper.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['streamer', 'hour'], name='hourlystats_streamer_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
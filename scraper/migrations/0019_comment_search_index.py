@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from scraper.search import install_comment_index, drop_comment_index
+
+
+def forwards(apps, schema_editor):
+    install_comment_index(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    drop_comment_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0018_dataversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
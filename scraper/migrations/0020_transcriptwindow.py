@@ -0,0 +1,48 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from scraper.search import build_transcript_windows, install_transcript_index, drop_transcript_index
+
+
+def backfill_windows(apps, schema_editor):
+    TranscriptEntry = apps.get_model('scraper', 'TranscriptEntry')
+    TranscriptWindow = apps.get_model('scraper', 'TranscriptWindow')
+    video_ids = TranscriptEntry.objects.values_list('video_id', flat=True).distinct()
+    for video_id in list(video_ids):
+        entries = list(TranscriptEntry.objects.filter(video_id=video_id).order_by('start_seconds', 'id'))
+        TranscriptWindow.objects.bulk_create(build_transcript_windows(entries, TranscriptWindow), batch_size=1000)
+
+
+def install_index(apps, schema_editor):
+    install_transcript_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    drop_transcript_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0019_comment_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_seconds', models.FloatField()),
+                ('end_seconds', models.FloatField()),
+                ('first_length', models.IntegerField()),
+                ('text', models.TextField()),
+                ('streamer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.streamer')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_windows', to='scraper.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['video', 'start_seconds'], name='transcriptwindow_video_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_windows, migrations.RunPython.noop),
+        migrations.RunPython(install_index, drop_index),
+    ]
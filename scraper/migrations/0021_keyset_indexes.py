@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0020_transcriptwindow'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['video', 'content_offset_seconds', 'id'], name='comment_video_offset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transcriptentry',
+            index=models.Index(fields=['video', 'start_seconds', 'id'], name='transcript_video_start_idx'),
+        ),
+    ]
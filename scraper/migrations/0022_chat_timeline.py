@@ -0,0 +1,28 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0021_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatTimeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_seconds', models.IntegerField()),
+                ('bucket_count', models.IntegerField(default=0)),
+                ('messages', models.BinaryField()),
+                ('chatters', models.BinaryField()),
+                ('toxic', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timelines', to='scraper.video')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('video', 'bucket_seconds'), name='chattimeline_video_bucket_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from scraper.transcript_stats import build_transcript_terms
+
+
+def backfill_terms(apps, schema_editor):
+    TranscriptEntry = apps.get_model('scraper', 'TranscriptEntry')
+    TranscriptTerm = apps.get_model('scraper', 'TranscriptTerm')
+    video_ids = TranscriptEntry.objects.values_list('video_id', flat=True).distinct()
+    for video_id in list(video_ids):
+        entries = list(TranscriptEntry.objects.filter(video_id=video_id).only('video_id', 'streamer_id', 'text'))
+        TranscriptTerm.objects.bulk_create(build_transcript_terms(entries, TranscriptTerm), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0022_chat_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('length', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('streamer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.streamer')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_terms', to='scraper.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='transcriptterm_term_idx'), models.Index(fields=['streamer', 'term'], name='transcriptterm_streamer_idx')],
+                'constraints': [models.UniqueConstraint(fields=('video', 'term'), name='transcriptterm_video_term_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from scraper.mentions import build_automaton, build_transcript_mentions, mention_names
+
+
+def backfill_mentions(apps, schema_editor):
+    TranscriptEntry = apps.get_model('scraper', 'TranscriptEntry')
+    TranscriptMention = apps.get_model('scraper', 'TranscriptMention')
+    automaton = build_automaton(mention_names(apps.get_model('scraper', 'Chatter'), apps.get_model('scraper', 'UserAlias')))
+    if automaton is None:
+        return
+    video_ids = TranscriptEntry.objects.values_list('video_id', flat=True).distinct()
+    for video_id in list(video_ids):
+        entries = list(TranscriptEntry.objects.filter(video_id=video_id))
+        TranscriptMention.objects.bulk_create(build_transcript_mentions(entries, TranscriptMention, automaton), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0023_transcript_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptMention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('display_name', models.CharField(max_length=255)),
+                ('start_seconds', models.FloatField()),
+                ('count', models.IntegerField(default=1)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='scraper.transcriptentry')),
+                ('streamer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.streamer')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_mentions', to='scraper.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'video', 'start_seconds'], name='mention_name_video_idx'), models.Index(fields=['streamer', 'name'], name='mention_streamer_name_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_mentions, migrations.RunPython.noop),
+    ]
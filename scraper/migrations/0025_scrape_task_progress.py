@@ -0,0 +1,22 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0024_transcript_mentions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapetask',
+            name='progress_detail',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scrapetask',
+            name='streamer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scrape_tasks', to='scraper.streamer'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0025_scrape_task_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptUploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('mode', models.CharField(default='upsert', max_length=20)),
+                ('status', models.CharField(choices=[('Open', 'Open'), ('Committed', 'Committed')], default='Open', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.video')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TranscriptUploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.IntegerField()),
+                ('segments', models.JSONField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='scraper.transcriptuploadsession')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('session', 'seq'), name='uploadchunk_session_seq_uniq')],
+            },
+        ),
+    ]
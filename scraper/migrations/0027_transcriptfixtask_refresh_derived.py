@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0026_transcript_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptfixtask',
+            name='refresh_derived',
+            field=models.BooleanField(default=False),
+        ),
+    ]
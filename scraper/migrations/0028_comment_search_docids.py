@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from scraper.search import install_comment_index, drop_comment_index
+
+
+def reinstall(apps, schema_editor):
+    # Re-key the comment index from scraper_comment.rowid to stable docids
+    drop_comment_index(schema_editor)
+    install_comment_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0027_transcriptfixtask_refresh_derived'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall, reinstall),
+    ]
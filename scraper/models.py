@@ -36,9 +36,11 @@ class ScrapeTask(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     video_id = models.CharField(max_length=100)
-    streamer = models.ForeignKey(Streamer, on_delete=models.CASCADE, related_name='scrape_tasks')
+    # Null for tasks queued by video id alone (scrape-stream) before the VOD is known
+    streamer = models.ForeignKey(Streamer, on_delete=models.CASCADE, null=True, blank=True, related_name='scrape_tasks')
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Pending')
     progress_percent = models.IntegerField(default=0)
+    progress_detail = models.JSONField(null=True, blank=True)  # last progress event published by the worker
     error_message = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -56,6 +58,14 @@ class Comment(models.Model):
     created_at = models.DateTimeField(null=True, blank=True)
     is_toxic = models.BooleanField(default=False)
     toxicity_score = models.FloatField(null=True, blank=True)
+    toxicity_model = models.CharField(max_length=255, null=True, blank=True)  # model that produced toxicity_score
+    toxicity_logits = models.JSONField(null=True, blank=True)  # raw model output, {label: logit}
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['commenter_display_name'], name='comment_display_name_idx'),
+            models.Index(fields=['video', 'content_offset_seconds', 'id'], name='comment_video_offset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.commenter_display_name}: {self.message[:50]}"
@@ -72,6 +82,8 @@ class ClassificationTask(models.Model):
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='classification_tasks')
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Pending')
     progress_percent = models.IntegerField(default=0)
+    fast_path_count = models.IntegerField(default=0)  # scored by MessagePrefilter rules
+    model_count = models.IntegerField(default=0)      # scored by the toxicity model
     error_message = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -80,6 +92,32 @@ class ClassificationTask(models.Model):
         return f"Classification {self.video.id} - {self.status}"
 
 
+class TranscriptFixTask(models.Model):
+    """Background username correction over a set of transcribed videos (see run_transcript_worker)."""
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('InProgress', 'In Progress'),
+        ('Completed', 'Completed'),
+        ('Failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    scope = models.CharField(max_length=255)  # e.g. "all", "streamer:shigity", "video:123"
+    video_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Pending')
+    progress_percent = models.IntegerField(default=0)
+    videos_done = models.IntegerField(default=0)
+    total_corrected = models.IntegerField(default=0)
+    # Set by uploads: rebuild the search/stats rows even if no name changes
+    refresh_derived = models.BooleanField(default=False)
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Transcript fix {self.scope} - {self.status}"
+
+
 class Clip(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="clips")
@@ -93,9 +131,19 @@ class Clip(models.Model):
         return f"Clip: {self.title} ({self.streamer.display_name})"
 
 
+class Chatter(models.Model):
+    """One row per distinct commenter display name, maintained during ingest."""
+    name_lower = models.CharField(max_length=255, unique=True)
+    display_name = models.CharField(max_length=255)
+
+    def __str__(self):
+        return self.display_name
+
+
 class UserAlias(models.Model):
     alias = models.CharField(max_length=255, unique=True)
     canonical_name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.alias} → {self.canonical_name}"
@@ -120,5 +168,153 @@ class TranscriptEntry(models.Model):
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['video', 'start_seconds', 'id'], name='transcript_video_start_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.start_seconds}s] {self.streamer.display_name}: {self.text[:50]}"
+
+
+class CommenterStats(models.Model):
+    """Per-VOD comment totals for one commenter; rebuilt by refresh_video_stats()."""
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='commenter_stats')
+    streamer = models.ForeignKey(Streamer, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    commenter_login = models.CharField(max_length=255, null=True, blank=True)
+    commenter_display_name = models.CharField(max_length=255, null=True, blank=True)
+    comment_count = models.IntegerField(default=0)
+    toxic_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['streamer', 'commenter_login'], name='commenterstats_streamer_idx'),
+        ]
+
+
+class HourlyStats(models.Model):
+    """Per-VOD comment totals by hour of day (hour of Comment.created_at)."""
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='hourly_stats')
+    streamer = models.ForeignKey(Streamer, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    hour = models.IntegerField(null=True, blank=True)
+    comment_count = models.IntegerField(default=0)
+    toxic_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['streamer', 'hour'], name='hourlystats_streamer_idx'),
+        ]
+
+
+class ChatTimeline(models.Model):
+    """
+    Chat activity of one VOD in fixed buckets of bucket_seconds, rebuilt by
+    refresh_chat_timeline(). Each series is a little-endian uint32 array
+    (numpy '<u4') with one value per bucket.
+    """
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='timelines')
+    bucket_seconds = models.IntegerField()
+    bucket_count = models.IntegerField(default=0)
+    messages = models.BinaryField()
+    chatters = models.BinaryField()
+    toxic = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'bucket_seconds'], name='chattimeline_video_bucket_uniq'),
+        ]
+
+
+class DataVersion(models.Model):
+    """Counter per data set ('comments', 'transcripts', 'names'), bumped on every write that changes it."""
+    key = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+class TranscriptWindow(models.Model):
+    """
+    A transcript segment joined with the one after it; indexed for full-text
+    search so phrases that cross a segment boundary still match.
+    """
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='transcript_windows')
+    streamer = models.ForeignKey(Streamer, on_delete=models.CASCADE, related_name='+')
+    start_seconds = models.FloatField()
+    end_seconds = models.FloatField()
+    first_length = models.IntegerField()  # len() of the first segment's text within text
+    text = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['video', 'start_seconds'], name='transcriptwindow_video_idx'),
+        ]
+
+
+class TranscriptTerm(models.Model):
+    """How often a word (lower-cased) is said in one VOD's transcript; rebuilt by refresh_transcript_terms()."""
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='transcript_terms')
+    streamer = models.ForeignKey(Streamer, on_delete=models.CASCADE, related_name='+')
+    term = models.CharField(max_length=100)
+    length = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'term'], name='transcriptterm_video_term_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['term'], name='transcriptterm_term_idx'),
+            models.Index(fields=['streamer', 'term'], name='transcriptterm_streamer_idx'),
+        ]
+
+
+class TranscriptMention(models.Model):
+    """
+    A known chatter or alias canonical name said in one transcript segment;
+    rebuilt by refresh_transcript_mentions(). name is lower-cased.
+    """
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='transcript_mentions')
+    streamer = models.ForeignKey(Streamer, on_delete=models.CASCADE, related_name='+')
+    entry = models.ForeignKey(TranscriptEntry, on_delete=models.CASCADE, related_name='mentions')
+    name = models.CharField(max_length=255)
+    display_name = models.CharField(max_length=255)
+    start_seconds = models.FloatField()
+    count = models.IntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'video', 'start_seconds'], name='mention_name_video_idx'),
+            models.Index(fields=['streamer', 'name'], name='mention_streamer_name_idx'),
+        ]
+
+
+class TranscriptUploadSession(models.Model):
+    """
+    A resumable transcript upload: numbered chunks are staged one request at a
+    time (re-sending a chunk replaces it) and stored together on commit.
+    """
+    STATUS_CHOICES = [
+        ('Open', 'Open'),
+        ('Committed', 'Committed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='+')
+    mode = models.CharField(max_length=20, default='upsert')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Open')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class TranscriptUploadChunk(models.Model):
+    session = models.ForeignKey(TranscriptUploadSession, on_delete=models.CASCADE, related_name='chunks')
+    seq = models.IntegerField()
+    segments = models.JSONField()  # [[start_ms, end_ms, text], ...]
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'seq'], name='uploadchunk_session_seq_uniq'),
+        ]
@@ -0,0 +1,86 @@
+"""
+Versioned response cache for the heavy stats endpoints.
+
+Cached payloads are tagged with the DataVersion counters they were computed
+from. Writers call bump_data_version() and the next read sees the entry as
+stale: it is still served while one caller recomputes it in the background.
+On a cold miss only one caller (per cache backend) computes; the others wait
+for its result instead of running the same aggregation in parallel.
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+
+from scraper.models import DataVersion
+
+LOCK_TIMEOUT = 300      # seconds before an abandoned compute lock expires
+WAIT_TIMEOUT = 30       # how long a concurrent miss waits for the computing caller
+POLL_INTERVAL = 0.05
+
+
+def bump_data_version(*keys):
+    """Mark every cached response that depends on keys as stale."""
+    for key in keys:
+        if not DataVersion.objects.filter(key=key).update(version=F('version') + 1):
+            DataVersion.objects.get_or_create(key=key, defaults={'version': 1})
+
+
+def current_version(keys) -> str:
+    versions = dict(DataVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return '.'.join(str(versions.get(key, 0)) for key in keys)
+
+
+def _cache_key(name, request) -> str:
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return f"resp:{name}:{hashlib.md5(params.encode('utf-8')).hexdigest()}"
+
+
+def _compute_and_store(key, version, compute, background=False):
+    try:
+        data = compute()
+        cache.set(key, {'version': version, 'data': data}, settings.STATS_CACHE_TTL)
+        return data
+    finally:
+        cache.delete(f"{key}:lock")
+        if background:
+            # Threads get their own DB connection; don't leave it open
+            connection.close()
+
+
+def cached_response(name, request, depends_on, compute):
+    """
+    Return compute()'s data for this endpoint and query string, reusing a cached
+    copy while none of the depends_on DataVersion keys has changed.
+    compute must return plain JSON-serializable data (not a Response).
+    """
+    version = current_version(depends_on)
+    key = _cache_key(name, request)
+    lock_key = f"{key}:lock"
+
+    entry = cache.get(key)
+    if entry is not None:
+        if entry['version'] != version and cache.add(lock_key, 1, LOCK_TIMEOUT):
+            threading.Thread(
+                target=_compute_and_store, args=(key, version, compute, True), daemon=True
+            ).start()
+        return entry['data']
+
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        return _compute_and_store(key, version, compute)
+
+    # Someone else is computing this response: wait for it rather than duplicate the work
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['data']
+        if cache.get(lock_key) is None:
+            break
+    return compute()
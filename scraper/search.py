@@ -0,0 +1,317 @@
+"""
+Full-text search over comments and transcripts.
+
+SQLite uses external-content FTS5 tables (scraper_comment_fts,
+scraper_transcriptwindow_fts) kept in sync by triggers; PostgreSQL uses
+generated tsvector columns with GIN indexes. Other backends fall back to
+icontains for comments and have no transcript phrase search.
+
+Transcripts are indexed as TranscriptWindow rows (each segment plus the next
+one) so phrase and NEAR queries can match across a segment boundary.
+
+scraper_comment has a text primary key, so its rowid is not stable (VACUUM
+or a table rebuild renumbers it). The comment index is therefore contentless
+and keyed by scraper_comment_fts_docs.docid, an integer that maps to
+Comment.id and never changes. A migration that rebuilds a table drops its
+triggers; the post_migrate hook (ensure_search_indexes) recreates and refills
+any index whose triggers are missing.
+"""
+import re
+
+from django.db import connection
+
+COMMENT_FTS_TABLE = 'scraper_comment_fts'
+COMMENT_FTS_DOCS = 'scraper_comment_fts_docs'
+WINDOW_FTS_TABLE = 'scraper_transcriptwindow_fts'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_COMMENT_DOCID = f"(SELECT docid FROM {COMMENT_FTS_DOCS} WHERE comment_id = {{row}}.id)"
+
+_SQLITE_COMMENT_FTS = [
+    # AUTOINCREMENT: a docid is never reused, even after its comment is deleted
+    f"""CREATE TABLE IF NOT EXISTS {COMMENT_FTS_DOCS} (
+        docid INTEGER PRIMARY KEY AUTOINCREMENT,
+        comment_id VARCHAR(100) NOT NULL UNIQUE
+    )""",
+    # Contentless: the text lives in scraper_comment, deletes pass the old values
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {COMMENT_FTS_TABLE} USING fts5(
+        message, commenter_display_name, content='',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {COMMENT_FTS_TABLE}_ai AFTER INSERT ON scraper_comment BEGIN
+        INSERT INTO {COMMENT_FTS_DOCS}(comment_id) VALUES (new.id);
+        INSERT INTO {COMMENT_FTS_TABLE}(rowid, message, commenter_display_name)
+        VALUES ({_COMMENT_DOCID.format(row='new')}, new.message, new.commenter_display_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {COMMENT_FTS_TABLE}_ad AFTER DELETE ON scraper_comment BEGIN
+        INSERT INTO {COMMENT_FTS_TABLE}({COMMENT_FTS_TABLE}, rowid, message, commenter_display_name)
+        VALUES ('delete', {_COMMENT_DOCID.format(row='old')}, old.message, old.commenter_display_name);
+        DELETE FROM {COMMENT_FTS_DOCS} WHERE comment_id = old.id;
+    END""",
+    # Only text changes matter; toxicity bulk_updates do not fire this
+    f"""CREATE TRIGGER IF NOT EXISTS {COMMENT_FTS_TABLE}_au AFTER UPDATE OF message, commenter_display_name ON scraper_comment BEGIN
+        INSERT INTO {COMMENT_FTS_TABLE}({COMMENT_FTS_TABLE}, rowid, message, commenter_display_name)
+        VALUES ('delete', {_COMMENT_DOCID.format(row='old')}, old.message, old.commenter_display_name);
+        INSERT INTO {COMMENT_FTS_TABLE}(rowid, message, commenter_display_name)
+        VALUES ({_COMMENT_DOCID.format(row='new')}, new.message, new.commenter_display_name);
+    END""",
+]
+
+_SQLITE_COMMENT_FILL = [
+    f"INSERT INTO {COMMENT_FTS_DOCS}(comment_id) SELECT id FROM scraper_comment",
+    f"""INSERT INTO {COMMENT_FTS_TABLE}(rowid, message, commenter_display_name)
+        SELECT d.docid, c.message, c.commenter_display_name
+        FROM {COMMENT_FTS_DOCS} d JOIN scraper_comment c ON c.id = d.comment_id""",
+]
+
+_POSTGRES_COMMENT_FTS = [
+    """ALTER TABLE scraper_comment ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple',
+            coalesce(message, '') || ' ' || coalesce(commenter_display_name, ''))) STORED""",
+    "CREATE INDEX IF NOT EXISTS comment_search_vector_idx ON scraper_comment USING GIN (search_vector)",
+]
+
+
+_SQLITE_WINDOW_FTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {WINDOW_FTS_TABLE} USING fts5(
+        text, content='scraper_transcriptwindow', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {WINDOW_FTS_TABLE}_ai AFTER INSERT ON scraper_transcriptwindow BEGIN
+        INSERT INTO {WINDOW_FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {WINDOW_FTS_TABLE}_ad AFTER DELETE ON scraper_transcriptwindow BEGIN
+        INSERT INTO {WINDOW_FTS_TABLE}({WINDOW_FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+]
+
+_POSTGRES_WINDOW_FTS = [
+    """ALTER TABLE scraper_transcriptwindow ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED""",
+    "CREATE INDEX IF NOT EXISTS transcriptwindow_search_vector_idx ON scraper_transcriptwindow USING GIN (search_vector)",
+]
+
+
+def install_comment_index(schema_editor):
+    """Create the comment search index for the current backend and fill it from existing rows."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in _SQLITE_COMMENT_FTS + _SQLITE_COMMENT_FILL:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        for sql in _POSTGRES_COMMENT_FTS:
+            schema_editor.execute(sql)
+
+
+def drop_comment_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {COMMENT_FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {COMMENT_FTS_TABLE}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {COMMENT_FTS_DOCS}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS comment_search_vector_idx")
+        schema_editor.execute("ALTER TABLE scraper_comment DROP COLUMN IF EXISTS search_vector")
+
+
+def install_transcript_index(schema_editor):
+    """Create the transcript window search index and fill it from existing windows."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in _SQLITE_WINDOW_FTS:
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {WINDOW_FTS_TABLE}({WINDOW_FTS_TABLE}) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        for sql in _POSTGRES_WINDOW_FTS:
+            schema_editor.execute(sql)
+
+
+def drop_transcript_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {WINDOW_FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {WINDOW_FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS transcriptwindow_search_vector_idx")
+        schema_editor.execute("ALTER TABLE scraper_transcriptwindow DROP COLUMN IF EXISTS search_vector")
+
+
+_SQLITE_TRIGGERS = {
+    COMMENT_FTS_TABLE: ('ai', 'ad', 'au'),
+    WINDOW_FTS_TABLE: ('ai', 'ad'),
+}
+
+
+def ensure_search_indexes(connection):
+    """
+    Recreate and refill a SQLite search index whose triggers are gone, as
+    happens when a migration rebuilds scraper_comment or
+    scraper_transcriptwindow. Runs after every migrate; a no-op otherwise.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = set(cursor.fetchall())
+
+    reinstall = {
+        COMMENT_FTS_TABLE: (drop_comment_index, install_comment_index),
+        WINDOW_FTS_TABLE: (drop_transcript_index, install_transcript_index),
+    }
+    for table, suffixes in _SQLITE_TRIGGERS.items():
+        # Not created yet (migrating to before the index existed)
+        if ('table', table) not in existing:
+            continue
+        if all(('trigger', f'{table}_{suffix}') in existing for suffix in suffixes):
+            continue
+        drop, install = reinstall[table]
+        with connection.schema_editor() as schema_editor:
+            drop(schema_editor)
+            install(schema_editor)
+
+
+def build_transcript_windows(entries, window_model):
+    """
+    One window per entry (entries sorted by start_seconds): its text followed
+    by the next entry's text. The last entry gets a window of its own.
+    """
+    windows = []
+    for i, entry in enumerate(entries):
+        following = entries[i + 1] if i + 1 < len(entries) else None
+        first = entry.text or ''
+        windows.append(window_model(
+            video_id=entry.video_id,
+            streamer_id=entry.streamer_id,
+            start_seconds=entry.start_seconds,
+            end_seconds=(following or entry).end_seconds,
+            first_length=len(first),
+            text=f"{first} {following.text or ''}" if following else first,
+        ))
+    return windows
+
+
+def refresh_transcript_windows(video_id):
+    """Rebuild the search windows of one VOD from its current TranscriptEntry text."""
+    from django.db import transaction
+    from scraper.models import TranscriptEntry, TranscriptWindow
+
+    entries = list(TranscriptEntry.objects.filter(video_id=video_id).order_by('start_seconds', 'id'))
+    with transaction.atomic():
+        TranscriptWindow.objects.filter(video_id=video_id).delete()
+        TranscriptWindow.objects.bulk_create(build_transcript_windows(entries, TranscriptWindow), batch_size=1000)
+
+
+def terms(text: str) -> list:
+    """Lower-cased word tokens of a user query; punctuation is dropped."""
+    return _WORD_RE.findall((text or '').lower())
+
+
+def _sqlite_match(groups) -> str:
+    # Each term is quoted (so FTS5 syntax in user input is inert) and prefix-matched
+    return ' OR '.join('(' + ' '.join(f'"{t}"*' for t in group) + ')' for group in groups)
+
+
+def _postgres_tsquery(groups) -> str:
+    return ' | '.join('(' + ' & '.join(f'{t}:*' for t in group) + ')' for group in groups)
+
+
+def search_comments(qs, queries):
+    """
+    Restrict a Comment queryset to rows matching any of queries (each query
+    needs all of its words, as prefixes, in the message or display name) and
+    order them best match first. Returns None when the backend has no index
+    or the queries contain no words, so the caller can fall back to icontains.
+    """
+    groups = [g for g in (terms(q) for q in queries) if g]
+    if not groups:
+        return None
+
+    if connection.vendor == 'sqlite':
+        return qs.extra(
+            select={'search_rank': f'{COMMENT_FTS_TABLE}.rank'},
+            tables=[COMMENT_FTS_TABLE, COMMENT_FTS_DOCS],
+            where=[
+                f'{COMMENT_FTS_TABLE} MATCH %s',
+                f'{COMMENT_FTS_DOCS}.docid = {COMMENT_FTS_TABLE}.rowid',
+                f'{COMMENT_FTS_DOCS}.comment_id = scraper_comment.id',
+            ],
+            params=[_sqlite_match(groups)],
+        ).order_by('search_rank')
+
+    if connection.vendor == 'postgresql':
+        tsquery = _postgres_tsquery(groups)
+        return qs.extra(
+            select={'search_rank': "ts_rank(scraper_comment.search_vector, to_tsquery('simple', %s))"},
+            select_params=[tsquery],
+            where=["scraper_comment.search_vector @@ to_tsquery('simple', %s)"],
+            params=[tsquery],
+        ).order_by('-search_rank')
+
+    return None
+
+
+PHRASE, ALL_WORDS, NEAR = 'phrase', 'all', 'near'
+
+
+def search_transcripts(qs, query: str, mode=PHRASE, distance=10):
+    """
+    Match a TranscriptWindow queryset against query and return it best match
+    first as values() with a highlighted 'snippet' and 'search_rank'.
+
+    mode: phrase (words adjacent, in order), all (every word anywhere in the
+    window) or near (every word within `distance` tokens; PostgreSQL has no
+    "within N" operator, so there it behaves like all).
+    A hit that lies entirely in the second segment is left to the next window,
+    so each match is reported once, at the segment where it starts.
+    Returns None when the query has no words or the backend has no index.
+    """
+    words = terms(query)
+    if not words:
+        return None
+    fields = ('id', 'video_id', 'streamer_id', 'start_seconds', 'end_seconds')
+
+    if connection.vendor == 'sqlite':
+        if mode == ALL_WORDS:
+            match = ' '.join(f'"{w}"' for w in words)
+        elif mode == NEAR and len(words) > 1:
+            match = 'NEAR(' + ' '.join(f'"{w}"' for w in words) + f', {int(distance)})'
+        else:
+            match = '"' + ' '.join(words) + '"'
+        return qs.extra(
+            select={
+                'snippet': f"snippet({WINDOW_FTS_TABLE}, 0, '<mark>', '</mark>', '…', 24)",
+                'search_rank': f'{WINDOW_FTS_TABLE}.rank',
+            },
+            tables=[WINDOW_FTS_TABLE],
+            where=[
+                f'{WINDOW_FTS_TABLE}.rowid = scraper_transcriptwindow.id',
+                f'{WINDOW_FTS_TABLE} MATCH %s',
+                # Position of the first highlighted token must fall in the first segment
+                f'instr(highlight({WINDOW_FTS_TABLE}, 0, char(1), char(2)), char(1)) <= scraper_transcriptwindow.first_length',
+            ],
+            params=[match],
+        ).order_by('search_rank').values(*fields, 'snippet', 'search_rank')
+
+    if connection.vendor == 'postgresql':
+        tsquery = (' & ' if mode in (ALL_WORDS, NEAR) else ' <-> ').join(words)
+        q = "to_tsquery('simple', %s)"
+        first = "to_tsvector('simple', left(scraper_transcriptwindow.text, scraper_transcriptwindow.first_length))"
+        second = "to_tsvector('simple', substr(scraper_transcriptwindow.text, scraper_transcriptwindow.first_length + 2))"
+        return qs.extra(
+            select={
+                'snippet': f"ts_headline('simple', scraper_transcriptwindow.text, {q}, "
+                           "'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8')",
+                'search_rank': f"ts_rank(scraper_transcriptwindow.search_vector, {q})",
+            },
+            select_params=[tsquery, tsquery],
+            where=[
+                f"scraper_transcriptwindow.search_vector @@ {q}",
+                f"({first} @@ {q} OR NOT {second} @@ {q})",
+            ],
+            params=[tsquery, tsquery, tsquery],
+        ).order_by('-search_rank').values(*fields, 'snippet', 'search_rank')
+
+    return None
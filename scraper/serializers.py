@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Video, Comment, Streamer, ScrapeTask, ClassificationTask, Clip, TranscriptEntry, UserAlias, ExcludedShoutout
+from .models import Video, Comment, Streamer, ScrapeTask, ClassificationTask, Clip, TranscriptEntry, UserAlias, ExcludedShoutout, TranscriptFixTask, TranscriptUploadSession
 
 class VideoSerializer(serializers.ModelSerializer):
     clip_count = serializers.SerializerMethodField()
@@ -14,14 +14,21 @@ class VideoSerializer(serializers.ModelSerializer):
             'has_transcript'
         ]
 
+    # VideoViewSet annotates these; the per-object queries are only a fallback
     def get_clip_count(self, obj):
+        if hasattr(obj, 'clip_count'):
+            return obj.clip_count
         return obj.clips.count()
 
     def get_first_clip_url(self, obj):
-        clip = obj.clips.exclude(s3_url=None).exclude(s3_url='').first()
+        if hasattr(obj, 'first_clip_url'):
+            return obj.first_clip_url
+        clip = obj.clips.exclude(s3_url=None).exclude(s3_url='').order_by('pk').first()
         return clip.s3_url if clip else None
 
     def get_has_transcript(self, obj):
+        if hasattr(obj, 'has_transcript'):
+            return obj.has_transcript
         return obj.transcripts.exists()
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -47,16 +54,21 @@ class StreamerSerializer(serializers.ModelSerializer):
         model = Streamer
         fields = '__all__'
     
+    # StreamerViewSet annotates these; the per-object queries are only a fallback
     def get_video_count(self, obj):
+        if hasattr(obj, 'video_count'):
+            return obj.video_count
         return obj.videos.count()
 
     def get_last_vod_at(self, obj):
+        if hasattr(obj, 'last_vod_at'):
+            return obj.last_vod_at
         last_v = obj.videos.order_by('-created_at').first()
         return last_v.created_at if last_v else None
 
 class ScrapeTaskSerializer(serializers.ModelSerializer):
-    streamer_login = serializers.CharField(source='streamer.login', read_only=True)
-    streamer_display_name = serializers.CharField(source='streamer.display_name', read_only=True)
+    streamer_login = serializers.CharField(source='streamer.login', read_only=True, allow_null=True)
+    streamer_display_name = serializers.CharField(source='streamer.display_name', read_only=True, allow_null=True)
 
     class Meta:
         model = ScrapeTask
@@ -70,6 +82,26 @@ class ClassificationTaskSerializer(serializers.ModelSerializer):
         model = ClassificationTask
         fields = '__all__'
 
+class TranscriptFixTaskSerializer(serializers.ModelSerializer):
+    videos_total = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TranscriptFixTask
+        exclude = ['video_ids']
+
+    def get_videos_total(self, obj):
+        return len(obj.video_ids)
+
+class TranscriptUploadSessionSerializer(serializers.ModelSerializer):
+    received_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TranscriptUploadSession
+        fields = ['id', 'video', 'mode', 'status', 'received_chunks', 'created_at', 'updated_at']
+
+    def get_received_chunks(self, obj):
+        return sorted(obj.chunks.values_list('seq', flat=True))
+
 class ClipSerializer(serializers.ModelSerializer):
     streamer_name = serializers.CharField(source='streamer.display_name', read_only=True)
     video_title = serializers.CharField(source='video.title', read_only=True)
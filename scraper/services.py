@@ -7,10 +7,19 @@ import requests
 import subprocess
 import tempfile
 import shutil
+import threading
+import numpy as np
+import heapq
+from collections import defaultdict, deque
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional
 from django.conf import settings
-from .models import Video, Comment, Streamer, ClassificationTask
+from .models import Video, Comment, Streamer, ClassificationTask, Chatter
+from .stats_service import refresh_video_stats
+from .response_cache import bump_data_version
+from .search import refresh_transcript_windows
+from .transcript_stats import refresh_transcript_terms
+from .mentions import refresh_transcript_mentions
 from datetime import datetime
 
 # --- CONFIGURATION ---
@@ -305,6 +314,7 @@ class TwitchScraperService:
                 
             if local_batch:
                 Comment.objects.bulk_create(local_batch, ignore_conflicts=True)
+                record_chatters(c.commenter_display_name for c in local_batch)
                 total_comments += len(local_batch)
                 print(f"Uploaded batch of {len(local_batch)} comments. Offset: {max_offset_seen}")
 
@@ -326,6 +336,9 @@ class TwitchScraperService:
             page += 1
             time.sleep(0.1)
         
+        # Keep the stats rollups in step with the newly stored comments
+        refresh_video_stats(video_id)
+
         # Final done event
         if on_progress:
             on_progress({
@@ -368,25 +381,324 @@ def _levenshtein(a: str, b: str) -> int:
     return dp[n]
 
 
+try:
+    from rapidfuzz import process as _fuzz_process
+    from rapidfuzz.distance import Levenshtein as _Lev
+    _levenshtein_fn = _Lev.distance
+except ImportError:
+    _fuzz_process = None
+    _levenshtein_fn = _levenshtein
+
+
+def _pair_distances(words: list, others: list) -> list:
+    """Levenshtein distance of each (words[i], others[i]) pair, in one rapidfuzz call when installed."""
+    if _fuzz_process is not None and words:
+        return _fuzz_process.cpdist(words, others, scorer=_Lev.distance, workers=1).tolist()
+    return [_levenshtein_fn(a, b) for a, b in zip(words, others)]
+
+
+def record_chatters(display_names: Iterable[str]):
+    """Add any new commenter display names to the Chatter dictionary."""
+    seen = {}
+    for name in display_names:
+        if name and name.lower() not in seen:
+            seen[name.lower()] = name
+    if seen:
+        Chatter.objects.bulk_create(
+            [Chatter(name_lower=lower, display_name=name) for lower, name in seen.items()],
+            ignore_conflicts=True,
+        )
+
+
+# In-process caches for the names dictionary, its fuzzy index and the aliases.
+# Each is keyed on a cheap version probe and refreshed only when it changes.
+_names_lock = threading.Lock()
+_names_cache = {'max_id': None, 'index': None, 'added': 0}
+_aliases_cache = {'version': None, 'aliases': None}
+
+# Names appended to a cached index go through its slower pure-Python side table;
+# past this fraction of the indexed names the index is rebuilt from scratch.
+_INDEX_REBUILD_RATIO = 0.2
+
+
+def get_name_index() -> 'NameIndex':
+    """
+    NameIndex over every known commenter name (Chatter table), cached per process.
+    New chatters since the last call are appended incrementally.
+    """
+    from django.db.models import Max
+
+    with _names_lock:
+        max_id = Chatter.objects.aggregate(m=Max('id'))['m'] or 0
+        cache = _names_cache
+        index = cache['index']
+
+        if index is not None and max_id > cache['max_id']:
+            new_names = (
+                Chatter.objects.filter(id__gt=cache['max_id'])
+                .order_by('id')
+                .values_list('display_name', flat=True)
+            )
+            for name in new_names:
+                if len(name) >= 3:
+                    index.add(name)
+                    cache['added'] += 1
+            if cache['added'] > _INDEX_REBUILD_RATIO * max(len(index.names), 1):
+                index = None
+
+        if index is None or max_id < cache['max_id']:
+            names = {
+                n.lower(): n
+                for n in Chatter.objects.order_by('id').values_list('display_name', flat=True)
+                if n and len(n) >= 3
+            }
+            index = NameIndex(names)
+            cache['added'] = 0
+
+        cache['index'] = index
+        cache['max_id'] = max_id
+        return index
+
+
 def build_global_names_dict():
-    """Build the global commenter names dictionary (all distinct names in DB)."""
-    from .models import Comment
-    return {
-        n.lower(): n
-        for n in Comment.objects
-            .values_list('commenter_display_name', flat=True)
-            .distinct()
-        if n and len(n) >= 3
-    }
+    """Build the global commenter names dictionary (all known chatter names)."""
+    return dict(get_name_index().names)
 
 
 def build_aliases_dict():
     """Build alias → canonical_name mapping from UserAlias table."""
+    from django.db.models import Count, Max
     from .models import UserAlias
-    return {a.alias.lower(): a.canonical_name for a in UserAlias.objects.all()}
+
+    version = UserAlias.objects.aggregate(n=Count('id'), updated=Max('updated_at'))
+    version = (version['n'], version['updated'])
+    with _names_lock:
+        if _aliases_cache['version'] != version:
+            _aliases_cache['aliases'] = {a.alias.lower(): a.canonical_name for a in UserAlias.objects.all()}
+            _aliases_cache['version'] = version
+        return dict(_aliases_cache['aliases'])
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """All strings obtainable from word by deleting up to max_distance characters."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
 
 
-def fix_transcript_usernames(video_id: str, names: dict = None, aliases: dict = None) -> int:
+class NameIndex:
+    """
+    Symmetric-delete index over {lowercase_name: original_name} for fuzzy
+    username lookups within edit distance 2.
+
+    Every name is stored under each string obtainable by deleting up to two of
+    its characters. Two strings within distance 2 always share such a variant,
+    so a lookup only verifies the few names reachable from the word's own
+    deletes instead of scanning every name of similar length. Variants are kept
+    as sorted 64-bit hashes in NumPy arrays (~12 bytes each); hash collisions
+    only add candidates, which the exact distance check then rejects.
+
+    Build it once per run and share it: construction is the expensive part.
+    """
+    MAX_DISTANCE = 2
+
+    def __init__(self, names: dict):
+        self.names = names
+        self._order = {}  # name_lower -> insertion position, for deterministic tie-breaking
+        hashes, ids = [], []
+        self._keys = []
+        for name_lower in names:
+            idx = self._register(name_lower)
+            variants = _deletes(name_lower, self.MAX_DISTANCE)
+            hashes.extend(map(hash, variants))
+            ids.extend([idx] * len(variants))
+
+        order = np.argsort(np.array(hashes, dtype=np.int64), kind='stable')
+        self._hashes = np.array(hashes, dtype=np.int64)[order]
+        self._ids = np.array(ids, dtype=np.int32)[order]
+        self._extra = defaultdict(list)  # variant -> name_lower, for names added after construction
+
+    def _register(self, name_lower: str) -> int:
+        idx = len(self._keys)
+        self._order[name_lower] = idx
+        self._keys.append(name_lower)
+        return idx
+
+    def __contains__(self, name_lower: str) -> bool:
+        return name_lower in self.names
+
+    def add(self, name: str):
+        """Add (or re-case) a name, e.g. the streamer's own display name."""
+        lower = name.lower()
+        self.names[lower] = name
+        if lower not in self._order:
+            self._register(lower)
+            for variant in _deletes(lower, self.MAX_DISTANCE):
+                self._extra[variant].append(lower)
+
+    def candidates(self, word: str) -> set:
+        """Names that may be within MAX_DISTANCE of word (superset, unverified)."""
+        variants = _deletes(word, self.MAX_DISTANCE)
+        found = set()
+        if len(self._hashes):
+            query = np.fromiter(map(hash, variants), dtype=np.int64, count=len(variants))
+            lo = np.searchsorted(self._hashes, query, side='left')
+            hi = np.searchsorted(self._hashes, query, side='right')
+            for a, b in zip(lo.tolist(), hi.tolist()):
+                if b > a:
+                    found.update(self._keys[i] for i in self._ids[a:b].tolist())
+        if self._extra:
+            for variant in variants:
+                found.update(self._extra.get(variant, ()))
+        return found
+
+    def ranked_candidates(self, word: str) -> list:
+        """
+        Verified names within MAX_DISTANCE of word as (dist, name_lower) pairs,
+        best first: lower distance, then shorter name, then the one added first.
+        Independent of the similarity thresholds, so it can be cached per word.
+        """
+        return self.ranked_candidates_many([word])[word]
+
+    def ranked_candidates_many(self, words: Iterable[str]) -> dict:
+        """
+        ranked_candidates for every distinct word, {word: ranked}. The distances
+        of all (word, candidate) pairs are computed in one batch
+        (rapidfuzz.process.cpdist), so a video's whole vocabulary costs one call.
+        """
+        pairs_word, pairs_name = [], []
+        ranked = {}
+        for word in words:
+            if word in ranked:
+                continue
+            ranked[word] = []
+            wlen = len(word)
+            for name_lower in self.candidates(word):
+                if abs(len(name_lower) - wlen) <= self.MAX_DISTANCE:
+                    pairs_word.append(word)
+                    pairs_name.append(name_lower)
+
+        for word, name_lower, dist in zip(pairs_word, pairs_name, _pair_distances(pairs_word, pairs_name)):
+            if dist <= self.MAX_DISTANCE:
+                ranked[word].append(((dist, len(name_lower), self._order[name_lower]), name_lower))
+        for word, found in ranked.items():
+            found.sort()
+            ranked[word] = [(key[0], name_lower) for key, name_lower in found]
+        return ranked
+
+    def best_match(self, word: str, priority_names: dict = None, ranked: list = None):
+        """
+        Closest name to word within distance 2 that passes the similarity
+        threshold (65% for priority names, 80% otherwise), or (None, inf).
+        Pass ranked (from ranked_candidates) to skip the lookup.
+        """
+        if ranked is None:
+            ranked = self.ranked_candidates(word)
+        wlen = len(word)
+        for dist, name_lower in ranked:
+            max_len = max(wlen, len(name_lower))
+            threshold = 0.65 if (priority_names and name_lower in priority_names) else 0.80
+            if (1 - dist / max_len) >= threshold:
+                return self.names[name_lower], dist
+        return None, float('inf')
+
+
+class ActiveChatterWindow:
+    """
+    Most active chatters in a sliding time window over one VOD's comments.
+
+    offsets must be sorted ascending with names aligned to them. top(center)
+    covers comments with offset in [center - radius, center + radius] and must
+    be called with non-decreasing centers; comments enter and leave the window
+    one at a time, so a full pass costs O(comments) plus a small per-query
+    selection. The chosen names match Counter(window).most_common(top_n):
+    highest count first, ties going to the chatter who spoke first in the window.
+    """
+
+    def __init__(self, offsets: list, names: list, radius: float, top_n: int):
+        self.offsets = offsets
+        self.names = names
+        self.radius = radius
+        self.top_n = top_n
+        self._lo = 0
+        self._hi = 0
+        self._positions = {}                 # name -> deque of its comment indices in the window
+        self._buckets = defaultdict(set)     # count -> names with that many comments in the window
+        self._top = []
+
+    def top(self, center: float) -> list:
+        # Add/remove are inlined: they run once per comment and dominate the cost
+        offsets, names = self.offsets, self.names
+        positions, buckets = self._positions, self._buckets
+        n, hi, lo = len(offsets), self._hi, self._lo
+        start_hi, start_lo = hi, lo
+
+        upper = center + self.radius
+        while hi < n and offsets[hi] <= upper:
+            name = names[hi]
+            pos = positions.get(name)
+            if pos is None:
+                pos = positions[name] = deque()
+            count = len(pos)
+            if count:
+                bucket = buckets[count]
+                bucket.discard(name)
+                if not bucket:
+                    del buckets[count]
+            pos.append(hi)
+            buckets[count + 1].add(name)
+            hi += 1
+
+        lower = center - self.radius
+        while lo < hi and offsets[lo] < lower:
+            # Comments leave in offset order, so this is always the name's oldest one
+            name = names[lo]
+            pos = positions[name]
+            count = len(pos)
+            bucket = buckets[count]
+            bucket.discard(name)
+            if not bucket:
+                del buckets[count]
+            pos.popleft()
+            if count > 1:
+                buckets[count - 1].add(name)
+            else:
+                del positions[name]
+            lo += 1
+
+        self._hi, self._lo = hi, lo
+        changed = hi != start_hi or lo != start_lo
+        if not changed:
+            return self._top
+
+        top = []
+        for count in sorted(self._buckets, reverse=True):
+            need = self.top_n - len(top)
+            if need <= 0:
+                break
+            bucket = self._buckets[count]
+            if len(bucket) > need:
+                bucket = heapq.nsmallest(need, bucket, key=lambda n: self._positions[n][0])
+            else:
+                bucket = sorted(bucket, key=lambda n: self._positions[n][0])
+            top.extend(bucket)
+        self._top = top
+        return top
+
+
+def refresh_transcript_derived(video_id: str):
+    """Rebuild the search windows, term counts and mentions of one VOD from its TranscriptEntry text."""
+    refresh_transcript_windows(video_id)
+    refresh_transcript_terms(video_id)
+    refresh_transcript_mentions(video_id)
+    bump_data_version('transcripts')
+
+
+def fix_transcript_usernames(video_id: str, names: dict = None, aliases: dict = None, index: NameIndex = None,
+                             refresh: bool = False) -> int:
     """
     Post-process transcript entries for a video by correcting misspelled
     usernames using all unique commenter display names across the entire DB.
@@ -395,11 +707,12 @@ def fix_transcript_usernames(video_id: str, names: dict = None, aliases: dict =
     around that segment are treated as "priority" names and matched with a
     lower 65% similarity threshold. All other names require 80%.
 
-    Pass a pre-built names dict to avoid re-querying the DB on every call.
+    By default the process-wide cached index from get_name_index() is used;
+    pass an explicit NameIndex (or names dict) to match against other names.
+    The derived search/stats rows are rebuilt when names changed, or always
+    with refresh=True (freshly uploaded text).
     Returns the number of transcript entries that were corrected.
     """
-    import bisect
-    from collections import Counter
     from .models import TranscriptEntry, Comment, Video
 
     try:
@@ -407,17 +720,19 @@ def fix_transcript_usernames(video_id: str, names: dict = None, aliases: dict =
     except Video.DoesNotExist:
         return 0
 
-    if names is None:
-        names = build_global_names_dict()
+    if index is None:
+        index = get_name_index() if names is None else NameIndex(names)
+    names = index.names
     if aliases is None:
         aliases = build_aliases_dict()
     if not names and not aliases:
+        if refresh:
+            refresh_transcript_derived(video_id)
         return 0
 
     # Also add the streamer's display name
     if video.streamer and video.streamer.display_name:
-        sn = video.streamer.display_name
-        names[sn.lower()] = sn
+        index.add(video.streamer.display_name)
 
     transcripts = list(TranscriptEntry.objects.filter(video=video))
 
@@ -433,34 +748,98 @@ def fix_transcript_usernames(video_id: str, names: dict = None, aliases: dict =
     ACTIVE_WINDOW_SECONDS = 60  # ±60s around transcript entry midpoint
     TOP_ACTIVE = 10             # top N active chatters get the lower threshold
 
+    window = ActiveChatterWindow(comment_offsets, comment_names_list, ACTIVE_WINDOW_SECONDS, TOP_ACTIVE)
+    # The window only moves forward, so walk the entries by midpoint
+    transcripts.sort(key=lambda e: e.start_seconds + e.end_seconds)
+
     updated = []
+    # Shared by every segment of this video: each distinct word (and each
+    # word/priority-set pair) goes through fuzzy matching only once, and the
+    # candidate distances of the whole vocabulary are computed in one batch
+    vocabulary = set()
+    for entry in transcripts:
+        vocabulary |= _fuzzy_words(entry.raw_text or entry.text, names, aliases)
+    memo = index.ranked_candidates_many(vocabulary)
 
     for entry in transcripts:
-        # Find active chatters in the time window around this entry
+        # Active chatters in the time window around this entry
         mid = (entry.start_seconds + entry.end_seconds) / 2
-        lo = bisect.bisect_left(comment_offsets, mid - ACTIVE_WINDOW_SECONDS)
-        hi = bisect.bisect_right(comment_offsets, mid + ACTIVE_WINDOW_SECONDS)
-
-        chatter_counts = Counter(comment_names_list[lo:hi])
         priority_names = {
             n.lower(): n
-            for n, _ in chatter_counts.most_common(TOP_ACTIVE)
+            for n in window.top(mid)
             if n and len(n) >= 3
         }
 
         # Always re-apply from raw_text so improvements stack cleanly
         source = entry.raw_text if entry.raw_text else entry.text
-        fixed = _fix_names_in_text(source, names, aliases=aliases, priority_names=priority_names)
+        fixed = _fix_names_in_text(source, names, aliases=aliases, priority_names=priority_names, index=index, memo=memo)
         if fixed != entry.text:
             entry.text = fixed
             updated.append(entry)
 
     if updated:
-        TranscriptEntry.objects.bulk_update(updated, ['text'])
+        TranscriptEntry.objects.bulk_update(updated, ['text'], batch_size=500)
+    if updated or refresh:
+        refresh_transcript_derived(video_id)
 
     return len(updated)
 
 
+# Set in the parent right before the pool forks; children inherit them read-only
+# (copy-on-write), so the names and their index are built exactly once.
+_pool_index = None
+_pool_aliases = None
+
+
+def _fix_video_in_worker(video_id: str, refresh: bool = False):
+    return video_id, fix_transcript_usernames(video_id, aliases=_pool_aliases, index=_pool_index, refresh=refresh)
+
+
+def fix_transcripts_parallel(video_ids: List[str], workers: int = None, on_progress=None,
+                             refresh: bool = False) -> Dict[str, int]:
+    """
+    Run fix_transcript_usernames over many videos using a process pool.
+
+    The name index and aliases are loaded once in the parent and shared with
+    the forked workers; each worker writes its video back with bulk_update.
+    on_progress(done, total, video_id, corrected) is called as videos finish.
+    refresh=True rebuilds every video's derived rows, see fix_transcript_usernames.
+    Returns {video_id: entries corrected}.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from django.db import connections
+
+    global _pool_index, _pool_aliases
+
+    workers = workers or settings.TRANSCRIPT_FIX_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(video_ids)))
+    _pool_index = get_name_index()
+    _pool_aliases = build_aliases_dict()
+
+    results = {}
+    total = len(video_ids)
+    if workers == 1:
+        for video_id in video_ids:
+            _, corrected = _fix_video_in_worker(video_id, refresh)
+            results[video_id] = corrected
+            if on_progress:
+                on_progress(len(results), total, video_id, corrected)
+        return results
+
+    # Forked children must not reuse the parent's DB connections
+    connections.close_all()
+    ctx = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(_fix_video_in_worker, vid, refresh) for vid in video_ids]
+        for future in as_completed(futures):
+            video_id, corrected = future.result()
+            results[video_id] = corrected
+            if on_progress:
+                on_progress(len(results), total, video_id, corrected)
+    return results
+
+
 _COMMON_WORDS = {
     # Common English words that could false-match gaming usernames
     'fine', 'fined', 'finer', 'matter', 'matters', 'value', 'valued', 'values',
@@ -528,27 +907,39 @@ _COMMON_WORDS = {
 }
 
 
-def _fix_names_in_text(text: str, names: dict, aliases: dict = None, priority_names: dict = None) -> str:
+_NAME_PUNCT = '.,!?;:\'"()[]{}'
+
+
+def _fuzzy_words(text: str, names: dict, aliases: dict = None) -> set:
+    """The lowercased words of text that _fix_names_in_text sends to fuzzy matching."""
+    found = set()
+    for token in text.split():
+        lower = token.strip(_NAME_PUNCT).lower()
+        if len(lower) >= 3 and not (aliases and lower in aliases) and lower not in names and lower not in _COMMON_WORDS:
+            found.add(lower)
+    return found
+
+
+def _fix_names_in_text(text: str, names: dict, aliases: dict = None, priority_names: dict = None,
+                       index: NameIndex = None, memo: dict = None) -> str:
     """
     Replace words in text that are close matches to known usernames.
     names: {lowercase_name: original_case_name}
     aliases: {alias_lower: canonical_name} — checked first, exact match only
     priority_names: {lowercase_name: original_name} — active chatters in the
         current time window; matched at 65% similarity. All other names require 80%.
+    index: NameIndex over names; built from names when omitted, so callers
+        processing many segments should build it once and pass it in.
+    memo: dict reused across calls with the same names/index (e.g. all
+        segments of one video) to cache fuzzy results per word.
     Words in _COMMON_WORDS are never fuzzy-replaced.
     """
     import re as _re
-    try:
-        from rapidfuzz.distance import Levenshtein as _Lev
-        _levenshtein_fn = _Lev.distance
-    except ImportError:
-        _levenshtein_fn = _levenshtein
 
-    # Pre-bucket names by length for fast candidate filtering
-    from collections import defaultdict as _dd
-    by_len = _dd(list)
-    for nl in names:
-        by_len[len(nl)].append(nl)
+    if index is None:
+        index = NameIndex(names)
+    if memo is None:
+        memo = {}
 
     words = _re.split(r'(\s+)', text)  # preserve whitespace
     result = []
@@ -559,10 +950,9 @@ def _fix_names_in_text(text: str, names: dict, aliases: dict = None, priority_na
             continue
 
         # Strip punctuation for matching, preserve it for output
-        _punct = '.,!?;:\'"()[]{}'
-        stripped = token.strip(_punct)
-        prefix = token[:len(token) - len(token.lstrip(_punct))]
-        _rstripped = token.rstrip(_punct)
+        stripped = token.strip(_NAME_PUNCT)
+        prefix = token[:len(token) - len(token.lstrip(_NAME_PUNCT))]
+        _rstripped = token.rstrip(_NAME_PUNCT)
         suffix = token[len(_rstripped):] if _rstripped != token else ''
 
         if len(stripped) < 3:
@@ -581,29 +971,26 @@ def _fix_names_in_text(text: str, names: dict, aliases: dict = None, priority_na
             result.append(prefix + names[lower] + suffix)
             continue
 
-        # Fuzzy match — only check names within ±2 length (pre-bucketed)
+        # Fuzzy match — only names sharing a delete-variant with the word (see NameIndex)
         # Skip if this word is a known common English/Spanish word
         if lower in _COMMON_WORDS:
             result.append(token)
             continue
 
-        best_name = None
-        best_dist = float('inf')
-        wlen = len(lower)
-
-        candidates = []
-        for delta in range(-2, 3):
-            candidates.extend(by_len.get(wlen + delta, []))
-
-        for name_lower in candidates:
-            dist = _levenshtein_fn(lower, name_lower)
-            max_len = max(wlen, len(name_lower))
-            # Active chatters in this time window: 65% threshold
-            # All other names: 80% threshold (reduces false positives in large global dict)
-            threshold = 0.65 if (priority_names and name_lower in priority_names) else 0.80
-            if dist <= 2 and dist < best_dist and (1 - dist / max_len) >= threshold:
-                best_dist = dist
-                best_name = names[name_lower]
+        # Candidates within distance 2 do not depend on the time window, so
+        # they are computed once per distinct word
+        ranked = memo.get(lower)
+        if ranked is None:
+            ranked = memo[lower] = index.ranked_candidates(lower)
+
+        # Active chatters in this time window: 65% threshold
+        # All other names: 80% threshold (reduces false positives in large global dict)
+        # The outcome only depends on which candidates are active right now
+        active = frozenset(n for _, n in ranked if priority_names and n in priority_names)
+        match = memo.get((lower, active))
+        if match is None:
+            match = memo[(lower, active)] = index.best_match(lower, priority_names, ranked=ranked)
+        best_name, best_dist = match
 
         if best_name and best_dist > 0:
             result.append(prefix + best_name + suffix)
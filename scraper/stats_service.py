@@ -0,0 +1,175 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q, Sum, F, FloatField, ExpressionWrapper, Case, When, IntegerField
+from django.db.models.functions import Cast, ExtractHour
+from scraper.models import Video, Comment, CommenterStats, HourlyStats, ChatTimeline
+from scraper.response_cache import bump_data_version
+
+
+def refresh_video_stats(video_id):
+    """
+    Recompute the CommenterStats / HourlyStats rows of one VOD from its comments.
+    Called when a scrape finishes and when classification updates is_toxic, so
+    the stats endpoints never have to aggregate the Comment table themselves.
+    """
+    streamer_id = Video.objects.filter(pk=video_id).values_list('streamer_id', flat=True).first()
+    comments = Comment.objects.filter(video_id=video_id)
+    totals = dict(comment_count=Count('id'), toxic_count=Count('id', filter=Q(is_toxic=True)))
+
+    commenters = [
+        CommenterStats(video_id=video_id, streamer_id=streamer_id, **row)
+        for row in comments.values('commenter_login', 'commenter_display_name').annotate(**totals).order_by()
+    ]
+    hours = [
+        HourlyStats(video_id=video_id, streamer_id=streamer_id, **row)
+        for row in comments.annotate(hour=ExtractHour('created_at')).values('hour').annotate(**totals).order_by()
+    ]
+
+    with transaction.atomic():
+        CommenterStats.objects.filter(video_id=video_id).delete()
+        HourlyStats.objects.filter(video_id=video_id).delete()
+        CommenterStats.objects.bulk_create(commenters, batch_size=1000)
+        HourlyStats.objects.bulk_create(hours, batch_size=1000)
+        bump_data_version('comments')
+    refresh_chat_timeline(video_id)
+
+
+TIMELINE_BUCKETS = (10, 60)
+TIMELINE_DTYPE = '<u4'
+
+
+def _bucket_series(buckets, codes, toxic, size):
+    """Messages, distinct chatters and toxic messages per bucket, each an array of length size."""
+    messages = np.bincount(buckets, minlength=size)
+    toxic_counts = np.bincount(buckets, weights=toxic, minlength=size)
+    # Encode each (bucket, chatter) as one integer; unique pairs = chatters present per bucket
+    stride = int(codes.max(initial=0)) + 1
+    pairs = np.unique(buckets * stride + codes)
+    chatters = np.bincount(pairs // stride, minlength=size)
+    return messages, chatters, toxic_counts
+
+
+def refresh_chat_timeline(video_id):
+    """Rebuild the ChatTimeline rows (one per TIMELINE_BUCKETS size) of one VOD."""
+    length = Video.objects.filter(pk=video_id).values_list('length_seconds', flat=True).first() or 0
+    rows = list(
+        Comment.objects.filter(video_id=video_id, content_offset_seconds__isnull=False)
+        .values_list('content_offset_seconds', 'commenter_login', 'is_toxic')
+    )
+    offsets = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)).clip(min=0)
+    toxic = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+    _, codes = np.unique(np.array([r[1] or '' for r in rows], dtype=object), return_inverse=True)
+    codes = codes.astype(np.int64).reshape(-1)
+    end = max(length, int(offsets.max(initial=0)) + 1)
+
+    timelines = []
+    for bucket_seconds in TIMELINE_BUCKETS:
+        size = -(-end // bucket_seconds)
+        series = _bucket_series(offsets // bucket_seconds, codes, toxic, size)
+        messages, chatters, toxic_counts = (a.astype(TIMELINE_DTYPE).tobytes() for a in series)
+        timelines.append(ChatTimeline(
+            video_id=video_id, bucket_seconds=bucket_seconds, bucket_count=size,
+            messages=messages, chatters=chatters, toxic=toxic_counts,
+        ))
+
+    with transaction.atomic():
+        ChatTimeline.objects.filter(video_id=video_id).delete()
+        ChatTimeline.objects.bulk_create(timelines)
+
+
+def chat_timeline(video_id, bucket_seconds):
+    """
+    The ChatTimeline of a VOD for one bucket size, building it first for VODs
+    scraped before timelines existed. None if the video does not exist.
+    """
+    timeline = ChatTimeline.objects.filter(video_id=video_id, bucket_seconds=bucket_seconds).first()
+    if timeline is None:
+        if not Video.objects.filter(pk=video_id).exists():
+            return None
+        refresh_chat_timeline(video_id)
+        timeline = ChatTimeline.objects.get(video_id=video_id, bucket_seconds=bucket_seconds)
+    return timeline
+
+
+def _ratio(toxic, total):
+    return ExpressionWrapper(
+        Cast(F(toxic), FloatField()) / Cast(F(total), FloatField()) * 100,
+        output_field=FloatField()
+    )
+
+
+def chat_stats(streamer_id=None):
+    """Commenter, toxicity, per-video and hourly chat stats read from the rollup tables."""
+    commenters = CommenterStats.objects.all()
+    hourly = HourlyStats.objects.all()
+    if streamer_id:
+        commenters = commenters.filter(streamer_id=streamer_id)
+        hourly = hourly.filter(streamer_id=streamer_id)
+
+    per_commenter = commenters.values('commenter_login', 'commenter_display_name')
+
+    top_commenters = per_commenter\
+        .annotate(count=Sum('comment_count'))\
+        .order_by('-count')[:10]
+
+    most_toxic_absolute = per_commenter.filter(toxic_count__gt=0)\
+        .annotate(toxic_count_sum=Sum('toxic_count'))\
+        .order_by('-toxic_count_sum')[:10]
+
+    # Filter by min 10 comments to be statistically significant
+    most_toxic_relative = per_commenter\
+        .annotate(total_count=Sum('comment_count'), toxic_count_sum=Sum('toxic_count'))\
+        .filter(total_count__gte=10)\
+        .annotate(ratio=_ratio('toxic_count_sum', 'total_count'))\
+        .order_by('-ratio')[:10]
+
+    # At most 24 HourlyStats rows per VOD, so per-video totals come from there
+    toxicity_by_video = hourly.values('video__id', 'video__title', 'video__streamer_display_name', 'video__created_at', 'video__length_seconds')\
+        .annotate(
+            total_count=Sum('comment_count'),
+            toxic_count_sum=Sum('toxic_count'),
+            ratio=_ratio('toxic_count_sum', 'total_count'),
+            engagement_density=ExpressionWrapper(
+                Cast(F('total_count'), FloatField()) / (Cast(Case(When(video__length_seconds__gt=0, then=F('video__length_seconds')), default=1, output_field=IntegerField()), FloatField()) / 60.0),
+                output_field=FloatField()
+            )
+        )\
+        .order_by('-ratio')[:10]
+
+    top_videos_by_volume = hourly.values('video__id', 'video__title', 'video__streamer_display_name', 'video__created_at')\
+        .annotate(total_count=Sum('comment_count'))\
+        .order_by('-total_count')[:5]
+
+    hourly_stats = hourly.values('hour')\
+        .annotate(count=Sum('comment_count'), toxic_count_sum=Sum('toxic_count'))\
+        .order_by('hour')
+
+    total_videos = hourly.values('video_id').distinct().count()
+
+    def rename(rows, key='toxic_count_sum'):
+        # Sum() cannot reuse the model field name as its alias; restore the API key
+        out = []
+        for row in rows:
+            row = dict(row)
+            if key in row:
+                row['toxic_count'] = row.pop(key)
+            out.append(row)
+        return out
+
+    return {
+        "top_commenters": list(top_commenters),
+        "most_toxic_absolute": rename(most_toxic_absolute),
+        "most_toxic_relative": rename(most_toxic_relative),
+        "toxicity_by_video": rename(toxicity_by_video),
+        "top_videos_by_volume": list(top_videos_by_volume),
+        "hourly_stats": rename(hourly_stats),
+        "total_videos": total_videos,
+    }
+
+
+def timeline_series(timeline):
+    """Decode a ChatTimeline's series into lists of ints."""
+    return {
+        name: np.frombuffer(bytes(getattr(timeline, name)), dtype=TIMELINE_DTYPE).tolist()
+        for name in ('messages', 'chatters', 'toxic')
+    }
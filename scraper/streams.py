@@ -0,0 +1,92 @@
+"""
+Server-Sent Events fed by worker state.
+
+These views are async and are served by their own ASGI process (uvicorn,
+chat-sse.service on :8001); chat-sse.nginx.conf routes
+/api/videos/scrape-stream/ there and the rest of the API stays on gunicorn.
+An open progress stream is a coroutine polling one ScrapeTask row, not a
+request worker blocked for the whole scrape, so any number of clients can
+watch. The scrape itself runs in
+run_scraper_worker, which publishes its progress to ScrapeTask.progress_detail.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponseNotAllowed, StreamingHttpResponse
+
+from scraper.models import ScrapeTask, Video
+
+POLL_INTERVAL = 1.0        # seconds between reads of the task row
+HEARTBEAT_INTERVAL = 15.0  # keep proxies from closing a quiet stream
+ACTIVE_STATUSES = ('Pending', 'InProgress')
+
+
+def enqueue_scrape(video_id) -> ScrapeTask:
+    """The queued or running ScrapeTask for video_id, creating one if there is none."""
+    with transaction.atomic():
+        task = ScrapeTask.objects.filter(video_id=video_id, status__in=ACTIVE_STATUSES).order_by('created_at').first()
+        if task is None:
+            streamer_id = Video.objects.filter(pk=video_id).values_list('streamer_id', flat=True).first()
+            task = ScrapeTask.objects.create(video_id=video_id, streamer_id=streamer_id)
+    return task
+
+
+def _event(data) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+
+async def _task_events(task_id):
+    """SSE lines for one ScrapeTask until it completes or fails."""
+    last = None
+    quiet = 0.0
+    while True:
+        task = await ScrapeTask.objects.filter(pk=task_id).values(
+            'status', 'progress_percent', 'progress_detail', 'error_message'
+        ).afirst()
+        if task is None:
+            yield _event({"error": "Scrape task was removed", "done": True})
+            return
+
+        detail = dict(task['progress_detail'] or {})
+        detail.setdefault('percent', task['progress_percent'])
+        detail['status'] = task['status']
+
+        if task['status'] not in ACTIVE_STATUSES:
+            # Completed tasks can still carry a message (e.g. VOD deleted from Twitch)
+            if task['error_message']:
+                detail['error'] = task['error_message']
+            else:
+                detail['percent'] = 100
+            detail['done'] = True
+            yield _event(detail)
+            return
+
+        if detail != last:
+            last = detail
+            quiet = 0.0
+            yield _event(detail)
+        elif quiet >= HEARTBEAT_INTERVAL:
+            quiet = 0.0
+            yield ": heartbeat\n\n"
+
+        await asyncio.sleep(POLL_INTERVAL)
+        quiet += POLL_INTERVAL
+
+
+async def scrape_stream(request, video_id):
+    """
+    SSE endpoint — GET /api/videos/scrape-stream/<video_id>/
+    Queues a ScrapeTask for the VOD (or joins the one already queued or
+    running) and streams its progress events until it finishes.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    task = await sync_to_async(enqueue_scrape)(video_id)
+    response = StreamingHttpResponse(_task_events(task.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    response['X-Scrape-Task'] = str(task.pk)
+    return response
@@ -1,3 +1,586 @@
-from django.test import TestCase
+import bisect
+import gzip
+import importlib.util
+import json
+import random
+import unittest
+from collections import Counter
+from unittest import mock
+from datetime import datetime, timedelta, timezone
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from .mentions import top_mentioned_users
+from .models import (
+    Streamer, Video, Clip, Comment, CommenterStats, TranscriptEntry, TranscriptMention, UserAlias,
+)
+from .services import ActiveChatterWindow, NameIndex, _levenshtein
+
+
+class ListQueryCountTests(TestCase):
+    """List endpoints must not issue per-row queries from serializer method fields."""
+
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        cls.streamers = [
+            Streamer.objects.create(id=str(i), login=f"streamer{i}", display_name=f"Streamer{i}")
+            for i in range(3)
+        ]
+        for i in range(12):
+            streamer = cls.streamers[i % 3]
+            video = Video.objects.create(
+                id=str(1000 + i), streamer=streamer, title=f"VOD {i}",
+                streamer_login=streamer.login, streamer_display_name=streamer.display_name,
+                length_seconds=3600, created_at=base + timedelta(days=i),
+            )
+            for j in range(i % 3):
+                Clip.objects.create(
+                    video=video, streamer=streamer, title=f"clip {i}-{j}",
+                    s3_url=f"https://clips.example/{i}/{j}.mp4" if j else None,
+                )
+            if i % 2:
+                TranscriptEntry.objects.create(
+                    video=video, streamer=streamer, start_seconds=0, end_seconds=2, text="hola",
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _assert_constant_queries(self, url, expected):
+        # COUNT(*) for the page number pagination plus the page itself
+        with self.assertNumQueries(expected):
+            response = self.client.get(url, {'page_size': 500})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_video_list(self):
+        rows = {r['id']: r for r in self._assert_constant_queries('/api/videos/', 2)}
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows['1002']['clip_count'], 2)
+        self.assertEqual(rows['1002']['first_clip_url'], "https://clips.example/2/1.mp4")
+        self.assertEqual(rows['1001']['clip_count'], 1)
+        self.assertIsNone(rows['1001']['first_clip_url'])
+        self.assertEqual(rows['1000']['clip_count'], 0)
+        self.assertTrue(rows['1001']['has_transcript'])
+        self.assertFalse(rows['1000']['has_transcript'])
+
+    def test_video_list_has_transcript_filter(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/videos/', {'has_transcript': 'true'})
+        self.assertEqual(len(response.json()['results']), 6)
+
+    def test_streamer_list(self):
+        rows = {r['login']: r for r in self._assert_constant_queries('/api/streamers/', 2)}
+        self.assertEqual(rows['streamer0']['video_count'], 4)
+        self.assertEqual(
+            rows['streamer2']['last_vod_at'],
+            Video.objects.get(id='1011').created_at.isoformat().replace('+00:00', 'Z'),
+        )
+
+    def test_serializer_fallback_matches_annotation(self):
+        from .serializers import VideoSerializer
+        video = Video.objects.get(id='1002')
+        data = VideoSerializer(video).data
+        self.assertEqual(data['clip_count'], 2)
+        self.assertEqual(data['first_clip_url'], "https://clips.example/2/1.mp4")
+        self.assertFalse(data['has_transcript'])
+
+
+class CursorPaginationTests(TestCase):
+    """?cursor= pages must list every row once, including rows with a NULL offset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        streamer = Streamer.objects.create(id='1', login='streamer1', display_name='Streamer1')
+        for v in range(2):
+            video = Video.objects.create(id=str(2000 + v), streamer=streamer, title=f"VOD {v}")
+            for c in range(7):
+                Comment.objects.create(
+                    id=f"{v}-{c}", video=video, commenter_display_name='viewer',
+                    content_offset_seconds=None if c % 3 == 0 else c // 2, message=f"hola {c}",
+                )
+
+    def _walk(self, **params):
+        client, ids, cursor = APIClient(), [], ''
+        while cursor is not None:
+            response = client.get('/api/comments/', {**params, 'cursor': cursor, 'page_size': 2})
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.json()['results']]
+            cursor = response.json()['next_cursor']
+        return ids
+
+    def test_all_rows_in_order(self):
+        ids = self._walk()
+        self.assertEqual(sorted(ids), sorted(Comment.objects.values_list('id', flat=True)))
+        offsets = [Comment.objects.get(id=i).content_offset_seconds for i in ids[:7]]
+        self.assertEqual(offsets[-3:], [None] * 3)
+
+    def test_pinned_video(self):
+        self.assertEqual(sorted(self._walk(video_id='2001')), [f"1-{c}" for c in range(7)])
+
+    def test_ranked_search_rejected(self):
+        response = APIClient().get('/api/comments/', {'search': 'hola', 'cursor': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(APIClient().get('/api/comments/', {'search': 'hola'}).status_code, 200)
+
+
+class ChatReplayTests(TestCase):
+    """/api/comments/replay/ chunk boundaries and the `next` chunk it points to."""
+
+    @classmethod
+    def setUpTestData(cls):
+        video = Video.objects.create(id='6000', title='VOD')
+        for i, offset in enumerate([0, 5, 5, 5, 10, 200]):
+            Comment.objects.create(
+                id=f"c{i}", video=video, commenter_display_name=f"viewer{i}",
+                content_offset_seconds=offset, message=f"msg {i}",
+            )
+        # Another VOD's chat and a comment without an offset are never replayed
+        Comment.objects.create(id='x0', video=Video.objects.create(id='6001'), content_offset_seconds=1)
+        Comment.objects.create(id='x1', video=video, content_offset_seconds=None)
+
+    def _get(self, **params):
+        response = APIClient().get('/api/comments/replay/', {'video_id': '6000', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_window_skips_silence(self):
+        data = self._get(**{'from': 0, 'seconds': 60})
+        self.assertEqual([c[0] for c in data['comments']], [0, 5, 5, 5, 10])
+        self.assertEqual(data['until'], 60)
+        self.assertEqual(data['next'], {'from': 200, 'after': None})
+        self.assertEqual(data['prefetch_at'], 45)
+
+        last = self._get(**{'from': 200, 'seconds': 60})
+        self.assertEqual([c[2] for c in last['comments']], ['msg 5'])
+        self.assertIsNone(last['next'])
+        self.assertIsNone(last['prefetch_at'])
+
+    def test_limit_cuts_inside_a_second(self):
+        data = self._get(**{'from': 0, 'seconds': 60, 'limit': 2})
+        self.assertEqual([c[2] for c in data['comments']], ['msg 0', 'msg 1'])
+        self.assertEqual(data['until'], 5)
+        self.assertEqual(data['next'], {'from': 5, 'after': 'c1'})
+
+    def test_following_next_replays_every_comment_once(self):
+        seen, chunk = [], {'from': 0, 'after': None}
+        while chunk:
+            params = {'from': chunk['from'], 'seconds': 60, 'limit': 2}
+            if chunk['after']:
+                params['after'] = chunk['after']
+            data = self._get(**params)
+            seen += [c[2] for c in data['comments']]
+            chunk = data['next']
+        self.assertEqual(seen, [f"msg {i}" for i in range(6)])
+
+    def test_video_id_required(self):
+        self.assertEqual(APIClient().get('/api/comments/replay/').status_code, 400)
+
+
+class GlobalSearchTests(TransactionTestCase):
+    """/api/search/: chat and transcript hits merged per VOD, ranked, paginated by VOD."""
+    # search_all queries each source on its own thread and connection, which
+    # only sees committed rows
+
+    def setUp(self):
+        from .search import refresh_transcript_windows
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        streamer = Streamer.objects.create(id='1', login='streamer1', display_name='Streamer1')
+        videos = {
+            key: Video.objects.create(id=key, streamer=streamer, title=f"VOD {key}", created_at=base + timedelta(days=day))
+            for key, day in (('8000', 0), ('8001', 1), ('8002', 2))
+        }
+        # 8000: the best chat hit; 8001: a weaker one; 8002 (newest): the only transcript hit
+        Comment.objects.create(id='a1', video=videos['8000'], content_offset_seconds=50, message='pepito pepito pepito')
+        Comment.objects.create(id='a0', video=videos['8000'], content_offset_seconds=10, message='pepito')
+        Comment.objects.create(
+            id='b0', video=videos['8001'], content_offset_seconds=5,
+            message='hoy vino pepito al stream pero nadie dijo nada interesante en todo el rato',
+        )
+        Comment.objects.create(id='n0', video=videos['8002'], content_offset_seconds=5, message='nada que ver')
+        TranscriptEntry.objects.create(
+            video=videos['8002'], streamer=streamer, start_seconds=30, end_seconds=33, text='saludos a pepito',
+        )
+        refresh_transcript_windows('8002')
+
+    def _search(self, **params):
+        response = APIClient().get('/api/search/', {'q': 'pepito', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_merged_ranking(self):
+        data = self._search()
+        self.assertEqual(data['count'], 3)
+        groups = data['results']
+        # Each source is scaled to its own best hit: ties at 1.0 go newest first
+        self.assertEqual([g['video_id'] for g in groups], ['8002', '8000', '8001'])
+        self.assertEqual([g['score'] for g in groups[:2]], [1.0, 1.0])
+        self.assertLess(groups[2]['score'], 1.0)
+        self.assertEqual([t['text'] for t in groups[0]['transcripts']], ['saludos a pepito'])
+        self.assertIsNone(groups[0]['transcripts'][0]['chat'])
+        # Hits within a VOD are in time order, the VOD score is its best hit
+        self.assertEqual([c['id'] for c in groups[1]['comments']], ['a0', 'a1'])
+        self.assertEqual(groups[1]['score'], max(c['score'] for c in groups[1]['comments']))
+
+    def test_sources(self):
+        chat = self._search(sources='chat')['results']
+        self.assertEqual([g['video_id'] for g in chat], ['8000', '8001'])
+        self.assertTrue(all(not g['transcripts'] for g in chat))
+        transcripts = self._search(sources='transcripts')['results']
+        self.assertEqual([(g['video_id'], g['comments']) for g in transcripts], [('8002', [])])
+
+    def test_paginated_by_vod(self):
+        pages = [self._search(page_size=1, page=page) for page in (1, 2, 3)]
+        self.assertEqual([p['results'][0]['video_id'] for p in pages], ['8002', '8000', '8001'])
+        self.assertIsNone(pages[2]['next'])
+        self.assertEqual(self._search(sources='chat', page_size=1)['count'], 2)
+
+    def test_bad_requests(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/search/').status_code, 400)
+        self.assertEqual(client.get('/api/search/', {'q': 'pepito', 'sources': 'chat,vods'}).status_code, 400)
+        self.assertEqual(client.get('/api/search/', {'q': 'pepito', 'cursor': ''}).status_code, 200)
+
+
+class MentionTests(TestCase):
+    """top_mentioned_users per streamer and the paginated mentions action."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.streamer = Streamer.objects.create(id='1', login='streamer1', display_name='Streamer1')
+        other = Streamer.objects.create(id='2', login='streamer2', display_name='Streamer2')
+        video = Video.objects.create(id='3000', streamer=cls.streamer, title='VOD')
+        entry = TranscriptEntry.objects.create(
+            video=video, streamer=cls.streamer, start_seconds=0, end_seconds=2, text='hola pepito',
+        )
+        # Login differs from the display name; 'otro' only chats with another streamer
+        CommenterStats.objects.create(
+            video=video, streamer=cls.streamer, commenter_login='pepito_123', commenter_display_name='PePiTo',
+        )
+        CommenterStats.objects.create(video=video, streamer=other, commenter_display_name='Otro')
+        UserAlias.objects.create(alias='juancho', canonical_name='Juan')
+        for name, count in (('pepito', 3), ('otro', 5), ('juan', 1)):
+            TranscriptMention.objects.create(
+                video=video, streamer=cls.streamer, entry=entry, name=name,
+                display_name=name.title(), start_seconds=0, count=count,
+            )
+
+    def test_top_mentioned_users(self):
+        self.assertEqual(
+            [row['username'] for row in top_mentioned_users()], ['Otro', 'Pepito', 'Juan'],
+        )
+        self.assertEqual(
+            top_mentioned_users(self.streamer.id),
+            [{'username': 'Pepito', 'count': 3}, {'username': 'Juan', 'count': 1}],
+        )
+        self.assertEqual(len(top_mentioned_users(self.streamer.id, limit=1)), 1)
+
+    def test_mentions_cursor_rejected(self):
+        client = APIClient()
+        response = client.get('/api/transcripts/mentions/', {'name': 'pepito', 'cursor': '', 'page_size': 1})
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/transcripts/mentions/', {'name': 'pepito', 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'hola pepito')
+
+
+class TranscriptUpsertTests(TestCase):
+    """Re-uploads write only new, changed and missing segments (save_transcript upsert)."""
+
+    def setUp(self):
+        from .transcript_ingest import save_transcript
+        self.save = save_transcript
+        streamer = Streamer.objects.create(id='1', login='streamer1', display_name='Streamer1')
+        self.video = Video.objects.create(id='5000', streamer=streamer, title='VOD')
+        self.save(self.video, [(0, 1000, 'hola pepto'), (1000, 2000, 'que tal'), (2000, 3000, 'chao')])
+        # A username correction made by the fix job after the first upload
+        TranscriptEntry.objects.filter(start_seconds=0).update(text='hola Pepito')
+        self.ids = dict(TranscriptEntry.objects.values_list('start_seconds', 'id'))
+
+    def test_diff(self):
+        counts, had_transcript, task = self.save(self.video, [
+            (0, 1000, 'hola pepto'),          # unchanged: correction kept
+            (1000, 2000, 'que tal chat'),     # changed: raw and text replaced
+            (3000, 4000, 'nuevo'),            # new
+        ])                                    # (2000, 3000) missing: deleted
+        self.assertTrue(had_transcript)
+        self.assertIsNotNone(task)
+        self.assertEqual(counts, {'received': 3, 'created': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1})
+        rows = {e.start_seconds: e for e in TranscriptEntry.objects.filter(video=self.video)}
+        self.assertEqual(sorted(rows), [0.0, 1.0, 3.0])
+        self.assertEqual((rows[0.0].id, rows[0.0].text, rows[0.0].raw_text), (self.ids[0.0], 'hola Pepito', 'hola pepto'))
+        self.assertEqual((rows[1.0].id, rows[1.0].text, rows[1.0].raw_text), (self.ids[1.0], 'que tal chat', 'que tal chat'))
+        self.assertNotIn(rows[3.0].id, self.ids.values())
+
+    def test_identical_upload_writes_nothing(self):
+        segments = [(0, 1000, 'hola pepto'), (1000, 2000, 'que tal'), (2000, 3000, 'chao')]
+        counts, _, task = self.save(self.video, segments)
+        self.assertIsNone(task)
+        self.assertEqual(counts['unchanged'], 3)
+        self.assertEqual(TranscriptEntry.objects.get(id=self.ids[0.0]).text, 'hola Pepito')
+
+    def test_replace(self):
+        from .transcript_ingest import REPLACE
+        counts, _, _ = self.save(self.video, [(0, 1000, 'hola pepto')], mode=REPLACE)
+        self.assertEqual((counts['created'], counts['deleted']), (1, 3))
+        self.assertEqual(TranscriptEntry.objects.get(video=self.video).text, 'hola pepto')
+
+
+def _ndjson(segments):
+    return ''.join(json.dumps(list(segment)) + '\n' for segment in segments).encode('utf-8')
+
+
+class TranscriptUploadTests(TestCase):
+    """Streamed uploads (NDJSON/msgpack, gzip/zstd) and resumable upload sessions."""
+
+    SEGMENTS = [(0, 1000, 'hola'), (1000, 2000, 'que tal'), (2000, 3000, 'chao')]
+
+    def setUp(self):
+        streamer = Streamer.objects.create(id='1', login='streamer1', display_name='Streamer1')
+        self.video = Video.objects.create(id='7000', streamer=streamer, title='VOD')
+        self.client = APIClient()
+
+    def _stored(self):
+        return list(
+            TranscriptEntry.objects.filter(video=self.video).order_by('start_seconds')
+            .values_list('start_seconds', 'end_seconds', 'text')
+        )
+
+    def _expected(self, segments):
+        return [(start / 1000, end / 1000, text) for start, end, text in segments]
+
+    def _upload(self, body, content_type, encoding=None):
+        headers = {'HTTP_CONTENT_ENCODING': encoding} if encoding else {}
+        return self.client.generic(
+            'POST', f'/api/transcripts/upload/?video_id={self.video.pk}', body,
+            content_type=content_type, **headers,
+        )
+
+    def test_ndjson_gzip(self):
+        response = self._upload(gzip.compress(_ndjson(self.SEGMENTS)), 'application/x-ndjson', 'gzip')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertEqual(self._stored(), self._expected(self.SEGMENTS))
+
+    @unittest.skipUnless(importlib.util.find_spec('msgpack') and importlib.util.find_spec('zstandard'),
+                         'msgpack/zstd uploads need msgpack and zstandard')
+    def test_msgpack_zstd(self):
+        import msgpack
+        import zstandard
+        body = zstandard.ZstdCompressor().compress(b''.join(msgpack.packb(list(s)) for s in self.SEGMENTS))
+        response = self._upload(body, 'application/msgpack', 'zstd')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self._stored(), self._expected(self.SEGMENTS))
+
+    def test_unsupported_encoding(self):
+        self.assertEqual(self._upload(_ndjson(self.SEGMENTS), 'application/x-ndjson', 'br').status_code, 415)
+
+    def test_malformed_stream_stores_nothing(self):
+        body = _ndjson(self.SEGMENTS) + b'{"broken\n'
+        # The bad line lands in a later batch, after rows were already written
+        with mock.patch('scraper.transcript_ingest.WRITE_BATCH', 2):
+            response = self._upload(body, 'application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._stored(), [])
+
+    def _session(self):
+        response = self.client.post('/api/transcript-upload-sessions/', {'video_id': self.video.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def _put(self, session_id, seq, segments):
+        return self.client.generic(
+            'PUT', f'/api/transcript-upload-sessions/{session_id}/chunks/{seq}/',
+            gzip.compress(_ndjson(segments)), content_type='application/x-ndjson', HTTP_CONTENT_ENCODING='gzip',
+        )
+
+    def _commit(self, session_id, chunks):
+        return self.client.post(f'/api/transcript-upload-sessions/{session_id}/commit/', {'chunks': chunks}, format='json')
+
+    def test_session_resume(self):
+        session_id = self._session()
+        self.assertEqual(self._put(session_id, 0, self.SEGMENTS[:2]).json(), {'seq': 0, 'entries': 2})
+
+        # Connection dropped: commit reports the missing part, GET what is there
+        response = self._commit(session_id, 2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['missing'], [1])
+        self.assertEqual(self.client.get(f'/api/transcript-upload-sessions/{session_id}/').json()['received_chunks'], [0])
+
+        self._put(session_id, 1, self.SEGMENTS[2:])
+        response = self._commit(session_id, 2)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self._stored(), self._expected(self.SEGMENTS))
+        self.assertEqual(self.client.get(f'/api/transcript-upload-sessions/{session_id}/').json()['status'], 'Committed')
+        self.assertEqual(self._commit(session_id, 2).status_code, 409)
+
+    def test_resent_chunk_replaces_it(self):
+        session_id = self._session()
+        self._put(session_id, 0, [(0, 1000, 'old text')])
+        self._put(session_id, 0, self.SEGMENTS)
+        self.assertEqual(self._commit(session_id, 1).status_code, 202)
+        self.assertEqual(self._stored(), self._expected(self.SEGMENTS))
+
+
+@unittest.skipUnless(importlib.util.find_spec('tqdm'), 'upload_transcripts_v2 needs tqdm')
+class UploadScriptSessionTests(SimpleTestCase):
+    """upload_transcripts_v2 resumes a saved session only for the same entries."""
+
+    ENTRIES = [{'Text': 'hola', 'StartMs': 0, 'EndMs': 1000}]
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        import upload_transcripts_v2
+        self.script = upload_transcripts_v2
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(upload_transcripts_v2, 'CACHE_DIR', Path(cache_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.opened = 0
+
+        def post(url, json, timeout):
+            self.opened += 1
+            return mock.Mock(status_code=201, json=lambda: {'id': f'session{self.opened}'})
+
+        def get(url, timeout):
+            return mock.Mock(status_code=200, json=lambda: {'status': 'Open', 'received_chunks': [0]})
+
+        for name, fn in (('post', post), ('get', get)):
+            patcher = mock.patch.object(upload_transcripts_v2.requests, name, side_effect=fn)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_resumes_same_entries(self):
+        self.assertEqual(self.script._open_session('1', self.ENTRIES), ('session1', set()))
+        self.assertEqual(self.script._open_session('1', self.ENTRIES), ('session1', {0}))
+
+    def test_new_session_for_different_entries(self):
+        self.script._open_session('1', self.ENTRIES)
+        changed = [{**self.ENTRIES[0], 'Text': 'hola chat'}]
+        self.assertEqual(self.script._open_session('1', changed), ('session2', set()))
+        with mock.patch.object(self.script, 'CHUNK_ENTRIES', 1):
+            self.assertEqual(self.script._open_session('1', changed), ('session3', set()))
+
+    def test_legacy_session_file_is_not_resumed(self):
+        self.script._session_path('1').parent.mkdir(parents=True, exist_ok=True)
+        self.script._session_path('1').write_text('old-session-id')
+        self.assertEqual(self.script._open_session('1', self.ENTRIES), ('session1', set()))
+
+
+@unittest.skipUnless(importlib.util.find_spec('transformers'), 'classification_service needs transformers')
+class MessagePrefilterTests(TestCase):
+    def setUp(self):
+        from .classification_service import MessagePrefilter
+        self.prefilter = MessagePrefilter()
+
+    def test_bare_commands_are_scored(self):
+        for text in ('!uptime', '!song', '!so @someone'):
+            self.assertEqual(self.prefilter.score(text), 0.0, text)
+
+    def test_message_starting_with_command_goes_to_model(self):
+        for text in ("!idiot you're trash", '!so you are an idiot', '!song this streamer sucks'):
+            self.assertIsNone(self.prefilter.score(text), text)
+
+    def test_older_prefilter_tags_are_outdated(self):
+        from .classification_service import PREFILTER_MODEL, outdated_scores_q
+        video = Video.objects.create(id='4000', title='VOD')
+        for i, tag in enumerate(('prefilter', PREFILTER_MODEL, 'some/model')):
+            Comment.objects.create(id=str(i), video=video, message='!so', toxicity_score=0.0, toxicity_model=tag)
+        outdated = Comment.objects.filter(outdated_scores_q('some/model')).values_list('toxicity_model', flat=True)
+        self.assertEqual(list(outdated), ['prefilter'])
+
+
+def _linear_scan(word, names, priority_names=None):
+    """The per-word scan NameIndex replaced: length buckets within 2, in names order."""
+    by_len = {}
+    for name_lower in names:
+        by_len.setdefault(len(name_lower), []).append(name_lower)
+    best_name, best_dist = None, float('inf')
+    for delta in range(-2, 3):
+        for name_lower in by_len.get(len(word) + delta, []):
+            dist = _levenshtein(word, name_lower)
+            threshold = 0.65 if (priority_names and name_lower in priority_names) else 0.80
+            if dist <= 2 and dist < best_dist and (1 - dist / max(len(word), len(name_lower))) >= threshold:
+                best_name, best_dist = names[name_lower], dist
+    return best_name, best_dist
+
+
+class NameIndexParityTests(SimpleTestCase):
+    """NameIndex.best_match must pick exactly what the old linear scan picked."""
+
+    def assert_parity(self, names, words, priority_names=None):
+        index = NameIndex(dict(names))
+        for word in words:
+            self.assertEqual(
+                index.best_match(word, priority_names),
+                _linear_scan(word, names, priority_names),
+                word,
+            )
+
+    def test_tie_prefers_shorter_name(self):
+        # "carlosx" is distance 1 from both; the shorter one wins
+        names = {'carlosxy': 'CarlosXY', 'carlos': 'Carlos'}
+        self.assert_parity(names, ['carlosx'])
+        self.assertEqual(NameIndex(dict(names)).best_match('carlosx')[0], 'Carlos')
+
+    def test_tie_same_length_prefers_insertion_order(self):
+        for names in ({'marianox': 'MarianoX', 'marianoy': 'MarianoY'},
+                      {'marianoy': 'MarianoY', 'marianox': 'MarianoX'}):
+            self.assert_parity(names, ['marianoz'])
+            self.assertEqual(NameIndex(dict(names)).best_match('marianoz')[0], next(iter(names.values())))
+
+    def test_priority_threshold(self):
+        names = {'pepito': 'Pepito', 'juanito': 'Juanito'}
+        self.assert_parity(names, ['pepoto', 'pepe', 'juanita'], priority_names={'pepito': 'Pepito'})
+
+    def test_randomized(self):
+        rng = random.Random(30)
+        alphabet = 'abcde'
+        names = {}
+        for _ in range(300):
+            name = ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 9)))
+            names.setdefault(name, name.upper())
+        words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 9))) for _ in range(300)]
+        priority = {n: names[n] for n in list(names)[::7]}
+        self.assert_parity(names, words)
+        self.assert_parity(names, words, priority)
+
+
+def _counter_window(offsets, names, center, radius, top_n):
+    """The per-segment window ActiveChatterWindow replaced: bisect the slice, then Counter."""
+    lo = bisect.bisect_left(offsets, center - radius)
+    hi = bisect.bisect_right(offsets, center + radius)
+    return [n for n, _ in Counter(names[lo:hi]).most_common(top_n)]
+
+
+class ActiveChatterWindowParityTests(SimpleTestCase):
+    """ActiveChatterWindow.top must pick exactly what Counter(window).most_common picked."""
+
+    def assert_parity(self, offsets, names, centers, radius=60, top_n=10):
+        window = ActiveChatterWindow(offsets, names, radius, top_n)
+        for center in centers:
+            self.assertEqual(
+                window.top(center), _counter_window(offsets, names, center, radius, top_n), center,
+            )
+
+    def test_ties_go_to_first_speaker(self):
+        offsets = [0, 1, 2, 3, 4, 5]
+        names = ['b', 'a', 'c', 'a', 'b', 'c']
+        self.assert_parity(offsets, names, [0, 1, 2, 3, 4, 5, 100], radius=2, top_n=2)
+
+    def test_empty_and_repeated_centers(self):
+        self.assert_parity([], [], [0, 10])
+        self.assert_parity([5, 5, 5], ['x', 'y', 'x'], [0, 5, 5, 5, 70, 70])
+
+    def test_randomized(self):
+        rng = random.Random(34)
+        offsets = sorted(rng.randint(0, 3000) for _ in range(2000))
+        names = [rng.choice(['Ana', 'Bob', 'Cy', None] + [f"user{i}" for i in range(40)]) for _ in offsets]
+        centers = sorted(rng.uniform(-50, 3100) for _ in range(400))
+        self.assert_parity(offsets, names, centers)
+        self.assert_parity(offsets, names, centers, radius=5, top_n=3)
@@ -0,0 +1,209 @@
+"""
+Storing uploaded transcripts.
+
+An upload is a list of segments (start ms, end ms, text). In upsert mode
+(the default) segments are matched to the stored ones by their timing, so
+re-uploading a transcript only writes the segments that changed and keeps
+the username corrections of the rest. replace mode deletes every stored
+segment and inserts the upload as is. Segments are parsed as they are
+written, WRITE_BATCH at a time, inside one transaction, so a body that turns
+out to be malformed stores nothing; the derived search/stats rows are rebuilt
+later by run_transcript_worker, not in the request.
+
+Besides a JSON body, uploads can be a stream of entries as NDJSON or msgpack,
+optionally gzip or zstd compressed (Content-Encoding). An entry is either
+[start_ms, end_ms, text] or an object with StartMs/EndMs/Text. msgpack and
+zstd need the msgpack / zstandard packages.
+"""
+import gzip
+import io
+import json
+from itertools import chain, islice
+
+from django.db import transaction
+
+from scraper.models import TranscriptEntry, TranscriptFixTask
+from scraper.response_cache import bump_data_version
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+UPSERT = 'upsert'
+REPLACE = 'replace'
+MODES = (UPSERT, REPLACE)
+
+WRITE_BATCH = 1000
+DELETE_BATCH = 500
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl')
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+STREAM_TYPES = NDJSON_TYPES + MSGPACK_TYPES
+
+
+class UnsupportedUpload(ValueError):
+    """The body uses a content type or encoding this server cannot read."""
+
+
+def parse_segment(item):
+    """
+    (start_ms, end_ms, text) from an uploaded entry: [start_ms, end_ms, text]
+    or an object with StartMs/EndMs/Text (or start_ms/end_ms/text).
+    """
+    if isinstance(item, (list, tuple)):
+        start_ms, end_ms, text = item
+        return int(round(float(start_ms))), int(round(float(end_ms))), text or ''
+    start_ms = item.get('StartMs') if item.get('StartMs') is not None else item.get('start_ms', 0)
+    end_ms = item.get('EndMs') if item.get('EndMs') is not None else item.get('end_ms', 0)
+    text = item.get('Text') if item.get('Text') is not None else item.get('text', '')
+    return int(round(float(start_ms))), int(round(float(end_ms))), text or ''
+
+
+def _decompress(stream, encoding):
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('', 'identity'):
+        return stream
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise UnsupportedUpload('zstd uploads need the zstandard package on the server')
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    raise UnsupportedUpload(f'Unsupported Content-Encoding: {encoding}')
+
+
+def iter_segments(stream, content_type, encoding=None):
+    """
+    Segments parsed one at a time from a (compressed) NDJSON or msgpack stream.
+    Raises UnsupportedUpload for formats it cannot read and ValueError for a
+    malformed body.
+    """
+    try:
+        yield from _parse_stream(stream, content_type, encoding)
+    except UnsupportedUpload:
+        raise
+    except (TypeError, AttributeError, KeyError, OSError, EOFError) as e:
+        raise ValueError(f'Cuerpo de la subida inválido: {e}') from e
+
+
+def _parse_stream(stream, content_type, encoding):
+    stream = _decompress(stream, encoding)
+    if content_type in NDJSON_TYPES:
+        for line in io.TextIOWrapper(stream, encoding='utf-8'):
+            if line.strip():
+                yield parse_segment(json.loads(line))
+    elif content_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise UnsupportedUpload('msgpack uploads need the msgpack package on the server')
+        for item in msgpack.Unpacker(stream, raw=False):
+            yield parse_segment(item)
+    else:
+        raise UnsupportedUpload(f'Unsupported Content-Type: {content_type}')
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _entry(video, start_ms, end_ms, text):
+    return TranscriptEntry(
+        video=video, streamer=video.streamer,
+        start_seconds=start_ms / 1000.0, end_seconds=end_ms / 1000.0,
+        raw_text=text, text=text,
+    )
+
+
+def _ms(seconds):
+    return int(round(seconds * 1000))
+
+
+def _replace(video, segments):
+    deleted, _ = TranscriptEntry.objects.filter(video=video).delete()
+    created = 0
+    for batch in _batches(segments, WRITE_BATCH):
+        TranscriptEntry.objects.bulk_create([_entry(video, *segment) for segment in batch])
+        created += len(batch)
+    return {'received': created, 'created': created, 'updated': 0, 'deleted': deleted, 'unchanged': 0}
+
+
+def _upsert(video, segments):
+    # Stored segments by (start ms, end ms); a list since timings can repeat
+    stored = {}
+    for entry_id, start, end, raw_text in (
+        TranscriptEntry.objects.filter(video=video)
+        .order_by('start_seconds', 'id')
+        .values_list('id', 'start_seconds', 'end_seconds', 'raw_text')
+    ):
+        stored.setdefault((_ms(start), _ms(end)), []).append((entry_id, raw_text))
+
+    counts = {'received': 0, 'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    for batch in _batches(segments, WRITE_BATCH):
+        created, updated = [], []
+        for start_ms, end_ms, text in batch:
+            matches = stored.get((start_ms, end_ms))
+            if not matches:
+                created.append(_entry(video, start_ms, end_ms, text))
+                continue
+            entry_id, raw_text = matches.pop(0)
+            if raw_text == text:
+                counts['unchanged'] += 1
+            else:
+                # New wording: drop the old correction, the fix job redoes it from raw_text
+                updated.append(TranscriptEntry(id=entry_id, raw_text=text, text=text))
+        TranscriptEntry.objects.bulk_update(updated, ['raw_text', 'text'])
+        TranscriptEntry.objects.bulk_create(created)
+        counts['received'] += len(batch)
+        counts['created'] += len(created)
+        counts['updated'] += len(updated)
+
+    stale = [entry_id for matches in stored.values() for entry_id, _ in matches]
+    for i in range(0, len(stale), DELETE_BATCH):
+        TranscriptEntry.objects.filter(id__in=stale[i:i + DELETE_BATCH]).delete()
+    counts['deleted'] = len(stale)
+    return counts
+
+
+def save_transcript(video, segments, mode=UPSERT):
+    """
+    Store segments, an iterable of (start_ms, end_ms, text), as the transcript
+    of video (which must have a streamer). The iterable is consumed in batches
+    of WRITE_BATCH, so only one batch of a streamed body is in memory at a
+    time. Only TranscriptEntry rows are written here; when anything
+    changed, a username fix job (or the pending one) is queued, and it also
+    rebuilds the derived search/stats rows in run_transcript_worker.
+    Returns (counts, had_transcript, task); task is None when the upload
+    matched the stored transcript exactly. Raises ValueError, storing nothing,
+    if there are no segments or one cannot be parsed.
+    """
+    segments = iter(segments)
+    first = list(islice(segments, WRITE_BATCH))
+    if not first:
+        raise ValueError('El transcript no tiene segmentos')
+    segments = chain(first, segments)
+
+    scope = f'video:{video.pk}'
+    with transaction.atomic():
+        had_transcript = TranscriptEntry.objects.filter(video=video).exists()
+        counts = _replace(video, segments) if mode == REPLACE else _upsert(video, segments)
+        if not (counts['created'] or counts['updated'] or counts['deleted']):
+            return counts, had_transcript, None
+
+        # Username correction and the search/stats rebuild run in
+        # run_transcript_worker; reuse a job for this VOD that has not started
+        # yet instead of queueing another one
+        task = TranscriptFixTask.objects.filter(scope=scope, status='Pending').first()
+        if task is None:
+            task = TranscriptFixTask.objects.create(scope=scope, video_ids=[video.pk], refresh_derived=True)
+        elif not task.refresh_derived:
+            task.refresh_derived = True
+            task.save(update_fields=['refresh_derived', 'updated_at'])
+        bump_data_version('transcripts')
+    return counts, had_transcript, task
@@ -0,0 +1,96 @@
+"""
+Word statistics over transcripts, read from the TranscriptTerm table.
+
+Each VOD's transcript is tokenized once, when it is uploaded or its names are
+fixed, into (term, count) rows. The stats endpoints then only sum indexed
+rows instead of re-tokenizing the latest 50k segments on every request.
+"""
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from scraper.models import TranscriptEntry, TranscriptTerm, Chatter, UserAlias
+
+WORD_RE = re.compile(r'\b\w+\b')
+MAX_TERM_LENGTH = 100   # TranscriptTerm.term max_length; longer "words" are noise
+MIN_WORD_LENGTH = 3
+COMPLEX_WORD_LENGTH = 9
+MIN_NAME_LENGTH = 4
+
+STOP_WORDS = {
+    'a', 'the', 'and', 'or', 'to', 'of', 'in', 'is', 'it', 'for', 'with', 'on', 'as', 'at', 'this', 'that', 'from', 'but', 'not', 'by', 'an', 'be', 'are', 'was', 'were', 'have', 'has', 'had', 'do', 'does', 'did', 'if', 'then', 'than', 'up', 'down', 'out', 'off', 'me', 'you', 'he', 'she', 'they', 'them', 'my', 'your', 'his', 'her', 'their', 'our', 'what', 'which', 'who', 'how', 'where', 'when', 'why',
+    'la', 'el', 'en', 'y', 'de', 'un', 'una', 'con', 'por', 'que', 'lo', 'los', 'las', 'del', 'mi', 'tu', 'su', 'nos', 'os', 'les', 'este', 'esta', 'esto', 'eso', 'para', 'porque', 'pero', 'como', 'si', 'no', 'ya', 'muy', 'mas', 'tan', 'todo', 'nada', 'otro', 'cada', 'uno', 'donde', 'cual', 'estos', 'estas', 'ser', 'estar', 'ha', 'han', 'hay',
+    'like', 'know', 'just', 'get', 'think', 'yeah', 'okay', 'right', 'well', 'really', 'now', 'time', 'good', 'see', 'can', 'don', 'actually', 'maybe', 'lot', 'little', 'bit', 'would', 'going', 'there', 'mean', 'one', 'here', 'man', 'got', 'something', 'everything', 'everyone', 'someone'
+}
+
+
+def build_transcript_terms(entries, term_model):
+    """TranscriptTerm rows (unsaved) counting every word of entries, all from one VOD."""
+    if not entries:
+        return []
+    counts = Counter()
+    for entry in entries:
+        counts.update(WORD_RE.findall((entry.text or '').lower()))
+    video_id, streamer_id = entries[0].video_id, entries[0].streamer_id
+    return [
+        term_model(video_id=video_id, streamer_id=streamer_id, term=term, length=len(term), count=count)
+        for term, count in counts.items()
+        if len(term) <= MAX_TERM_LENGTH
+    ]
+
+
+def refresh_transcript_terms(video_id):
+    """Rebuild the TranscriptTerm rows of one VOD from its current TranscriptEntry text."""
+    entries = list(TranscriptEntry.objects.filter(video_id=video_id).only('video_id', 'streamer_id', 'text'))
+    with transaction.atomic():
+        TranscriptTerm.objects.filter(video_id=video_id).delete()
+        TranscriptTerm.objects.bulk_create(build_transcript_terms(entries, TranscriptTerm), batch_size=1000)
+
+
+def _terms(streamer_id=None):
+    terms = TranscriptTerm.objects.all()
+    if streamer_id:
+        terms = terms.filter(streamer_id=streamer_id)
+    return terms
+
+
+def _top(terms, limit):
+    rows = terms.values('term').annotate(total=Sum('count')).order_by('-total', 'term')[:limit]
+    return [{"word": row['term'], "count": row['total']} for row in rows]
+
+
+def top_words(streamer_id=None, limit=10):
+    """(top_streamer_words, top_complex_words): most said words, without stop words, and the most said long words."""
+    words = _terms(streamer_id).filter(length__gte=MIN_WORD_LENGTH).exclude(term__in=STOP_WORDS)
+    return _top(words, limit), _top(words.filter(length__gte=COMPLEX_WORD_LENGTH), limit)
+
+
+def name_word_counts(streamer_id=None, extra_names=(), min_count=1):
+    """
+    How often each known chatter name, alias canonical name or extra name is
+    said as a word, most said first: [{'word': name, 'count': n}, ...].
+    """
+    names = {}
+    for name in list(UserAlias.objects.values_list('canonical_name', flat=True)) + list(extra_names):
+        if name:
+            names.setdefault(name.lower(), set()).add(name)
+
+    counts = (
+        _terms(streamer_id)
+        .filter(Q(term__in=Chatter.objects.values('name_lower')) | Q(term__in=list(names)))
+        .values('term').annotate(total=Sum('count'))
+        .filter(total__gte=min_count)
+    )
+    counts = {row['term']: row['total'] for row in counts}
+    for lower, display_name in Chatter.objects.filter(name_lower__in=list(counts)).values_list('name_lower', 'display_name'):
+        names.setdefault(lower, set()).add(display_name)
+
+    results = [
+        {'word': name, 'count': count}
+        for term, count in counts.items()
+        for name in sorted(names.get(term, ()))
+    ]
+    results.sort(key=lambda x: x['count'], reverse=True)
+    return results
@@ -3,8 +3,10 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     VideoViewSet, CommentViewSet, StreamerViewSet,
     ScrapeTaskViewSet, ClassificationTaskViewSet, ClipViewSet,
-    TranscriptEntryViewSet, UserAliasViewSet, ExcludedShoutoutViewSet,
+    TranscriptEntryViewSet, UserAliasViewSet, ExcludedShoutoutViewSet, TranscriptFixTaskViewSet,
+    TranscriptUploadSessionViewSet, SearchViewSet,
 )
+from .streams import scrape_stream
 
 router = DefaultRouter()
 router.register(r'videos', VideoViewSet)
@@ -14,9 +16,14 @@ router.register(r'scrape-tasks', ScrapeTaskViewSet, basename='scrapetask')
 router.register(r'classification-tasks', ClassificationTaskViewSet, basename='classificationtask')
 router.register(r'clips', ClipViewSet)
 router.register(r'transcripts', TranscriptEntryViewSet)
+router.register(r'transcript-fix-tasks', TranscriptFixTaskViewSet, basename='transcriptfixtask')
+router.register(r'transcript-upload-sessions', TranscriptUploadSessionViewSet, basename='transcriptuploadsession')
+router.register(r'search', SearchViewSet, basename='search')
 router.register(r'aliases', UserAliasViewSet)
 router.register(r'excluded-shoutouts', ExcludedShoutoutViewSet)
 
 urlpatterns = [
+    # Async SSE view, matched before the router's videos/<pk>/<action>/ routes
+    path('videos/scrape-stream/<str:video_id>/', scrape_stream, name='scrape-stream'),
     path('', include(router.urls)),
 ]
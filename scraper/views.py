@@ -1,28 +1,45 @@
-import json
 import os
-from django.http import StreamingHttpResponse
+from django.conf import settings
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer, BaseRenderer
-from .models import Video, Comment, Streamer, ScrapeTask, ClassificationTask, Clip, TranscriptEntry, UserAlias, ExcludedShoutout
+from .models import (
+    Video, Comment, Streamer, ScrapeTask, ClassificationTask, Clip, TranscriptEntry, UserAlias,
+    ExcludedShoutout, TranscriptFixTask, TranscriptWindow, TranscriptUploadSession, TranscriptUploadChunk,
+)
 from .serializers import (
     VideoSerializer, CommentSerializer, StreamerSerializer,
     ScrapeTaskSerializer, ClassificationTaskSerializer, ClipSerializer,
-    TranscriptEntrySerializer, UserAliasSerializer, ExcludedShoutoutSerializer
+    TranscriptEntrySerializer, UserAliasSerializer, ExcludedShoutoutSerializer, TranscriptFixTaskSerializer,
+    TranscriptUploadSessionSerializer,
+)
+from .services import TwitchScraperService, fix_transcript_usernames
+from .inference_server import InferenceClient
+from .transcript_stats import top_words, name_word_counts
+from .mentions import top_mentioned_users, mentions_of
+from .stats_service import chat_stats, chat_timeline, timeline_series, TIMELINE_BUCKETS
+from .response_cache import cached_response, bump_data_version
+from core.pagination import FlexiblePagination
+from .export import export_response, FORMATS as EXPORT_FORMATS, NDJSON
+from .transcript_ingest import (
+    save_transcript, parse_segment, iter_segments, UnsupportedUpload, UPSERT, MODES as UPLOAD_MODES, STREAM_TYPES,
 )
-from .services import TwitchScraperService, fix_transcript_usernames, build_global_names_dict, build_aliases_dict
+from .search import search_comments, search_transcripts, PHRASE, ALL_WORDS, NEAR
+from .global_search import search_all, attach_chat_activity, SOURCES as SEARCH_SOURCES
 from datetime import datetime, timezone, timedelta
-from django.db.models import Count, Q, F, FloatField, ExpressionWrapper, Case, When, IntegerField, Exists, OuterRef
-from django.db.models.functions import Cast
+from django.db.models import Q, Case, When, IntegerField, Exists, OuterRef, Subquery, Count
+from django.db.models.functions import Coalesce
 
 
-class SSERenderer(BaseRenderer):
-    media_type = 'text/event-stream'
-    format = 'txt'
+# /comments/score/ limits, so one request cannot monopolise the shared inference server
+SCORE_MAX_TEXTS = 500
+SCORE_MAX_CHARS = 2000
 
-    def render(self, data, accepted_media_type=None, renderer_context=None):
-        return data
+# DataVersion keys each cached stats response depends on
+CHAT_DATA = ('comments',)
+ALL_DATA = ('comments', 'transcripts', 'names')
 
 
 class VideoViewSet(viewsets.ModelViewSet):
@@ -31,16 +48,57 @@ class VideoViewSet(viewsets.ModelViewSet):
     filterset_fields = ['streamer', 'streamer_login']
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        clips = Clip.objects.filter(video=OuterRef('pk'))
+        qs = super().get_queryset().annotate(
+            clip_count=Coalesce(Subquery(
+                clips.order_by().values('video').annotate(c=Count('pk')).values('c')
+            ), 0),
+            first_clip_url=Subquery(
+                clips.exclude(s3_url=None).exclude(s3_url='').order_by('pk').values('s3_url')[:1]
+            ),
+            has_transcript=Exists(TranscriptEntry.objects.filter(video=OuterRef('pk'))),
+        )
         has_transcript = self.request.query_params.get('has_transcript')
         if has_transcript is not None:
-            tx_exists = Exists(TranscriptEntry.objects.filter(video=OuterRef('pk')))
             if has_transcript.lower() in ('true', '1'):
-                qs = qs.filter(tx_exists)
+                qs = qs.filter(has_transcript=True)
             elif has_transcript.lower() in ('false', '0'):
-                qs = qs.filter(~tx_exists)
+                qs = qs.filter(has_transcript=False)
         return qs
 
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """
+        GET /api/videos/<id>/timeline/?bucket=60
+        Chat activity per bucket (10 or 60 seconds): message count, distinct
+        chatters and toxic messages. Responses carry an ETag that changes only
+        when the timeline is rebuilt, so clients and proxies can revalidate cheaply.
+        """
+        try:
+            bucket = int(request.query_params.get('bucket', 60))
+        except ValueError:
+            bucket = None
+        if bucket not in TIMELINE_BUCKETS:
+            return Response({"error": f"bucket must be one of {', '.join(map(str, TIMELINE_BUCKETS))}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        timeline = chat_timeline(pk, bucket)
+        if timeline is None:
+            return Response({"error": "Video not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = f'"{pk}-{bucket}-{int(timeline.updated_at.timestamp() * 1000)}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                "video_id": pk,
+                "bucket_seconds": bucket,
+                "bucket_count": timeline.bucket_count,
+                **timeline_series(timeline),
+            })
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+
     @action(detail=False, methods=['get'], url_path='pending_transcripts')
     def pending_transcripts(self, request):
         """
@@ -84,87 +142,34 @@ class VideoViewSet(viewsets.ModelViewSet):
         finally:
             service.cleanup()
 
-    @action(detail=False, methods=['get'], url_path='scrape-stream/(?P<video_id>[^/.]+)', renderer_classes=[SSERenderer])
-    def scrape_stream(self, request, video_id=None):
-        """
-        SSE endpoint — GET /api/videos/scrape-stream/<video_id>/
-        Streams Server-Sent Events with scraping progress.
-        """
-        oauth = request.query_params.get('oauth') or os.getenv("TWITCH_OAUTH_TOKEN")
-
-        def event_stream():
-            service = TwitchScraperService(oauth_token=oauth)
-
-            def on_progress(data: dict):
-                payload = json.dumps(data)
-                yield f"data: {payload}\n\n"
-
-            try:
-                # We need to collect yields from on_progress and stream them.
-                # Since generators can't yield from callbacks directly, we use a queue.
-                import queue, threading
-
-                q: queue.Queue = queue.Queue()
-                error_holder = []
-
-                def progress_cb(data):
-                    q.put(data)
-
-                def run_scrape():
-                    try:
-                        service.scrape_video(video_id, on_progress=progress_cb)
-                    except Exception as e:
-                        error_holder.append(str(e))
-                        q.put({"error": str(e), "done": True})
-                    finally:
-                        service.cleanup()
-
-                t = threading.Thread(target=run_scrape, daemon=True)
-                t.start()
-
-                while True:
-                    try:
-                        data = q.get(timeout=60)
-                        yield f"data: {json.dumps(data)}\n\n"
-                        if data.get("done") or data.get("error"):
-                            break
-                    except queue.Empty:
-                        # Heartbeat to keep connection alive
-                        yield ": heartbeat\n\n"
-
-                t.join(timeout=5)
-
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
-
-        response = StreamingHttpResponse(
-            event_stream(),
-            content_type='text/event-stream'
-        )
-        response['Cache-Control'] = 'no-cache'
-        response['X-Accel-Buffering'] = 'no'
-        return response
-
 
 class CommentViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CommentSerializer
     filterset_fields = ['video_id', 'video__streamer', 'is_toxic']
-    search_fields = ['message', 'commenter_display_name']
     ordering_fields = ['content_offset_seconds', 'created_at']
+    # ?cursor= pages seek on comment_video_offset_idx (see FlexiblePagination)
+    cursor_ordering = ('video_id', 'content_offset_seconds', 'id')
+    # search / search_or go through the full-text index in get_queryset
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
 
     def get_queryset(self):
         qs = Comment.objects.select_related('video').order_by('-video__created_at', 'content_offset_seconds')
+
+        # search: every word must match; search_or: comma-separated alternatives
+        search = self.request.query_params.get('search')
         search_or = self.request.query_params.get('search_or')
-        if search_or:
-            from django.db.models import Q
-            # Split keywords by comma
-            keywords = [k.strip() for k in search_or.split(',') if k.strip()]
-            if keywords:
-                q_objs = Q()
-                for kw in keywords:
-                    q_objs |= Q(message__icontains=kw) | Q(commenter_display_name__icontains=kw)
-                qs = qs.filter(q_objs)
-                
+        if search or search_or:
+            queries = [search] if search else [k.strip() for k in search_or.split(',') if k.strip()]
+            if queries:
+                ranked = search_comments(qs, queries)
+                if ranked is not None:
+                    qs = ranked
+                else:
+                    q_objs = Q()
+                    for kw in queries:
+                        q_objs |= Q(message__icontains=kw) | Q(commenter_display_name__icontains=kw)
+                    qs = qs.filter(q_objs)
+
         exclude_users = self.request.query_params.get('exclude_users')
         if exclude_users:
             users = [u.strip().lower() for u in exclude_users.split(',') if u.strip()]
@@ -208,294 +213,199 @@ class CommentViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(comments, many=True)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'])
-    def stats_chat(self, request):
-        """Fast stats: DB aggregations only (commenters, toxicity, videos, hourly)."""
-        streamer_id = request.query_params.get('streamer_id')
-
-        qs = Comment.objects.all()
-        if streamer_id:
-            qs = qs.filter(video__streamer_id=streamer_id)
-
-        top_commenters = qs.values('commenter_login', 'commenter_display_name')\
-            .annotate(count=Count('id'))\
-            .order_by('-count')[:10]
-
-        most_toxic_absolute = qs.filter(is_toxic=True)\
-            .values('commenter_login', 'commenter_display_name')\
-            .annotate(toxic_count=Count('id'))\
-            .order_by('-toxic_count')[:10]
-
-        most_toxic_relative = qs.values('commenter_login', 'commenter_display_name')\
-            .annotate(
-                total_count=Count('id'),
-                toxic_count=Count('id', filter=Q(is_toxic=True))
-            )\
-            .filter(total_count__gte=10)\
-            .annotate(
-                ratio=ExpressionWrapper(
-                    Cast(F('toxic_count'), FloatField()) / Cast(F('total_count'), FloatField()) * 100,
-                    output_field=FloatField()
-                )
-            )\
-            .order_by('-ratio')[:10]
-
-        toxicity_by_video = qs.values('video__id', 'video__title', 'video__streamer_display_name', 'video__created_at', 'video__length_seconds')\
-            .annotate(
-                total_count=Count('id'),
-                toxic_count=Count('id', filter=Q(is_toxic=True)),
-                ratio=ExpressionWrapper(
-                    Cast(F('toxic_count'), FloatField()) / Cast(F('total_count'), FloatField()) * 100,
-                    output_field=FloatField()
-                ),
-                engagement_density=ExpressionWrapper(
-                    Cast(F('total_count'), FloatField()) / (Cast(Case(When(video__length_seconds__gt=0, then=F('video__length_seconds')), default=1, output_field=IntegerField()), FloatField()) / 60.0),
-                    output_field=FloatField()
-                )
-            )\
-            .order_by('-ratio')[:10]
-
-        top_videos_by_volume = qs.values('video__id', 'video__title', 'video__streamer_display_name', 'video__created_at')\
-            .annotate(total_count=Count('id'))\
-            .order_by('-total_count')[:5]
-
-        from django.db.models.functions import ExtractHour
-        hourly_stats = qs.annotate(hour=ExtractHour('created_at'))\
-            .values('hour')\
-            .annotate(
-                count=Count('id'),
-                toxic_count=Count('id', filter=Q(is_toxic=True))
-            )\
-            .order_by('hour')
-
-        total_videos = qs.values('video__id').distinct().count()
-
-        return Response({
-            "top_commenters": list(top_commenters),
-            "most_toxic_absolute": list(most_toxic_absolute),
-            "most_toxic_relative": list(most_toxic_relative),
-            "toxicity_by_video": list(toxicity_by_video),
-            "top_videos_by_volume": list(top_videos_by_volume),
-            "hourly_stats": list(hourly_stats),
-            "total_videos": total_videos,
-        })
+    REPLAY_FIELDS = ['offset', 'name', 'message', 'toxicity']
+    REPLAY_SECONDS = 60
+    REPLAY_MAX_SECONDS = 300
+    REPLAY_LIMIT = 1000
+    REPLAY_PREFETCH_LEAD = 15  # request the next chunk this many seconds before the current one runs out
 
     @action(detail=False, methods=['get'])
-    def stats_transcript(self, request):
-        """Slow stats: transcript word analysis and community shoutouts."""
-        streamer_id = request.query_params.get('streamer_id')
-
-        qs = Comment.objects.all()
-        if streamer_id:
-            qs = qs.filter(video__streamer_id=streamer_id)
-
-        transcript_qs = TranscriptEntry.objects.all()
-        if streamer_id:
-            transcript_qs = transcript_qs.filter(streamer_id=streamer_id)
-
-        transcripts = transcript_qs.only('text').order_by('-id')[:50000]
+    def replay(self, request):
+        """
+        GET /api/comments/replay/?video_id=123&from=600&seconds=60
+        Chat replay in time order: comments with from <= offset < from + seconds
+        (at most `limit`), as rows of [offset, name, message, toxicity].
+        `next` says where the following chunk starts ({"from", "after"}; pass both
+        back, `after` is set when a busy second was cut off at the limit) and is
+        null at the end of chat; silent stretches are skipped. Fetch it once
+        playback reaches `prefetch_at`.
+        """
+        video_id = request.query_params.get('video_id')
+        if not video_id:
+            return Response({"error": "video_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = max(0, int(float(request.query_params.get('from', 0))))
+            seconds = min(max(1, int(request.query_params.get('seconds', self.REPLAY_SECONDS))), self.REPLAY_MAX_SECONDS)
+            limit = min(max(1, int(request.query_params.get('limit', self.REPLAY_LIMIT))), 5000)
+        except ValueError:
+            return Response({"error": "from, seconds and limit must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        after = request.query_params.get('after')
 
-        import re
-        from collections import Counter
+        # Seeks on comment_video_offset_idx (video, content_offset_seconds, id)
+        qs = Comment.objects.filter(video_id=video_id)
+        if after:
+            qs = FlexiblePagination.seek(qs, ('video_id', 'content_offset_seconds', 'id'), [video_id, start, after])
+        else:
+            qs = qs.filter(content_offset_seconds__gte=start)
+        until = start + seconds
+        rows = list(
+            qs.filter(content_offset_seconds__lt=until)
+            .order_by('content_offset_seconds', 'id')
+            .values_list('id', 'content_offset_seconds', 'commenter_display_name', 'message', 'toxicity_score')[:limit + 1]
+        )
 
-        all_words = []
-        STOP_WORDS = {
-            'a', 'the', 'and', 'or', 'to', 'of', 'in', 'is', 'it', 'for', 'with', 'on', 'as', 'at', 'this', 'that', 'from', 'but', 'not', 'by', 'an', 'be', 'are', 'was', 'were', 'have', 'has', 'had', 'do', 'does', 'did', 'if', 'then', 'than', 'up', 'down', 'out', 'off', 'me', 'you', 'he', 'she', 'they', 'them', 'my', 'your', 'his', 'her', 'their', 'our', 'what', 'which', 'who', 'how', 'where', 'when', 'why',
-            'la', 'el', 'en', 'y', 'de', 'un', 'una', 'con', 'por', 'que', 'lo', 'los', 'las', 'del', 'mi', 'tu', 'su', 'nos', 'os', 'les', 'este', 'esta', 'esto', 'eso', 'para', 'porque', 'pero', 'como', 'si', 'no', 'ya', 'muy', 'mas', 'tan', 'muy', 'todo', 'nada', 'otro', 'cada', 'una', 'uno', 'donde', 'cual', 'esta', 'estos', 'estas', 'ser', 'estar', 'ha', 'has', 'he', 'han', 'hay',
-            'like', 'know', 'just', 'get', 'think', 'yeah', 'okay', 'right', 'well', 'really', 'now', 'time', 'good', 'see', 'can', 'don', 'actually', 'maybe', 'lot', 'little', 'bit', 'would', 'going', 'there', 'mean', 'one', 'here', 'man', 'got', 'something', 'everything', 'everyone', 'someone'
-        }
+        if len(rows) > limit:
+            rows = rows[:limit]
+            until = rows[-1][1]
+            next_chunk = {"from": until, "after": rows[-1][0]}
+        else:
+            next_offset = (
+                Comment.objects.filter(video_id=video_id, content_offset_seconds__gte=until)
+                .order_by('content_offset_seconds').values_list('content_offset_seconds', flat=True).first()
+            )
+            next_chunk = {"from": next_offset, "after": None} if next_offset is not None else None
+
+        response = Response({
+            "video_id": video_id,
+            "from": start,
+            "until": until,
+            "fields": self.REPLAY_FIELDS,
+            "comments": [
+                [offset, name, message, round(score, 3) if score is not None else None]
+                for _, offset, name, message, score in rows
+            ],
+            "next": next_chunk,
+            "prefetch_at": max(start, until - self.REPLAY_PREFETCH_LEAD) if next_chunk else None,
+        })
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
 
-        for t in transcripts:
-            if t.text:
-                t_words = re.findall(r'\b\w+\b', t.text.lower())
-                for w in t_words:
-                    if len(w) > 2 and w not in STOP_WORDS:
-                        all_words.append(w)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        GET /api/comments/export/?video_id=123&output=ndjson
+        GET /api/comments/export/?streamer_id=456&since=2024-01-01&until=2024-02-01&output=csv
+        Streams every matching comment in one response (output: ndjson or csv).
+        since / until are dates or datetimes (UTC unless an offset is given)
+        compared against the message time.
+        """
+        from django.utils import timezone as dj_timezone
+        from django.utils.dateparse import parse_date, parse_datetime
 
-        top_streamer_words = Counter(all_words).most_common(12)
-        top_streamer_words = [{"word": w, "count": c} for w, c in top_streamer_words][:10]
+        output = request.query_params.get('output', NDJSON).lower()
+        if output not in EXPORT_FORMATS:
+            return Response({"error": f"output must be one of {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
 
-        complex_words = [w for w in all_words if len(w) > 8]
-        top_complex_words = Counter(complex_words).most_common(10)
-        top_complex_words = [{"word": w, "count": c} for w, c in top_complex_words]
+        video_id = request.query_params.get('video_id')
+        streamer_id = request.query_params.get('streamer_id')
+        if video_id:
+            qs = Comment.objects.filter(video_id=video_id).order_by('content_offset_seconds', 'id')
+            filename = f"chat_{video_id}"
+        elif streamer_id:
+            qs = Comment.objects.filter(video__streamer_id=streamer_id).order_by('video_id', 'content_offset_seconds', 'id')
+            filename = f"chat_streamer_{streamer_id}"
+        else:
+            return Response({"error": "video_id or streamer_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        commenter_names = set(
-            name for name in
-            qs.values_list('commenter_display_name', flat=True).distinct()
-            if name and len(name) > 3
-        )
-        alias_canonical_names = set(
-            a.canonical_name for a in UserAlias.objects.all()
-            if a.canonical_name and len(a.canonical_name) > 3
-        )
-        all_names_to_check = commenter_names | alias_canonical_names
+        for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                moment = parse_datetime(value)
+                if moment is None:
+                    day = parse_date(value)
+                    moment = datetime.combine(day, datetime.min.time()) if day else None
+            except ValueError:
+                moment = None
+            if moment is None:
+                return Response({"error": f"{param} must be an ISO date or datetime"}, status=status.HTTP_400_BAD_REQUEST)
+            if dj_timezone.is_naive(moment):
+                moment = dj_timezone.make_aware(moment, timezone.utc)
+            qs = qs.filter(**{lookup: moment})
 
-        excluded_lower = {e.lower() for e in ExcludedShoutout.objects.values_list('name', flat=True)}
-        all_names_to_check = {n for n in all_names_to_check if n.lower() not in excluded_lower}
+        return export_response(qs, output, filename)
 
-        # Build word Counter from transcript for O(1) lookups (no regex per name)
-        full_transcript_text = " ".join([t.text for t in transcripts if t.text]).lower()
-        word_counts = Counter(re.findall(r'\b\w+\b', full_transcript_text))
+    @action(detail=False, methods=['post'])
+    def score(self, request):
+        """
+        POST /api/comments/score/  { "texts": ["...", ...] }
+        Scores arbitrary texts through the shared inference server; at most
+        SCORE_MAX_TEXTS texts of SCORE_MAX_CHARS characters each.
+        Response: { "model": "...", "results": [{"score": 0.12, "logits": {...}}, ...] }
+        where model is the one the server scored this request with.
+        """
+        texts = request.data.get('texts')
+        if not isinstance(texts, list):
+            return Response({"error": "texts must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(texts) > SCORE_MAX_TEXTS:
+            return Response({"error": f"At most {SCORE_MAX_TEXTS} texts per request"}, status=status.HTTP_400_BAD_REQUEST)
+        texts = [str(t) if t else "" for t in texts]
+        if any(len(t) > SCORE_MAX_CHARS for t in texts):
+            return Response({"error": f"Each text must be at most {SCORE_MAX_CHARS} characters"}, status=status.HTTP_400_BAD_REQUEST)
+        if not settings.INFERENCE_SERVER_URL:
+            return Response({"error": "INFERENCE_SERVER_URL is not configured"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        client = InferenceClient(settings.INFERENCE_SERVER_URL)
+        try:
+            results = client.score(texts)
+        except Exception as e:
+            return Response({"error": f"Inference server unavailable: {e}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"model": client.model_name(), "results": results})
 
-        mention_counts = Counter()
-        for name in all_names_to_check:
-            count = word_counts.get(name.lower(), 0)
-            if count > 0:
-                mention_counts[name] = count
+    @action(detail=False, methods=['get'])
+    def stats_chat(self, request):
+        """Fast stats: read from the CommenterStats / HourlyStats rollups (commenters, toxicity, videos, hourly)."""
+        streamer_id = request.query_params.get('streamer_id')
+        return Response(cached_response(
+            'stats_chat', request, CHAT_DATA, lambda: chat_stats(streamer_id)
+        ))
 
-        top_mentioned_users = [{"username": name, "count": count} for name, count in mention_counts.most_common(10)]
+    @action(detail=False, methods=['get'])
+    def stats_transcript(self, request):
+        """Slow stats: transcript word analysis and community shoutouts."""
+        return Response(cached_response(
+            'stats_transcript', request, ALL_DATA, lambda: self._stats_transcript_data(request)
+        ))
 
-        return Response({
+    def _stats_transcript_data(self, request):
+        streamer_id = request.query_params.get('streamer_id')
+        top_streamer_words, top_complex_words = top_words(streamer_id)
+        return {
             "top_streamer_words": top_streamer_words,
             "top_complex_words": top_complex_words,
-            "top_mentioned_users": top_mentioned_users,
-        })
+            "top_mentioned_users": top_mentioned_users(streamer_id),
+        }
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        streamer_id = request.query_params.get('streamer_id')
-        
-        qs = Comment.objects.all()
-        if streamer_id:
-            qs = qs.filter(video__streamer_id=streamer_id)
-            
-        # 1. Top commenters
-        top_commenters = qs.values('commenter_login', 'commenter_display_name')\
-            .annotate(count=Count('id'))\
-            .order_by('-count')[:10]
-            
-        # 2. Most toxic users (absolute)
-        most_toxic_absolute = qs.filter(is_toxic=True)\
-            .values('commenter_login', 'commenter_display_name')\
-            .annotate(toxic_count=Count('id'))\
-            .order_by('-toxic_count')[:10]
-            
-        # 3. Most toxic users (relative - percentage)
-        # Filter by min 10 comments to be statistically significant
-        most_toxic_relative = qs.values('commenter_login', 'commenter_display_name')\
-            .annotate(
-                total_count=Count('id'),
-                toxic_count=Count('id', filter=Q(is_toxic=True))
-            )\
-            .filter(total_count__gte=10)\
-            .annotate(
-                ratio=ExpressionWrapper(
-                    Cast(F('toxic_count'), FloatField()) / Cast(F('total_count'), FloatField()) * 100,
-                    output_field=FloatField()
-                )
-            )\
-            .order_by('-ratio')[:10]
-
-        # 4. Toxicity by Video & Engagement
-        toxicity_by_video = qs.values('video__id', 'video__title', 'video__streamer_display_name', 'video__created_at', 'video__length_seconds')\
-            .annotate(
-                total_count=Count('id'),
-                toxic_count=Count('id', filter=Q(is_toxic=True)),
-                ratio=ExpressionWrapper(
-                    Cast(F('toxic_count'), FloatField()) / Cast(F('total_count'), FloatField()) * 100,
-                    output_field=FloatField()
-                ),
-                engagement_density=ExpressionWrapper(
-                    Cast(F('total_count'), FloatField()) / (Cast(Case(When(video__length_seconds__gt=0, then=F('video__length_seconds')), default=1, output_field=IntegerField()), FloatField()) / 60.0),
-                    output_field=FloatField()
-                )
-            )\
-            .order_by('-ratio')[:10]
-
-        # 5. Top 5 Videos by total comments
-        top_videos_by_volume = qs.values('video__id', 'video__title', 'video__streamer_display_name', 'video__created_at')\
-            .annotate(total_count=Count('id'))\
-            .order_by('-total_count')[:5]
-
-        # 6. Hourly Activity (Activity vs Toxicity by hour of day)
-        # We group by hour of the day to see when things get heated
-        from django.db.models.functions import ExtractHour
-        hourly_stats = qs.annotate(hour=ExtractHour('created_at'))\
-            .values('hour')\
-            .annotate(
-                count=Count('id'),
-                toxic_count=Count('id', filter=Q(is_toxic=True))
-            )\
-            .order_by('hour')
-
-        total_videos = qs.values('video__id').distinct().count()
-
-        # 7. Streamer top words (from transcripts)
-        transcript_qs = TranscriptEntry.objects.all()
-        if streamer_id:
-            transcript_qs = transcript_qs.filter(streamer_id=streamer_id)
-        
-        # Higher limit to cover more historical data (approx 100-150 hours)
-        transcripts = transcript_qs.only('text').order_by('-id')[:50000]
-        
-        import re
-        from collections import Counter
-        
-        all_words = []
-        # Stop words (simplified set)
-        STOP_WORDS = {
-            'a', 'the', 'and', 'or', 'to', 'of', 'in', 'is', 'it', 'for', 'with', 'on', 'as', 'at', 'this', 'that', 'from', 'but', 'not', 'by', 'an', 'be', 'are', 'was', 'were', 'have', 'has', 'had', 'do', 'does', 'did', 'if', 'then', 'than', 'up', 'down', 'out', 'off', 'me', 'you', 'he', 'she', 'they', 'them', 'my', 'your', 'his', 'her', 'their', 'our', 'what', 'which', 'who', 'how', 'where', 'when', 'why',
-            'la', 'el', 'en', 'y', 'de', 'un', 'una', 'con', 'por', 'que', 'lo', 'los', 'las', 'del', 'mi', 'tu', 'su', 'nos', 'os', 'les', 'este', 'esta', 'esto', 'eso', 'para', 'porque', 'pero', 'como', 'si', 'no', 'ya', 'muy', 'mas', 'tan', 'muy', 'todo', 'nada', 'otro', 'cada', 'una', 'uno', 'donde', 'cual', 'esta', 'estos', 'estas', 'ser', 'estar', 'ha', 'has', 'he', 'han', 'hay',
-            'like', 'know', 'just', 'get', 'think', 'yeah', 'okay', 'right', 'well', 'really', 'now', 'time', 'good', 'see', 'can', 'don', 'actually', 'maybe', 'lot', 'little', 'bit', 'would', 'going', 'there', 'mean', 'one', 'here', 'man', 'got', 'something', 'everything', 'everyone', 'someone'
-        }
-        
-        for t in transcripts:
-            if t.text:
-                t_words = re.findall(r'\b\w+\b', t.text.lower())
-                for w in t_words:
-                    if len(w) > 2 and w not in STOP_WORDS:
-                        all_words.append(w)
-        
-        top_streamer_words = Counter(all_words).most_common(12) # Fetch a few more for filter buffer
-        top_streamer_words = [{"word": w, "count": c} for w, c in top_streamer_words][:10]
-
-        # 8. Complex words (length > 8)
-        complex_words = [w for w in all_words if len(w) > 8]
-        top_complex_words = Counter(complex_words).most_common(10)
-        top_complex_words = [{"word": w, "count": c} for w, c in top_complex_words]
-
-        # 9. Top Mentioned Users (Who does the streamer talk about?)
-        from .models import UserAlias
-        commenter_names = set(
-            name for name in
-            qs.values_list('commenter_display_name', flat=True).distinct()
-            if name and len(name) > 3
-        )
-        alias_canonical_names = set(
-            a.canonical_name for a in UserAlias.objects.all()
-            if a.canonical_name and len(a.canonical_name) > 3
-        )
-        all_names_to_check = commenter_names | alias_canonical_names
-
-        mention_counts = Counter()
-        full_transcript_text = " ".join([t.text for t in transcripts if t.text]).lower()
-        word_counts = Counter(re.findall(r'\b\w+\b', full_transcript_text))
+        return Response(cached_response('stats', request, ALL_DATA, lambda: self._stats_data(request)))
 
-        for name in all_names_to_check:
-            count = word_counts.get(name.lower(), 0)
-            if count > 0:
-                mention_counts[name] = count
-        
-        top_mentioned_users = [{"username": name, "count": count} for name, count in mention_counts.most_common(10)]
+    def _stats_data(self, request):
+        streamer_id = request.query_params.get('streamer_id')
 
-        return Response({
-            "top_commenters": list(top_commenters),
-            "most_toxic_absolute": list(most_toxic_absolute),
-            "most_toxic_relative": list(most_toxic_relative),
-            "top_streamer_words": top_streamer_words,
-            "top_complex_words": top_complex_words,
-            "toxicity_by_video": list(toxicity_by_video),
-            "top_videos_by_volume": list(top_videos_by_volume),
-            "hourly_stats": list(hourly_stats),
-            "total_videos": total_videos,
-            "top_mentioned_users": top_mentioned_users,
-        })
+        # 1-6. Commenters, toxicity, videos and hourly activity (rollup tables)
+        chat = chat_stats(streamer_id)
 
+        # 7-9. Streamer top words, complex words and mentioned users (TranscriptTerm)
+        return {
+            **chat,
+            **self._stats_transcript_data(request),
+        }
 
 class StreamerViewSet(viewsets.ModelViewSet):
     queryset = Streamer.objects.all()
     serializer_class = StreamerSerializer
 
+    def get_queryset(self):
+        videos = Video.objects.filter(streamer=OuterRef('pk'))
+        return super().get_queryset().annotate(
+            video_count=Coalesce(Subquery(
+                videos.order_by().values('streamer').annotate(c=Count('pk')).values('c')
+            ), 0),
+            last_vod_at=Subquery(videos.order_by('-created_at').values('created_at')[:1]),
+        )
+
     @action(detail=True, methods=['post'])
     def refresh_vods(self, request, pk=None):
         streamer = self.get_object()
@@ -605,7 +515,6 @@ class ScrapeTaskViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None  # Return all tasks — frontend needs full list for queue UI
 
     def get_queryset(self):
-        from django.db.models import Case, When, IntegerField
         # Show InProgress first, then Pending, then Failed, then Completed
         return ScrapeTask.objects.annotate(
             status_order=Case(
@@ -634,7 +543,6 @@ class ClassificationTaskViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
 
     def get_queryset(self):
-        from django.db.models import Case, When, IntegerField
         return ClassificationTask.objects.annotate(
             status_order=Case(
                 When(status='InProgress', then=0),
@@ -658,9 +566,12 @@ class ClassificationTaskViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'], url_path='requeue')
     def requeue(self, request):
         """
-        Re-queue classification for a video, resetting toxicity scores so all
-        comments get re-classified from scratch.
-        POST /api/classification-tasks/requeue/  { "video_id": "..." }
+        Re-queue classification for a video.
+        POST /api/classification-tasks/requeue/  { "video_id": "...", "reset": false }
+
+        Only comments that are unscored or were scored by another model are
+        re-classified. With reset=true every comment is re-classified. Existing
+        scores stay visible until the worker overwrites them.
         """
         video_id = request.data.get('video_id')
         if not video_id:
@@ -675,8 +586,10 @@ class ClassificationTaskViewSet(viewsets.ReadOnlyModelViewSet):
         if ClassificationTask.objects.filter(video=video, status__in=['Pending', 'InProgress']).exists():
             return Response({'error': 'Classification already in progress for this video'}, status=status.HTTP_409_CONFLICT)
 
-        # Reset all toxicity scores so the worker re-classifies everything
-        Comment.objects.filter(video=video).update(toxicity_score=None, is_toxic=False)
+        # Forget which model produced the scores so the worker treats them all as
+        # outdated, without wiping them
+        if request.data.get('reset'):
+            Comment.objects.filter(video=video).update(toxicity_model=None)
 
         # Replace any existing tasks with a fresh pending one
         ClassificationTask.objects.filter(video=video).delete()
@@ -694,8 +607,7 @@ class TranscriptEntryViewSet(viewsets.ModelViewSet):
     queryset = TranscriptEntry.objects.all().order_by('-video__created_at', 'start_seconds')
     serializer_class = TranscriptEntrySerializer
     filterset_fields = ['video', 'streamer']
-    from django_filters.rest_framework import DjangoFilterBackend
-    from rest_framework.filters import OrderingFilter
+    cursor_ordering = ('video_id', 'start_seconds', 'id')
     filter_backends = [DjangoFilterBackend, OrderingFilter]
 
     def get_queryset(self):
@@ -703,7 +615,6 @@ class TranscriptEntryViewSet(viewsets.ModelViewSet):
         # Try both 'search' and 'search_or' for backwards compatibility/consistency
         search_query = self.request.query_params.get('search_or') or self.request.query_params.get('search')
         if search_query:
-            from django.db.models import Q
             # Only split by comma to allow spaces within a single keyword phrase
             keywords = [k.strip() for k in search_query.split(',') if k.strip()]
             if keywords:
@@ -722,76 +633,117 @@ class TranscriptEntryViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        GET /api/transcripts/search/?q=buenas noches&mode=phrase&distance=10&video=<id>&streamer=<id>
+        Full-text search across neighbouring segments. mode: phrase (default),
+        all (every word) or near (words within `distance` tokens).
+        Paginated; each result has the window timestamps, a <mark>-highlighted
+        snippet and its rank (lower is better on SQLite, higher on PostgreSQL).
+        """
+        query = request.query_params.get('q', '')
+        mode = request.query_params.get('mode', PHRASE)
+        if mode not in (PHRASE, ALL_WORDS, NEAR):
+            return Response({'error': 'mode must be phrase, all or near'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            distance = int(request.query_params.get('distance', 10))
+        except ValueError:
+            return Response({'error': 'distance must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        windows = TranscriptWindow.objects.all()
+        video_id = request.query_params.get('video')
+        if video_id:
+            windows = windows.filter(video_id=video_id)
+        streamer_id = request.query_params.get('streamer')
+        if streamer_id:
+            windows = windows.filter(streamer_id=streamer_id)
+
+        results = search_transcripts(windows, query, mode=mode, distance=distance)
+        if results is None:
+            if not query.strip():
+                return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'error': 'Transcript search needs SQLite FTS5 or PostgreSQL'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        page = self.paginate_queryset(results)
+        return self.get_paginated_response(page)
+
+    @action(detail=False, methods=['get'], url_path='mentions')
+    def mentions(self, request):
+        """
+        GET /api/transcripts/mentions/?name=pepito&streamer=<id>&video=<id>
+        Paginated transcript segments in which the streamer says name (a chatter
+        display name or alias canonical name), newest VOD first.
+        """
+        name = request.query_params.get('name', '').strip()
+        if not name:
+            return Response({'error': 'name is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = mentions_of(name, request.query_params.get('streamer'), request.query_params.get('video'))
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response([
+            {
+                'video_id': row['video_id'],
+                'video_title': row['video__title'],
+                'video_created_at': row['video__created_at'],
+                'entry_id': row['entry_id'],
+                'start_seconds': row['start_seconds'],
+                'end_seconds': row['entry__end_seconds'],
+                'text': row['entry__text'],
+                'count': row['count'],
+            }
+            for row in page
+        ])
+
     @action(detail=False, methods=['post'], url_path='upload')
     def upload(self, request):
         """
         POST /api/transcripts/upload/
         Body: { "video_id": "...", "entries": [ { "Text": "...", "StartMs": 0, "EndMs": 2000 }, ... ] }
 
-        - Si el VOD no existe en la BD → error 404
-        - Si ya tiene transcripts → los reemplaza (actualiza)
-        - Si no tiene transcripts → los crea
-        """
-        video_id = request.data.get('video_id')
-        entries = request.data.get('entries')
+        Optional "mode": "upsert" (default) or "replace".
 
-        if not video_id:
-            return Response({'error': 'video_id es requerido'}, status=status.HTTP_400_BAD_REQUEST)
-        if not isinstance(entries, list) or not entries:
-            return Response({'error': 'entries debe ser una lista no vacía'}, status=status.HTTP_400_BAD_REQUEST)
+        Or, for large transcripts, POST /api/transcripts/upload/?video_id=...&mode=...
+        with Content-Type application/x-ndjson or application/msgpack (one entry
+        per record, [start_ms, end_ms, text] or the object above), optionally
+        with Content-Encoding gzip or zstd; the body is parsed as a stream.
+        For uploads that must survive a dropped connection use
+        /api/transcript-upload-sessions/.
 
-        try:
-            video = Video.objects.get(pk=video_id)
-        except Video.DoesNotExist:
-            return Response(
-                {'error': f'El VOD {video_id} no existe en la base de datos'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        - Si el VOD no existe en la BD → error 404
+        - Si ya tiene transcripts → upsert: segments are matched on (StartMs, EndMs)
+          and only new, changed or missing ones are written, keeping the name
+          corrections of the rest; replace: all are deleted and re-inserted
+        - Si no tiene transcripts → los crea
 
-        streamer = video.streamer
-        if not streamer:
-            return Response(
-                {'error': f'El VOD {video_id} no tiene streamer asociado en la base de datos'},
-                status=status.HTTP_400_BAD_REQUEST
+        Returns 202 once the raw entries are stored, with created / updated /
+        deleted / unchanged counts. Usernames are corrected and the transcript
+        is indexed for search and stats in the background: poll
+        /api/transcript-fix-tasks/<task.id>/ until status is Completed (task is
+        null when nothing changed).
+        """
+        if request.content_type.split(';')[0].strip() in STREAM_TYPES:
+            video_id = request.query_params.get('video_id')
+            mode = request.query_params.get('mode') or UPSERT
+            segments = iter_segments(
+                request.stream, request.content_type.split(';')[0].strip(), request.headers.get('Content-Encoding')
             )
+        else:
+            video_id = request.data.get('video_id')
+            mode = request.data.get('mode') or request.query_params.get('mode') or UPSERT
+            entries = request.data.get('entries')
+            if video_id and (not isinstance(entries, list) or not entries):
+                return Response({'error': 'entries debe ser una lista no vacía'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                segments = [parse_segment(item) for item in entries or []]
+            except (AttributeError, TypeError, ValueError):
+                return Response({'error': 'entries con formato inválido'}, status=status.HTTP_400_BAD_REQUEST)
 
-        existing_count = TranscriptEntry.objects.filter(video=video).count()
-        is_update = existing_count > 0
-
-        if is_update:
-            TranscriptEntry.objects.filter(video=video).delete()
-
-        new_entries = []
-        for item in entries:
-            start_ms = item.get('StartMs') if item.get('StartMs') is not None else item.get('start_ms', 0)
-            end_ms = item.get('EndMs') if item.get('EndMs') is not None else item.get('end_ms', 0)
-            text = item.get('Text') if item.get('Text') is not None else item.get('text', '')
-            new_entries.append(TranscriptEntry(
-                video=video,
-                streamer=streamer,
-                start_seconds=float(start_ms) / 1000.0,
-                end_seconds=float(end_ms) / 1000.0,
-                raw_text=text,
-                text=text,
-            ))
-
-        TranscriptEntry.objects.bulk_create(new_entries)
-
-        # Post-process: fix misspelled usernames using chat commenter names
-        names_fixed = fix_transcript_usernames(video_id)
-
-        action_taken = 'actualizado' if is_update else 'creado'
-        http_status = status.HTTP_200_OK if is_update else status.HTTP_201_CREATED
-        return Response(
-            {
-                'message': f'Transcript {action_taken} para VOD {video_id}',
-                'video_id': video_id,
-                'entries_saved': len(new_entries),
-                'names_corrected': names_fixed,
-                'action': action_taken,
-            },
-            status=http_status
-        )
+        video, error = _upload_target(video_id, mode)
+        if error:
+            return error
+        return _store_transcript(video, segments, mode)
 
     @action(detail=False, methods=['get'], url_path='unmatched_words')
     def unmatched_words(self, request):
@@ -801,43 +753,18 @@ class TranscriptEntryViewSet(viewsets.ModelViewSet):
         checks each one against the transcript word counts, and returns those that appear
         at least min_count times — sorted by count descending.
         """
-        import re
-        from collections import Counter
+        return Response(cached_response(
+            'unmatched_words', request, ALL_DATA, lambda: self._unmatched_words_data(request)
+        ))
 
+    def _unmatched_words_data(self, request):
         streamer_id = request.query_params.get('streamer_id')
         min_count = int(request.query_params.get('min_count', 1))
         extra_raw = request.query_params.get('extra_names', '')
         extra_names = [n.strip() for n in extra_raw.split(',') if n.strip()] if extra_raw else []
 
-        # Build transcript word counts
-        transcript_qs = TranscriptEntry.objects.all()
-        if streamer_id:
-            transcript_qs = transcript_qs.filter(streamer_id=streamer_id)
-        transcripts = transcript_qs.only('text').order_by('-id')[:50000]
-
-        full_text = ' '.join(t.text for t in transcripts if t.text).lower()
-        word_counts = Counter(re.findall(r'\b\w+\b', full_text))
-
-        # Chatter names set: ALL distinct commenter display names in DB
-        all_chatters = set(
-            n for n in
-            Comment.objects.values_list('commenter_display_name', flat=True).distinct()
-            if n
-        )
-        # Also add alias canonical names and any extra names from client
-        for ua in UserAlias.objects.all():
-            if ua.canonical_name:
-                all_chatters.add(ua.canonical_name)
-        all_chatters.update(extra_names)
-
-        results = []
-        for name in all_chatters:
-            count = word_counts.get(name.lower(), 0)
-            if count >= min_count:
-                results.append({'word': name, 'count': count})
-
-        results.sort(key=lambda x: x['count'], reverse=True)
-        return Response(results)
+        # Every Chatter name, alias canonical name and extra name the streamer says as a word
+        return name_word_counts(streamer_id, extra_names, min_count)
 
     @action(detail=False, methods=['post'], url_path='fix_names')
     def fix_names(self, request):
@@ -849,6 +776,8 @@ class TranscriptEntryViewSet(viewsets.ModelViewSet):
           { "all": true }
 
         Re-applies username correction from raw_text for the specified transcripts.
+        A single video is fixed immediately; streamer_login / all queue a
+        TranscriptFixTask and return 202 with it (poll /api/transcript-fix-tasks/<id>/).
         """
         video_id = request.data.get('video_id')
         streamer_login = request.data.get('streamer_login')
@@ -861,8 +790,14 @@ class TranscriptEntryViewSet(viewsets.ModelViewSet):
             )
 
         if video_id:
-            video_ids = [video_id]
-        elif streamer_login:
+            corrected = fix_transcript_usernames(video_id)
+            return Response({
+                'videos_processed': 1,
+                'total_corrected': corrected,
+                'details': {video_id: corrected},
+            })
+
+        if streamer_login:
             video_ids = list(
                 Video.objects
                 .filter(streamer_login__iexact=streamer_login)
@@ -883,20 +818,152 @@ class TranscriptEntryViewSet(viewsets.ModelViewSet):
                 .distinct()
             )
 
-        names = build_global_names_dict()
-        aliases = build_aliases_dict()
-        results = {}
-        total_corrected = 0
-        for vid in video_ids:
-            corrected = fix_transcript_usernames(vid, names=names, aliases=aliases)
-            results[vid] = corrected
-            total_corrected += corrected
-
-        return Response({
-            'videos_processed': len(video_ids),
-            'total_corrected': total_corrected,
-            'details': results,
-        })
+        # Many videos: hand off to run_transcript_worker, which fixes them in parallel
+        scope = f'streamer:{streamer_login}' if streamer_login else 'all'
+        task = TranscriptFixTask.objects.create(scope=scope, video_ids=video_ids)
+        return Response(TranscriptFixTaskSerializer(task).data, status=status.HTTP_202_ACCEPTED)
+
+
+def _upload_target(video_id, mode):
+    """(video, None) if a transcript can be stored for video_id in mode, else (None, error response)."""
+    if not video_id:
+        return None, Response({'error': 'video_id es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+    if mode not in UPLOAD_MODES:
+        return None, Response({'error': 'mode debe ser upsert o replace'}, status=status.HTTP_400_BAD_REQUEST)
+    video = Video.objects.select_related('streamer').filter(pk=video_id).first()
+    if video is None:
+        return None, Response(
+            {'error': f'El VOD {video_id} no existe en la base de datos'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    if not video.streamer:
+        return None, Response(
+            {'error': f'El VOD {video_id} no tiene streamer asociado en la base de datos'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return video, None
+
+
+def _store_transcript(video, segments, mode):
+    """save_transcript() and the 202 response shared by direct and session uploads."""
+    try:
+        counts, is_update, task = save_transcript(video, segments, mode)
+    except UnsupportedUpload as e:
+        return Response({'error': str(e)}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    action_taken = 'actualizado' if is_update else 'creado'
+    return Response(
+        {
+            'message': f'Transcript {action_taken} para VOD {video.pk}',
+            'video_id': video.pk,
+            'entries_saved': counts['received'],
+            'action': action_taken,
+            'mode': mode,
+            **counts,
+            'task': TranscriptFixTaskSerializer(task).data if task else None,
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+class TranscriptUploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    Resumable transcript upload for multi-hour VODs:
+
+    POST /api/transcript-upload-sessions/  { "video_id": "...", "mode": "upsert" }
+    PUT  /api/transcript-upload-sessions/<id>/chunks/<seq>/   (seq from 0)
+         body: NDJSON or msgpack entries, optionally gzip/zstd, as for
+         /api/transcripts/upload/. Re-sending a chunk replaces it.
+    GET  /api/transcript-upload-sessions/<id>/   → received_chunks, to resume
+    POST /api/transcript-upload-sessions/<id>/commit/  { "chunks": N }
+         stores chunks 0..N-1 in order as one upload (same response as
+         /api/transcripts/upload/); 409 lists missing chunks.
+    """
+    serializer_class = TranscriptUploadSessionSerializer
+    queryset = TranscriptUploadSession.objects.all()
+    pagination_class = None
+
+    STALE_AFTER = timedelta(days=2)
+
+    def create(self, request):
+        video_id = request.data.get('video_id')
+        mode = request.data.get('mode') or UPSERT
+        video, error = _upload_target(video_id, mode)
+        if error:
+            return error
+        # Sessions abandoned mid-upload only hold staged chunks; drop old ones here
+        TranscriptUploadSession.objects.filter(
+            status='Open', updated_at__lt=datetime.now(timezone.utc) - self.STALE_AFTER
+        ).delete()
+        session = TranscriptUploadSession.objects.create(video=video, mode=mode)
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<seq>\d+)')
+    def chunk(self, request, pk=None, seq=None):
+        session = self.get_object()
+        if session.status != 'Open':
+            return Response({'error': 'La sesión ya fue confirmada'}, status=status.HTTP_409_CONFLICT)
+        content_type = request.content_type.split(';')[0].strip()
+        try:
+            segments = list(iter_segments(request.stream, content_type, request.headers.get('Content-Encoding')))
+        except UnsupportedUpload as e:
+            return Response({'error': str(e)}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        TranscriptUploadChunk.objects.update_or_create(
+            session=session, seq=int(seq), defaults={'segments': segments}
+        )
+        session.save(update_fields=['updated_at'])
+        return Response({'seq': int(seq), 'entries': len(segments)})
+
+    @action(detail=True, methods=['post'])
+    def commit(self, request, pk=None):
+        session = self.get_object()
+        if session.status != 'Open':
+            return Response({'error': 'La sesión ya fue confirmada'}, status=status.HTTP_409_CONFLICT)
+        try:
+            total = int(request.data.get('chunks'))
+        except (TypeError, ValueError):
+            return Response({'error': 'chunks debe ser el número de partes enviadas'}, status=status.HTTP_400_BAD_REQUEST)
+
+        received = set(session.chunks.values_list('seq', flat=True))
+        missing = sorted(set(range(total)) - received)
+        if missing:
+            return Response({'error': 'Faltan partes', 'missing': missing}, status=status.HTTP_409_CONFLICT)
+
+        video, error = _upload_target(session.video_id, session.mode)
+        if error:
+            return error
+        segments = (
+            tuple(segment)
+            for chunk in session.chunks.filter(seq__lt=total).order_by('seq').values_list('segments', flat=True).iterator(chunk_size=20)
+            for segment in chunk
+        )
+        response = _store_transcript(video, segments, session.mode)
+        if response.status_code == status.HTTP_202_ACCEPTED:
+            session.status = 'Committed'
+            session.save(update_fields=['status', 'updated_at'])
+            session.chunks.all().delete()
+        return response
+
+
+class TranscriptFixTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    GET /api/transcript-fix-tasks/<id>/ — progress of background username correction.
+    GET /api/transcript-fix-tasks/?scope=video:<id> — jobs for one uploaded VOD.
+    """
+    serializer_class = TranscriptFixTaskSerializer
+    filterset_fields = ['status', 'scope']
+    pagination_class = None
+
+    def get_queryset(self):
+        return TranscriptFixTask.objects.order_by('-created_at')
 
 
 class UserAliasViewSet(viewsets.ModelViewSet):
@@ -927,10 +994,69 @@ class UserAliasViewSet(viewsets.ModelViewSet):
                 if created:
                     created_count += 1
 
+        bump_data_version('names')
         return Response({'created': created_count}, status=status.HTTP_201_CREATED)
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        bump_data_version('names')
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        bump_data_version('names')
+
 
 class ExcludedShoutoutViewSet(viewsets.ModelViewSet):
     queryset = ExcludedShoutout.objects.all()
     serializer_class = ExcludedShoutoutSerializer
     http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        bump_data_version('names')
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        bump_data_version('names')
+
+
+class SearchViewSet(viewsets.GenericViewSet):
+    """
+    GET /api/search/?q=buenas noches,pepito&streamer=<id>&exclude_users=a,b&min_toxicity=70&sources=chat,transcripts
+    Chat and transcripts in one request. q holds comma-separated alternatives
+    (each needs all of its words; chat matches word prefixes, transcripts the
+    phrase). Paginated by VOD: each result is a VOD with its matching comments
+    and transcript segments in time order, a 0..1 score per hit and the VOD's
+    best score; VODs come best match first, then newest. Transcript hits have
+    'chat': the message rate around them next to the VOD's average.
+    Without q, min_toxicity alone lists toxic comments.
+    """
+    pagination_class = FlexiblePagination
+
+    def list(self, request):
+        queries = [k.strip() for k in request.query_params.get('q', '').split(',') if k.strip()]
+        sources = [k.strip() for k in request.query_params.get('sources', ','.join(SEARCH_SOURCES)).split(',') if k.strip()]
+        if not set(sources) <= set(SEARCH_SOURCES) or not sources:
+            return Response({'error': 'sources must be chat, transcripts or both'}, status=status.HTTP_400_BAD_REQUEST)
+
+        min_toxicity = request.query_params.get('min_toxicity')
+        if min_toxicity:
+            try:
+                min_toxicity = float(min_toxicity) / 100.0
+            except ValueError:
+                return Response({'error': 'min_toxicity must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            min_toxicity = None
+        if not queries and min_toxicity is None:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        exclude_users = request.query_params.get('exclude_users', '')
+        groups = search_all(
+            queries,
+            streamer_id=request.query_params.get('streamer'),
+            exclude_users=[u.strip().lower() for u in exclude_users.split(',') if u.strip()],
+            min_toxicity=min_toxicity,
+            sources=sources,
+        )
+        page = self.paginate_queryset(groups)
+        return self.get_paginated_response(attach_chat_activity(page))
@@ -310,6 +310,13 @@ def process_vod(vod_id: str, model, model_name: str, duration_s: int | None = No
     elif code == 201:
         print(f"  ✓ Creado     — {body.get('entries_saved', len(entries))} entradas  |  total: {total}")
         return True
+    elif code == 202:
+        # Guardado; la corrección de nombres corre en segundo plano en el servidor
+        verb = "Actualizado" if body.get("action") == "actualizado" else "Creado     "
+        task_id = (body.get("task") or {}).get("id", "sin cambios")
+        diff = f"+{body.get('created', 0)} ~{body.get('updated', 0)} -{body.get('deleted', 0)}"
+        print(f"  ✓ {verb} — {body.get('entries_saved', len(entries))} entradas ({diff})  |  nombres: tarea {task_id}  |  total: {total}")
+        return True
     elif code == 404:
         print(f"  ✗ VOD no existe en la BD: {body.get('error', '')}")
         return False
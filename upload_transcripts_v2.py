@@ -12,6 +12,8 @@ Uso:
   python3 upload_transcripts_v2.py --all --model large  # Usar modelo Whisper distinto
 """
 
+import gzip
+import hashlib
 import json
 import argparse
 import subprocess
@@ -25,9 +27,11 @@ from tqdm import tqdm
 
 # ─── CONFIGURACIÓN ───────────────────────────────────────────────────────────
 API_BASE_URL  = "https://backend.permisossubtel.cl/api"
-UPLOAD_URL    = f"{API_BASE_URL}/transcripts/upload/"
+SESSIONS_URL  = f"{API_BASE_URL}/transcript-upload-sessions/"
 VIDEOS_URL    = f"{API_BASE_URL}/videos/"
 CACHE_DIR     = Path("transcripts_cache")
+CHUNK_ENTRIES = 2000   # segmentos por parte en la subida reanudable
+CHUNK_RETRIES = 5
 # ─────────────────────────────────────────────────────────────────────────────
 
 # Velocidad estimada de faster-whisper (segundos de audio por segundo real)
@@ -222,13 +226,82 @@ def save_cache(vod_id: str, entries: list) -> Path:
     return path
 
 
+def _session_path(vod_id: str) -> Path:
+    return CACHE_DIR / f"{vod_id}.upload"
+
+
+def _entries_digest(entries: list) -> str:
+    """Huella del contenido y del tamaño de parte: las partes ya subidas solo sirven si ambos coinciden."""
+    data = json.dumps([CHUNK_ENTRIES, entries], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _open_session(vod_id: str, entries: list) -> tuple[str, set]:
+    """
+    Sesión de subida guardada para el VOD (y partes ya recibidas) si se abrió
+    para estos mismos segmentos; si no, una nueva.
+    """
+    path = _session_path(vod_id)
+    digest = _entries_digest(entries)
+    if path.exists():
+        try:
+            saved = json.loads(path.read_text())
+        except ValueError:
+            saved = None
+        if isinstance(saved, dict) and saved.get("digest") == digest:
+            session_id = saved["session"]
+            resp = requests.get(f"{SESSIONS_URL}{session_id}/", timeout=15)
+            if resp.status_code == 200 and resp.json().get("status") == "Open":
+                return session_id, set(resp.json().get("received_chunks", []))
+
+    resp = requests.post(SESSIONS_URL, json={"video_id": vod_id}, timeout=15)
+    if resp.status_code != 201:
+        raise RuntimeError(f"[{resp.status_code}] {resp.json()}")
+    session_id = resp.json()["id"]
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"session": session_id, "digest": digest}))
+    return session_id, set()
+
+
+def _put_chunk(session_id: str, seq: int, entries: list):
+    """Sube una parte como NDJSON gzip ([start_ms, end_ms, text] por línea), con reintentos."""
+    body = gzip.compress("".join(
+        json.dumps([e["StartMs"], e["EndMs"], e["Text"]], ensure_ascii=False) + "\n" for e in entries
+    ).encode("utf-8"))
+    for attempt in range(CHUNK_RETRIES):
+        try:
+            resp = requests.put(
+                f"{SESSIONS_URL}{session_id}/chunks/{seq}/",
+                data=body,
+                headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+                timeout=60,
+            )
+            if resp.status_code == 200:
+                return
+            if resp.status_code < 500:
+                raise RuntimeError(f"parte {seq}: [{resp.status_code}] {resp.json()}")
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(2 ** attempt)
+    raise RuntimeError(f"parte {seq}: sin respuesta tras {CHUNK_RETRIES} intentos")
+
+
 def upload(vod_id: str, entries: list) -> dict:
+    """
+    Sube el transcript en partes comprimidas a una sesión reanudable: si se
+    corta, la siguiente ejecución retoma la sesión y solo envía las partes que
+    faltan (si el transcript cambió entretanto, empieza una sesión nueva). Al final confirma la sesión (misma respuesta que /transcripts/upload/).
+    """
     try:
-        resp = requests.post(
-            UPLOAD_URL,
-            json={"video_id": vod_id, "entries": entries},
-            timeout=30,
-        )
+        session_id, received = _open_session(vod_id, entries)
+        chunks = [entries[i:i + CHUNK_ENTRIES] for i in range(0, len(entries), CHUNK_ENTRIES)]
+        for seq, chunk in enumerate(tqdm(chunks, desc="    Subida", unit="parte", dynamic_ncols=True)):
+            if seq not in received:
+                _put_chunk(session_id, seq, chunk)
+
+        resp = requests.post(f"{SESSIONS_URL}{session_id}/commit/", json={"chunks": len(chunks)}, timeout=300)
+        if resp.status_code == 202:
+            _session_path(vod_id).unlink(missing_ok=True)
         return {"code": resp.status_code, "body": resp.json()}
     except requests.exceptions.ConnectionError:
         return {"code": None, "body": {"error": "No se pudo conectar al servidor"}}
@@ -290,6 +363,13 @@ def process_vod(vod_id: str, model, model_name: str, duration_s: int | None = No
     elif code == 201:
         print(f"  ✓ Creado     — {body.get('entries_saved', len(entries))} entradas  |  total: {total}")
         return True
+    elif code == 202:
+        # Guardado; la corrección de nombres corre en segundo plano en el servidor
+        verb = "Actualizado" if body.get("action") == "actualizado" else "Creado     "
+        task_id = (body.get("task") or {}).get("id", "sin cambios")
+        diff = f"+{body.get('created', 0)} ~{body.get('updated', 0)} -{body.get('deleted', 0)}"
+        print(f"  ✓ {verb} — {body.get('entries_saved', len(entries))} entradas ({diff})  |  nombres: tarea {task_id}  |  total: {total}")
+        return True
     elif code == 404:
         print(f"  ✗ VOD no existe en la BD: {body.get('error', '')}")
         return False